@@ -18,10 +18,15 @@ distribution, or modification is strictly prohibited.
 import streamlit as st
 import pandas as pd
 import json
+import base64
+import hashlib
 from datetime import datetime, date
 import uuid
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import os
+import tempfile
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -32,8 +37,13 @@ from data.rubrics import get_field_evaluation_items, get_ster_items, get_profess
 from data.synthetic import generate_synthetic_evaluations
 from services.openai_service import OpenAIService
 from services.pdf_service import PDFService
-from utils.storage import save_evaluation, load_evaluations, export_data, import_data, save_ai_original, get_evaluation_comparison, get_evaluation_by_id
+from services.ai_scheduler import AIRequestCancelled, get_ai_request_scheduler
+from services.ai_worker import PDF_GENERATION
+from utils.storage import save_evaluation, load_evaluations, load_evaluation_summaries, export_data, import_data, export_ndjson, import_ndjson, save_ai_original, get_evaluation_comparison, get_evaluation_by_id, resolve_evaluation_blobs, query_evaluations, search_evaluations, restore_archived_evaluations, get_evaluation_stats, create_backup, VersionConflictError
 from utils.validation import validate_evaluation, calculate_score
+from utils.ai_results import compute_input_hash, save_ai_result, update_ai_result, load_ai_result, load_ai_results, delete_ai_result
+from utils.job_queue import JobQueue, SUCCEEDED, FAILED, CANCELLED, FINISHED_STATUSES
+from utils.autosave import get_draft_autosaver
 
 # Page configuration
 st.set_page_config(
@@ -274,10 +284,323 @@ st.markdown("""
 # Initialize services
 openai_service = OpenAIService()
 pdf_service = PDFService()
+ai_scheduler = get_ai_request_scheduler()
+
+# Maximum time an AI request may run before it is aborted
+AI_REQUEST_DEADLINE_SECONDS = float(os.getenv('AI_REQUEST_DEADLINE_SECONDS', '120'))
+
+# Hand AI requests to the background worker (services/ai_worker.py) instead of running them in the session
+AI_WORKER_ENABLED = os.getenv('AI_WORKER_ENABLED', 'false').lower() == 'true'
+AI_JOB_POLL_SECONDS = float(os.getenv('AI_JOB_POLL_SECONDS', '2'))
+
+# Worker job type and display label for each persisted AI result
+AI_JOB_TYPES = {
+    'lesson_plan_analysis': 'lesson_plan_analysis',
+    'ai_analyses': 'competency_analysis',
+    'targeted_improvement_analysis': 'targeted_improvement_analysis'
+}
+AI_JOB_LABELS = {
+    'lesson_plan_analysis': "Lesson plan analysis",
+    'ai_analyses': "Competency analysis",
+    'targeted_improvement_analysis': "Targeted improvement analysis"
+}
+# Inference task (see AI_TASK_BACKENDS) serving each persisted AI result
+AI_RESULT_TASKS = {
+    'lesson_plan_analysis': 'lesson_plan_analysis',
+    'ai_analyses': 'competency_analysis',
+    'targeted_improvement_analysis': 'evaluation_analysis'
+}
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Get the shared background job queue"""
+    return JobQueue()
+
+def get_draft_id() -> str:
+    """Get the ID of the evaluation draft being edited in this session, creating one if needed"""
+    if not st.session_state.get('current_evaluation_id'):
+        st.session_state.current_evaluation_id = str(uuid.uuid4())
+    # Keep the draft in the URL so a refresh or reconnect can restore it
+    if st.query_params.get('draft') != st.session_state.current_evaluation_id:
+        st.query_params['draft'] = st.session_state.current_evaluation_id
+    return st.session_state.current_evaluation_id
+
+def restore_draft_session():
+    """Rehydrate stored AI results for the draft in the URL when a session starts"""
+    if st.session_state.get('draft_session_restored'):
+        return
+    st.session_state.draft_session_restored = True
+    
+    draft_id = st.query_params.get('draft')
+    if not draft_id:
+        return
+    st.session_state.current_evaluation_id = draft_id
+    
+    stored = get_evaluation_by_id(draft_id, resolve_blobs=False, include_archived=False)
+    if stored:
+        st.session_state.setdefault('saved_versions', {})[draft_id] = stored.get('version', 0)
+    
+    results = load_ai_results(draft_id)
+    if results.get('lesson_plan_analysis'):
+        st.session_state.lesson_plan_analysis = results['lesson_plan_analysis']
+    if results.get('ai_analyses'):
+        st.session_state.ai_analyses = dict(results['ai_analyses'])
+        st.session_state.justifications = dict(results['ai_analyses'])
+    if results.get('targeted_improvement_analysis'):
+        st.session_state.targeted_improvement_analysis = results['targeted_improvement_analysis']
+
+def get_session_version(evaluation_id: str) -> int:
+    """Get the stored version of an evaluation this session last saw, including its own autosaves"""
+    saved_versions = st.session_state.setdefault('saved_versions', {})
+    autosaved_version = get_draft_autosaver().saved_version(evaluation_id)
+    if autosaved_version is not None and autosaved_version > saved_versions.get(evaluation_id, 0):
+        saved_versions[evaluation_id] = autosaved_version
+    if evaluation_id not in saved_versions:
+        stored = get_evaluation_by_id(evaluation_id, resolve_blobs=False, include_archived=False)
+        saved_versions[evaluation_id] = stored.get('version', 0) if stored else 0
+    return saved_versions[evaluation_id]
+
+def get_session_record(evaluation_id: str) -> Dict[str, Any]:
+    """Get the stored status and created_at of an evaluation as this session last saved or loaded them
+    
+    A new evaluation has no status yet and is created now.
+    """
+    records = st.session_state.setdefault('saved_records', {})
+    if evaluation_id not in records:
+        stored = get_evaluation_by_id(evaluation_id, resolve_blobs=False, include_archived=False)
+        records[evaluation_id] = {
+            'status': stored.get('status') if stored else None,
+            'created_at': (stored.get('created_at') if stored else None) or datetime.now().isoformat()
+        }
+    return records[evaluation_id]
+
+def build_session_evaluation(evaluation_id: str, status: str, student_name: str, evaluator_name: str,
+                             evaluator_role: str, rubric_type: str, items: List[Dict[str, Any]],
+                             total_score: int, lesson_plan_method: str) -> Dict[str, Any]:
+    """Build the evaluation record saved from this session's form (drafts, autosaves and completions)"""
+    extracted_info = st.session_state.get('extracted_info', {})
+    evaluation = {
+        'id': evaluation_id,
+        'student_name': student_name,
+        'evaluator_name': evaluator_name,
+        'evaluator_role': evaluator_role,
+        'rubric_type': rubric_type,
+        'evaluated_items_count': len(items),  # Track how many items this role evaluated
+        'scores': st.session_state.scores,
+        'justifications': st.session_state.justifications,
+        'disposition_scores': st.session_state.disposition_scores if rubric_type == "field_evaluation" else {},
+        'disposition_comments': st.session_state.disposition_comments if rubric_type == "field_evaluation" else {},
+        'total_score': total_score,
+        'status': status,
+        # Keep the original creation time across saves
+        'created_at': get_session_record(evaluation_id)['created_at'],
+        'lesson_plan_provided': st.session_state.lesson_plan_analysis is not None,
+        'lesson_plan_method': lesson_plan_method,
+        'ai_analyses': st.session_state.get('ai_analyses', {}),
+        'targeted_improvement_analysis': st.session_state.get('targeted_improvement_analysis', ''),
+        # Dashboard fields
+        'subject_area': extracted_info.get('subject_area', ''),
+        'department': extracted_info.get('department', 'Secondary'),
+        'semester': extracted_info.get('semester', 'Spring 2025'),
+        'grade_levels': extracted_info.get('grade_levels', ''),
+        'school_name': extracted_info.get('school_name', ''),
+        'class_size': extracted_info.get('class_size', 20)
+    }
+    
+    # Add AI original data if available
+    if st.session_state.get('ai_original_data'):
+        evaluation['ai_original'] = st.session_state.ai_original_data
+        evaluation['has_ai_original'] = True
+        evaluation['ai_original_saved_at'] = st.session_state.ai_original_data.get('saved_at')
+    return evaluation
+
+def save_session_evaluation(evaluation: Dict[str, Any]) -> bool:
+    """Save this session's evaluation unless another session or tab saved it since
+    
+    The version this session last saw is kept per evaluation ID, so a stale
+    save is refused instead of overwriting the newer one.
+    """
+    autosaver = get_draft_autosaver()
+    autosaver.flush(evaluation['id'])
+    expected_version = get_session_version(evaluation['id'])
+    saved_versions = st.session_state.saved_versions
+    
+    try:
+        saved_versions[evaluation['id']] = save_evaluation(evaluation, expected_version=expected_version)
+    except VersionConflictError as e:
+        st.error(f"⚠️ Not saved: this evaluation was changed in another session or tab since you opened it "
+                 f"(version {e.current_version}). Reload it from the dashboard before saving again.")
+        return False
+    autosaver.mark_saved(evaluation, saved_versions[evaluation['id']])
+    get_session_record(evaluation['id']).update(status=evaluation.get('status'), created_at=evaluation.get('created_at'))
+    return True
+
+def run_ai_request(operation: str, fn, *args, **kwargs):
+    """Run an OpenAIService call for the current draft with a deadline and cancellation
+    
+    The call runs on the AI request scheduler while this script thread waits.
+    A rerun (superseding click or navigation) interrupts the wait, and the
+    request is then cancelled so its HTTP connection is closed.
+    """
+    token = ai_scheduler.begin(get_draft_id(), operation, deadline_seconds=AI_REQUEST_DEADLINE_SECONDS)
+    future = ai_scheduler.submit(token, fn, *args, **kwargs)
+    progress = st.empty()
+    started = time.monotonic()
+    try:
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeoutError:
+                # Updating an element lets Streamlit stop this run if the user moved on
+                progress.caption(f"⏳ Waiting for AI response... {time.monotonic() - started:.0f}s")
+    finally:
+        if not future.done():
+            token.cancel("interrupted by a newer action")
+        progress.empty()
+        ai_scheduler.finish(token)
+
+def run_persisted_ai_request(kind: str, input_parts: tuple, fn, *args, **kwargs):
+    """Run an AI request through the durable result store for the current draft
+    
+    A result already stored for the same draft and inputs is returned without
+    calling the API; a new result is written through before it is returned.
+    """
+    draft_id = get_draft_id()
+    # Key results to the model that serves the task, so a routing or model change is not served stale results
+    input_hash = compute_input_hash(kind, openai_service.model_for_task(AI_RESULT_TASKS[kind]), *input_parts)
+    stored = load_ai_result(draft_id, kind, input_hash)
+    if stored is not None:
+        return stored
+    
+    if AI_WORKER_ENABLED and kind in AI_JOB_TYPES:
+        # The worker writes the result through to the store; the form polls for it
+        job_id = get_job_queue().enqueue(
+            AI_JOB_TYPES[kind],
+            {'args': list(args), 'kwargs': kwargs, 'result_key': {'kind': kind, 'input_hash': input_hash}},
+            draft_id=draft_id
+        )
+        pending_jobs = st.session_state.setdefault('pending_ai_jobs', {})
+        if kind in pending_jobs:
+            get_job_queue().cancel(pending_jobs[kind])
+        pending_jobs[kind] = job_id
+        st.rerun()
+    
+    result = run_ai_request(kind, fn, *args, **kwargs)
+    save_ai_result(draft_id, kind, input_hash, result)
+    return result
+
+def apply_ai_result(kind: str, result):
+    """Store a finished AI result in session state the same way the inline request does"""
+    if kind == 'lesson_plan_analysis':
+        result['extraction_timestamp'] = datetime.now().isoformat()
+        st.session_state.lesson_plan_analysis = result
+    elif kind == 'ai_analyses':
+        st.session_state.ai_analyses = result
+        st.session_state.setdefault('justifications', {}).update(result)
+    elif kind == 'targeted_improvement_analysis':
+        st.session_state.targeted_improvement_analysis = result
+
+def cancel_pending_ai_job(kind: str):
+    """Cancel the background job for a result type, if one is pending"""
+    job_id = st.session_state.get('pending_ai_jobs', {}).pop(kind, None)
+    if job_id:
+        get_job_queue().cancel(job_id)
+
+def show_pending_ai_jobs():
+    """Show the status of background AI jobs for this draft and apply finished results"""
+    pending_jobs = st.session_state.get('pending_ai_jobs', {})
+    for kind, job_id in list(pending_jobs.items()):
+        job = get_job_queue().get_job(job_id)
+        label = AI_JOB_LABELS.get(kind, kind)
+        
+        if job is None or job['status'] == CANCELLED:
+            del pending_jobs[kind]
+            st.warning(f"⏹️ {label} was cancelled")
+        elif job['status'] == SUCCEEDED:
+            del pending_jobs[kind]
+            apply_ai_result(kind, job['result'])
+            st.success(f"✅ {label} finished")
+        elif job['status'] == FAILED:
+            del pending_jobs[kind]
+            st.error(f"{label} failed after {job['attempts']} attempt(s): {job['error']}")
+        else:
+            retry_note = f" (retry {job['attempts']}/{job['max_attempts']})" if job['attempts'] > 1 else ""
+            st.info(f"⏳ {label} is {job['status'].replace('_', ' ')} in the background{retry_note}...")
+
+def render_pdf_download(key: str, pdf_data: Dict[str, Any], file_name: str, draft_id: Optional[str] = None,
+                        **button_kwargs):
+    """Show a download button for an evaluation PDF report
+    
+    With the background worker enabled the PDF is rendered by a
+    pdf_generation job and the button appears once it finishes; the job is
+    queued again only when the report data changes.
+    
+    Args:
+        key: Identifies the report in this session, e.g. "current_report:<draft id>"
+        button_kwargs: st.download_button arguments (label, help, type)
+    """
+    if not AI_WORKER_ENABLED:
+        st.download_button(data=pdf_service.generate_evaluation_pdf(pdf_data), file_name=file_name,
+                           mime="application/pdf", **button_kwargs)
+        return
+    
+    request_pdf_job(key, pdf_data, file_name, draft_id, button_kwargs)
+    show_pdf_job(key)
+
+def request_pdf_job(key: str, pdf_data: Dict[str, Any], file_name: str, draft_id: Optional[str],
+                    button_kwargs: Dict[str, Any]):
+    """Queue a PDF report for the worker unless the same report is already queued or rendered"""
+    data = json.loads(json.dumps(pdf_data, ensure_ascii=False, default=str))
+    fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+    pdf_jobs = st.session_state.setdefault('pdf_jobs', {})
+    previous = pdf_jobs.get(key)
+    if previous and previous['fingerprint'] == fingerprint:
+        return
+    if previous and not previous['done']:
+        get_job_queue().cancel(previous['job_id'])
+    job_id = get_job_queue().enqueue(
+        PDF_GENERATION,
+        {'report': 'evaluation', 'data': data, 'file_name': file_name},
+        draft_id=draft_id
+    )
+    pdf_jobs[key] = {'job_id': job_id, 'fingerprint': fingerprint, 'button': button_kwargs, 'done': False}
+
+def show_pdf_job(key: str):
+    """Show the status of a queued PDF report, or its download button once rendered"""
+    entry = st.session_state.get('pdf_jobs', {}).get(key)
+    if entry is None:
+        return
+    job = get_job_queue().get_job(entry['job_id'])
+    if job is None or job['status'] == CANCELLED:
+        entry['done'] = True
+        st.warning("⏹️ PDF generation was cancelled")
+    elif job['status'] == SUCCEEDED:
+        entry['done'] = True
+        st.download_button(data=base64.b64decode(job['result']['pdf_base64']), file_name=job['result']['file_name'],
+                           mime="application/pdf", **entry['button'])
+    elif job['status'] == FAILED:
+        entry['done'] = True
+        st.error(f"Error generating PDF: {job['error']}")
+    else:
+        st.info(f"⏳ PDF report is {job['status'].replace('_', ' ')} in the background...")
+
+def has_running_pdf_jobs() -> bool:
+    """Check whether any PDF report queued by this session is still being rendered"""
+    running = False
+    for entry in st.session_state.get('pdf_jobs', {}).values():
+        if entry['done']:
+            continue
+        job = get_job_queue().get_job(entry['job_id'])
+        if job is None or job['status'] in FINISHED_STATUSES:
+            continue  # Shown (and marked done) the next time its report section renders
+        running = True
+    return running
 
 def main():
     """Main application entry point"""
     
+    restore_draft_session()
+    
     # Clean, professional header following UVU guidelines
     col1, col2 = st.columns([3, 1])
     with col1:
@@ -315,20 +638,27 @@ def main():
         # Quick statistics
         st.markdown("### Quick Statistics")
         
-        evaluations = load_evaluations()
+        stats = get_evaluation_stats()
         
         # Simple metrics display
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total", len(evaluations))
-            st.metric("Drafts", len([e for e in evaluations if e.get('status') == 'draft']))
+            st.metric("Total", stats['count'])
+            st.metric("Drafts", stats['by_status'].get('draft', 0))
         with col2:
-            st.metric("Completed", len([e for e in evaluations if e.get('status') == 'completed']))
-            if evaluations:
-                lesson_plan_count = len([e for e in evaluations if e.get('lesson_plan_provided', False)])
-                submission_rate = (lesson_plan_count / len(evaluations)) * 100
+            st.metric("Completed", stats['by_status'].get('completed', 0))
+            if stats['count']:
+                submission_rate = (stats['lesson_plan_provided'] / stats['count']) * 100
                 st.metric("LP Rate", f"{submission_rate:.0f}%")
     
+    # Abort AI requests for the current draft, and save its pending edits, when leaving the evaluation form
+    if page != "📝 New Evaluation" and st.session_state.get('current_evaluation_id'):
+        get_draft_autosaver().flush(st.session_state.current_evaluation_id)
+        ai_scheduler.cancel_draft(st.session_state.current_evaluation_id, "navigated away")
+        if st.session_state.get('pending_ai_jobs'):
+            get_job_queue().cancel_draft_jobs(st.session_state.current_evaluation_id)
+            st.session_state.pending_ai_jobs = {}
+    
     # Route to different pages
     if page == "📊 Dashboard":
         show_dashboard()
@@ -338,13 +668,19 @@ def main():
         show_test_data()
     elif page == "⚙️ Settings":
         show_settings()
+    
+    # Poll background AI and PDF jobs until they finish
+    if (page == "📝 New Evaluation" and st.session_state.get('pending_ai_jobs')) or has_running_pdf_jobs():
+        time.sleep(AI_JOB_POLL_SECONDS)
+        st.rerun()
 
 def show_dashboard():
     """Dashboard with evaluation overview and analytics"""
     st.header("📊 Evaluation Dashboard")
     st.markdown("Track your evaluation progress and analytics")
     
-    evaluations = load_evaluations()
+    # Summaries leave out lesson plans, justifications and AI analyses
+    evaluations = load_evaluation_summaries()
     
     if not evaluations:
         st.info("No evaluations found. Create your first evaluation to get started!")
@@ -356,6 +692,36 @@ def show_dashboard():
     # Convert to DataFrame for analysis
     df = pd.DataFrame(evaluations)
     
+    # Full-text search
+    search_query = st.text_input(
+        "🔎 Search evaluations",
+        placeholder='e.g. wait time, "IEP accommodations"',
+        help="Searches justifications, AI analyses, observation notes and lesson plans. "
+             "All words must match; use quotes for an exact phrase."
+    )
+    if search_query.strip():
+        results = search_evaluations(
+            search_query, limit=20,
+            fields=['id', 'student_name', 'evaluator_name', 'rubric_type', 'status', 'created_at', 'semester']
+        )
+        if results:
+            st.caption(f"{len(results)} matching evaluation(s), best match first")
+            for result in results:
+                st.markdown(
+                    f"**{result.get('student_name', 'Unknown')}** · {result.get('evaluator_name', 'Unknown')} · "
+                    f"{result.get('rubric_type', '')} · {result.get('status', '')} · "
+                    f"{str(result.get('created_at', ''))[:10]}"
+                    + (f" · 📦 archived ({result.get('semester') or 'no semester'})" if result['archived'] else "")
+                )
+                st.caption(result['snippet'])
+                if result['archived'] and st.button("📂 Re-open", key=f"restore_{result['id']}",
+                                                    help="Move this evaluation back out of the archive"):
+                    restore_archived_evaluations([result['id']])
+                    st.rerun()
+        else:
+            st.info("No evaluations match your search.")
+        st.markdown("---")
+    
     # Enhanced Metrics Row 1
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -481,7 +847,7 @@ def show_dashboard():
     # Enhanced Competency Area Performance Analysis
     st.subheader("🎯 Competency Area Performance")
     
-    completed_evals = [e for e in evaluations if e.get('status') == 'completed']
+    completed_evals = query_evaluations(status='completed', limit=None)['items']
     if completed_evals:
         competency_analysis = analyze_competency_performance(completed_evals)
         
@@ -519,8 +885,8 @@ def show_dashboard():
                 st.markdown("**Performance by Evaluation Type:**")
                 
                 # Analyze by rubric type
-                field_evals = [e for e in completed_evals if e.get('rubric_type') == 'field_evaluation']
-                ster_evals = [e for e in completed_evals if e.get('rubric_type') == 'ster']
+                field_evals = query_evaluations(status='completed', rubric_type='field_evaluation', limit=None)['items']
+                ster_evals = query_evaluations(status='completed', rubric_type='ster', limit=None)['items']
                 
                 col1, col2 = st.columns(2)
                 
@@ -557,9 +923,9 @@ def show_dashboard():
                     st.markdown("---")
                     st.markdown("**Performance by Department:**")
                     
-                    departments = df['department'].unique()
+                    departments = df['department'].dropna().unique()
                     for dept in departments:
-                        dept_evals = [e for e in completed_evals if e.get('department') == dept]
+                        dept_evals = query_evaluations(status='completed', department=dept, limit=None)['items']
                         if dept_evals:
                             dept_analysis = analyze_competency_performance(dept_evals)
                             if dept_analysis:
@@ -569,7 +935,7 @@ def show_dashboard():
         st.info("No completed evaluations for competency analysis")
     
     # Enhanced Professional Dispositions Summary (Field Evaluations Only)
-    field_evals = [e for e in completed_evals if e.get('rubric_type') == 'field_evaluation']
+    field_evals = query_evaluations(status='completed', rubric_type='field_evaluation', limit=None)['items']
     if field_evals:
         st.subheader("🌟 Professional Dispositions Summary")
         st.caption("Analysis of professional dispositions from field evaluations only")
@@ -627,9 +993,10 @@ def show_dashboard():
                 st.markdown("**Performance by Department:**")
                 
                 if 'department' in df.columns:
-                    departments = df['department'].unique()
+                    departments = df['department'].dropna().unique()
                     for dept in departments:
-                        dept_field_evals = [e for e in field_evals if e.get('department') == dept]
+                        dept_field_evals = query_evaluations(status='completed', rubric_type='field_evaluation',
+                                                             department=dept, limit=None)['items']
                         if dept_field_evals:
                             dept_disp_analysis = analyze_disposition_performance(dept_field_evals)
                             if dept_disp_analysis:
@@ -678,11 +1045,8 @@ def show_dashboard():
     # Enhanced Recent Evaluations Table
     st.subheader("📋 Recent Evaluations")
     
-    # Check if created_at column exists and sort accordingly
-    if 'created_at' in df.columns:
-        recent_df = df.sort_values('created_at', ascending=False).head(10)
-    else:
-        recent_df = df.head(10)
+    # Only the ten newest rows are fetched and sorted
+    recent_df = pd.DataFrame(query_evaluations(sort_by='created_at', descending=True, limit=10)['items'])
     
     # Enhanced display columns with new dashboard fields
     display_columns = ['student_name', 'evaluator_name', 'school_name', 'subject_area', 
@@ -693,7 +1057,7 @@ def show_dashboard():
     display_df = recent_df[available_columns].copy()
     
     # Add date if available
-    if 'created_at' in df.columns:
+    if 'created_at' in recent_df.columns:
         display_df['created_at'] = pd.to_datetime(recent_df['created_at']).dt.strftime('%Y-%m-%d')
         available_columns.append('created_at')
     
@@ -734,7 +1098,7 @@ def show_dashboard():
         
         if selected_eval_idx is not None:
             selected_eval = completed_evals[selected_eval_idx]
-            show_detailed_evaluation_view(selected_eval)
+            show_detailed_evaluation_view(get_evaluation_by_id(selected_eval['id']) or selected_eval)
     
     # Export functionality
     st.subheader("💾 Data Management")
@@ -743,7 +1107,7 @@ def show_dashboard():
     with col1:
         if st.button("📥 Export All Data"):
             export_data = {
-                'evaluations': evaluations,
+                'evaluations': [resolve_evaluation_blobs(e) for e in load_evaluations()],
                 'export_date': datetime.now().isoformat(),
                 'version': '1.0',
                 'summary': {
@@ -759,12 +1123,45 @@ def show_dashboard():
                 "application/json"
             )
     
+        
+        if st.button("📦 Export Archive (NDJSON.gz)", help="Streams one evaluation at a time; suited to large multi-year archives"):
+            with st.spinner("Writing archive..."):
+                # Spool to disk while streaming so only the compressed archive is held in memory
+                with tempfile.TemporaryFile() as archive:
+                    exported_count = export_ndjson(archive, compress=True)
+                    archive.seek(0)
+                    st.download_button(
+                        f"Download Archive ({exported_count} evaluations)",
+                        archive.read(),
+                        f"ster-evaluations-{datetime.now().strftime('%Y%m%d')}.ndjson.gz",
+                        "application/gzip"
+                    )
+        
+        if st.button("🗄️ Create Backup", help="Incremental snapshot: only evaluations changed since the last backup are written"):
+            with st.spinner("Backing up..."):
+                snapshot = create_backup(label="manual")
+            st.success(f"Backed up {snapshot['stats']['evaluations']} evaluations "
+                       f"({snapshot['stats']['new_chunks']} changed since earlier backups)")
+            st.caption("List, verify and restore backups with scripts/backup_storage.py")
+    
     with col2:
-        uploaded_file = st.file_uploader("📤 Import Data", type=['json'])
-        if uploaded_file:
+        uploaded_file = st.file_uploader("📤 Import Data", type=['json', 'ndjson', 'gz'],
+                                         help="JSON export, or NDJSON archive (optionally gzipped)")
+        upload_key = (uploaded_file.name, uploaded_file.size) if uploaded_file else None
+        if uploaded_file and st.session_state.get('last_import_upload') != upload_key:
             try:
-                data = json.load(uploaded_file)
-                imported_count = import_data(data)
+                if uploaded_file.name.endswith('.json'):
+                    data = json.load(uploaded_file)
+                    imported_count = import_data(data)
+                else:
+                    import_progress = st.progress(0.0, text="Importing evaluations...")
+                    
+                    def report_import_progress(processed, imported):
+                        read_fraction = min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0)
+                        import_progress.progress(read_fraction, text=f"Processed {processed} evaluations, imported {imported}")
+                    
+                    imported_count = import_ndjson(uploaded_file, progress=report_import_progress)
+                st.session_state.last_import_upload = upload_key
                 st.success(f"Imported {imported_count} evaluations!")
                 st.rerun()
             except Exception as e:
@@ -994,16 +1391,14 @@ def show_detailed_evaluation_view(evaluation):
         
         # Generate PDF
         try:
-            pdf_bytes = pdf_service.generate_evaluation_pdf(pdf_data)
-            
             # Create filename
             filename = f"{evaluation['student_name'].replace(' ', '_')}_{evaluation['rubric_type']}_{evaluation.get('created_at', datetime.now().isoformat())[:10]}.pdf"
             
-            st.download_button(
+            render_pdf_download(
+                f"evaluation_report:{evaluation.get('id')}",
+                pdf_data,
+                filename,
                 label="📄 Download Evaluation Report (PDF)",
-                data=pdf_bytes,
-                file_name=filename,
-                mime="application/pdf",
                 help="Download the complete evaluation report as a PDF file"
             )
         except Exception as e:
@@ -1138,7 +1533,7 @@ def show_research_comparison():
     st.header("🔬 Research Comparison: AI vs Supervisor Modifications")
     
     # Get all evaluations with AI originals
-    evaluations = load_evaluations()
+    evaluations = load_evaluation_summaries()
     ai_evaluations = [e for e in evaluations if e.get('has_ai_original', False)]
     
     if not ai_evaluations:
@@ -1155,6 +1550,7 @@ def show_research_comparison():
         "Select an evaluation to compare:",
         ai_evaluations,
         format_func=lambda e: f"{e['student_name']} - {e['date']} - {e.get('rubric_type', 'Unknown').replace('_', ' ').title()}"
+                              + (f" ({e['ai_changes']['total_changes']} changes)" if e.get('ai_changes') else "")
     )
     
     if selected_eval:
@@ -1163,16 +1559,21 @@ def show_research_comparison():
         if comparison and comparison['has_changes']:
             st.success(f"Found {len(comparison['differences'])} differences between AI and supervisor versions")
             
-            # Display comparison metrics
-            col1, col2, col3 = st.columns(3)
+            # Display comparison metrics (computed when the evaluation was saved)
+            stats = comparison['stats']
+            col1, col2, col3, col4, col5 = st.columns(5)
             with col1:
-                st.metric("Total Changes", len(comparison['differences']))
+                st.metric("Total Changes", stats['total_changes'])
             with col2:
-                score_changes = len([d for d in comparison['differences'] if d['field'] == 'score'])
-                st.metric("Score Changes", score_changes)
+                st.metric("Score Changes", stats['score_changes'])
             with col3:
-                just_changes = len([d for d in comparison['differences'] if d['field'] == 'justification'])
-                st.metric("Justification Changes", just_changes)
+                st.metric("Justification Changes", stats['justification_changes'])
+            with col4:
+                st.metric("Word Edit Distance", stats['edit_distance'],
+                          help="Word insertions, deletions and substitutions across all justifications")
+            with col5:
+                st.metric("Changed Tokens", stats['changed_tokens'],
+                          help="Words and punctuation added or removed by the supervisor")
             
             # Detailed comparison
             st.markdown("### 📋 Detailed Comparison")
@@ -1205,11 +1606,15 @@ def show_research_comparison():
                                 st.write(f"Change: {'↑' if change > 0 else '↓'} {abs(change)}")
                         else:
                             st.text_area("Supervisor Justification", diff['current_value'], height=150, disabled=True)
+                    
+                    if diff['field'] == 'justification':
+                        st.caption(f"Edit distance: {diff['edit_distance']} words · "
+                                   f"+{diff['tokens_added']} / -{diff['tokens_removed']} tokens")
             
             # Export comparison data
             st.markdown("### 📊 Export Data")
             export_data = {
-                'evaluation': selected_eval,
+                'evaluation': comparison['current'],
                 'comparison': comparison,
                 'export_date': datetime.now().isoformat()
             }
@@ -1231,6 +1636,8 @@ def show_evaluation_form():
     """Evaluation form for creating new evaluations"""
     st.header("📝 New Evaluation")
     
+    show_pending_ai_jobs()
+    
     # Get dispositions (same for all evaluation types)
     dispositions = get_professional_dispositions()
     
@@ -1355,7 +1762,7 @@ def show_evaluation_form():
                 
                 if selected_index is not None:
                     selected_evaluation = synthetic_evaluations[selected_index]
-                    lesson_plan_text = selected_evaluation.get('lesson_plan', '')
+                    lesson_plan_text = resolve_evaluation_blobs(selected_evaluation, ['lesson_plan']).get('lesson_plan', '')
                     
                     # Show preview
                     with st.expander("📋 Preview Selected Lesson Plan"):
@@ -1570,7 +1977,12 @@ def show_evaluation_form():
                 if st.button("🤖 Analyze Lesson Plan with AI", type="primary"):
                     with st.spinner("Analyzing lesson plan..."):
                         try:
-                            analysis = openai_service.analyze_lesson_plan(lesson_plan_text)
+                            analysis = run_persisted_ai_request(
+                                'lesson_plan_analysis',
+                                (lesson_plan_text,),
+                                openai_service.analyze_lesson_plan,
+                                lesson_plan_text
+                            )
                             analysis['extraction_timestamp'] = datetime.now().isoformat()
                             st.session_state.lesson_plan_analysis = analysis
                             
@@ -1601,6 +2013,8 @@ def show_evaluation_form():
                                 """)
                             
                             st.rerun()
+                        except AIRequestCancelled as e:
+                            st.warning(f"⏹️ {str(e)}")
                         except Exception as e:
                             st.error(f"❌ AI Analysis Error: {str(e)}")
                             st.info("💡 **Common issues:**")
@@ -2320,7 +2734,10 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                                     lesson_plan_context += f"Lesson Structure: {st.session_state.lesson_plan_analysis.get('lesson_structure', 'N/A')}"
                                 
                                 # Generate AI analysis for all items
-                                ai_analyses = openai_service.generate_analysis_for_competencies(
+                                ai_analyses = run_persisted_ai_request(
+                                    'ai_analyses',
+                                    ([item['id'] for item in items], observation_notes, student_name, rubric_type, lesson_plan_context),
+                                    openai_service.generate_analysis_for_competencies,
                                     items,
                                     observation_notes,
                                     student_name,
@@ -2339,6 +2756,8 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                                 st.success(success_message)
                                 st.rerun()
                                 
+                            except AIRequestCancelled as e:
+                                st.warning(f"⏹️ {str(e)}")
                             except Exception as e:
                                 st.error(f"Failed to generate AI analysis: {str(e)}")
             
@@ -2348,6 +2767,9 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                     st.metric("Competencies Analyzed", len(st.session_state.ai_analyses))
                     
                     if st.button("🔄 Regenerate Analysis", key="regenerate_analysis"):
+                        ai_scheduler.cancel(get_draft_id(), 'ai_analyses', "regenerated")
+                        delete_ai_result(get_draft_id(), 'ai_analyses')
+                        cancel_pending_ai_job('ai_analyses')
                         st.session_state.ai_analyses = {}
                         st.session_state.ai_original_data = None
                         st.rerun()
@@ -2497,14 +2919,23 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                                         if st.session_state.lesson_plan_analysis:
                                             lesson_plan_context = f"Lesson Topic: {st.session_state.lesson_plan_analysis.get('lesson_topic', 'N/A')}"
                                         
-                                        ai_justification = openai_service.generate_justification(
-                                            item, score if score is not None else 2, student_name, observation_notes, lesson_plan_context
+                                        justification_context = observation_notes
+                                        if lesson_plan_context:
+                                            justification_context += f"\n\n{lesson_plan_context}"
+                                        
+                                        ai_justification = run_ai_request(
+                                            f'justification_{item_id}',
+                                            openai_service.generate_justification,
+                                            item, score if score is not None else 2, student_name, justification_context
                                         )
                                         st.session_state.justifications[item_id] = ai_justification
                                         if 'ai_analyses' not in st.session_state:
                                             st.session_state.ai_analyses = {}
                                         st.session_state.ai_analyses[item_id] = ai_justification
+                                        update_ai_result(get_draft_id(), 'ai_analyses', st.session_state.ai_analyses)
                                         st.rerun()
+                                    except AIRequestCancelled as e:
+                                        st.warning(f"⏹️ {str(e)}")
                                     except Exception as e:
                                         st.error(f"Error: {str(e)}")
                     
@@ -2684,7 +3115,10 @@ Be as detailed as possible - these notes will be used to generate evidence-based
             with st.spinner("Analyzing specific areas needing improvement..."):
                 try:
                     # Enhanced analysis that focuses on specific improvement areas
-                    analysis = openai_service.analyze_evaluation(
+                    analysis = run_persisted_ai_request(
+                        'targeted_improvement_analysis',
+                        (st.session_state.scores, st.session_state.justifications, st.session_state.disposition_scores, rubric_type),
+                        openai_service.analyze_evaluation,
                         st.session_state.scores,
                         st.session_state.justifications,
                         st.session_state.disposition_scores,
@@ -2707,6 +3141,8 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                     • 💪 **Leverage strengths**: Use Level 2-3 areas to support growth in struggling competencies
                     """)
                     
+                except AIRequestCancelled as e:
+                    st.warning(f"⏹️ {str(e)}")
                 except Exception as e:
                     st.error(f"AI analysis failed: {str(e)}")
         
@@ -2717,6 +3153,9 @@ Be as detailed as possible - these notes will be used to generate evidence-based
             
             # Allow regeneration
             if st.button("🔄 Regenerate Analysis"):
+                ai_scheduler.cancel(get_draft_id(), 'targeted_improvement_analysis', "regenerated")
+                delete_ai_result(get_draft_id(), 'targeted_improvement_analysis')
+                cancel_pending_ai_job('targeted_improvement_analysis')
                 st.session_state.targeted_improvement_analysis = None
                 st.rerun()
     
@@ -2746,52 +3185,36 @@ Be as detailed as possible - these notes will be used to generate evidence-based
     # Calculate total score
     total_score = sum(score for score in st.session_state.scores.values() if isinstance(score, int))
     
+    # Generate or use existing evaluation ID
+    eval_id = get_draft_id()
+    lesson_plan_method = input_method if 'input_method' in locals() else 'unknown'
+    
+    draft_evaluation = build_session_evaluation(
+        eval_id, 'draft', student_name, evaluator_name, evaluator_role, rubric_type, items,
+        total_score, lesson_plan_method
+    )
+    
+    # Autosave edits to the draft in the background
+    autosaver = get_draft_autosaver()
+    # Only drafts are autosaved; a completed evaluation changes only when it is saved explicitly
+    is_draft = get_session_record(eval_id)['status'] in (None, 'draft')
+    if is_draft and (any(score is not None for score in st.session_state.scores.values())
+                     or any(st.session_state.justifications.values())):
+        autosaver.stage(draft_evaluation, expected_version=get_session_version(eval_id))
+    if autosaver.conflict(eval_id):
+        st.error(f"⚠️ Autosave stopped: this evaluation was changed in another session or tab "
+                 f"(version {autosaver.conflict(eval_id).current_version}). Reload it from the dashboard "
+                 f"before editing further.")
+    elif autosaver.has_pending(eval_id):
+        st.caption("💾 Unsaved changes are being autosaved…")
+    
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("💾 Save as Draft"):
-            # Get extracted info for additional fields
-            extracted_info = st.session_state.get('extracted_info', {})
-            
-            # Generate or use existing evaluation ID
-            eval_id = st.session_state.get('current_evaluation_id', str(uuid.uuid4()))
-            st.session_state.current_evaluation_id = eval_id
-            
-            evaluation = {
-                'id': eval_id,
-                'student_name': student_name,
-                'evaluator_name': evaluator_name,
-                'evaluator_role': evaluator_role,
-                'rubric_type': rubric_type,
-                'evaluated_items_count': len(items),  # Track how many items this role evaluated
-                'scores': st.session_state.scores,
-                'justifications': st.session_state.justifications,
-                'disposition_scores': st.session_state.disposition_scores if rubric_type == "field_evaluation" else {},
-                'disposition_comments': st.session_state.disposition_comments if rubric_type == "field_evaluation" else {},
-                'total_score': total_score,
-                'status': 'draft',
-                'created_at': datetime.now().isoformat(),
-                'lesson_plan_provided': st.session_state.lesson_plan_analysis is not None,
-                'lesson_plan_method': input_method if 'input_method' in locals() else 'unknown',
-                'ai_analyses': st.session_state.get('ai_analyses', {}),
-                'targeted_improvement_analysis': st.session_state.get('targeted_improvement_analysis', ''),
-                # Dashboard fields
-                'subject_area': extracted_info.get('subject_area', ''),
-                'department': extracted_info.get('department', 'Secondary'),
-                'semester': extracted_info.get('semester', 'Spring 2025'),
-                'grade_levels': extracted_info.get('grade_levels', ''),
-                'school_name': extracted_info.get('school_name', ''),
-                'class_size': extracted_info.get('class_size', 20)
-            }
-            
-            # Add AI original data if available
-            if st.session_state.get('ai_original_data'):
-                evaluation['ai_original'] = st.session_state.ai_original_data
-                evaluation['has_ai_original'] = True
-                evaluation['ai_original_saved_at'] = st.session_state.ai_original_data.get('saved_at')
-            
-            save_evaluation(evaluation)
-            st.success("Evaluation saved as draft!")
+            evaluation = dict(draft_evaluation)
+            if save_session_evaluation(evaluation):
+                st.success("Evaluation saved as draft!")
     
     with col2:
         if st.button("✅ Complete Evaluation"):
@@ -2822,50 +3245,16 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                 st.info("The evaluation will be saved with a 'needs_improvement' status.")
             
             # Save evaluation regardless of validation errors
-            # Get extracted info for additional fields
-            extracted_info = st.session_state.get('extracted_info', {})
-            
-            # Generate or use existing evaluation ID
-            eval_id = st.session_state.get('current_evaluation_id', str(uuid.uuid4()))
-            st.session_state.current_evaluation_id = eval_id
-            
-            evaluation = {
-                'id': eval_id,
-                'student_name': student_name,
-                'evaluator_name': evaluator_name,
-                'evaluator_role': evaluator_role,
-                'rubric_type': rubric_type,
-                'scores': st.session_state.scores,
-                'justifications': st.session_state.justifications,
-                'disposition_scores': st.session_state.disposition_scores,
-                'disposition_comments': st.session_state.disposition_comments,
-                'total_score': total_score,
-                'status': 'needs_improvement' if errors else 'completed',
-                'validation_errors': errors if errors else [],
-                'created_at': datetime.now().isoformat(),
-                'completed_at': datetime.now().isoformat(),
-                'lesson_plan_provided': st.session_state.lesson_plan_analysis is not None,
-                'lesson_plan_method': input_method if 'input_method' in locals() else 'unknown',
-                'ai_analyses': st.session_state.get('ai_analyses', {}),
-                'targeted_improvement_analysis': st.session_state.get('targeted_improvement_analysis', ''),
-                # Dashboard fields
-                'subject_area': extracted_info.get('subject_area', ''),
-                'department': extracted_info.get('department', 'Secondary'),
-                'semester': extracted_info.get('semester', 'Spring 2025'),
-                'grade_levels': extracted_info.get('grade_levels', ''),
-                'school_name': extracted_info.get('school_name', ''),
-                'class_size': extracted_info.get('class_size', 20)
-            }
-            
-            # Add AI original data if available
-            if st.session_state.get('ai_original_data'):
-                evaluation['ai_original'] = st.session_state.ai_original_data
-                evaluation['has_ai_original'] = True
-                evaluation['ai_original_saved_at'] = st.session_state.ai_original_data.get('saved_at')
-            
-            save_evaluation(evaluation)
+            evaluation = build_session_evaluation(
+                eval_id, 'needs_improvement' if errors else 'completed', student_name, evaluator_name,
+                evaluator_role, rubric_type, items, total_score, lesson_plan_method
+            )
+            evaluation['validation_errors'] = errors if errors else []
+            evaluation['completed_at'] = datetime.now().isoformat()
             
-            if errors:
+            if not save_session_evaluation(evaluation):
+                pass  # Conflict already reported; the report below still reflects this session's scores
+            elif errors:
                 st.warning("🎯 **Evaluation saved with 'needs improvement' status**")
                 st.caption("The student teacher requires additional support in the identified areas.")
             else:
@@ -2944,17 +3333,16 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                 
                 # Generate PDF
                 try:
-                    pdf_bytes = pdf_service.generate_evaluation_pdf(pdf_data)
-                    
                     # Create filename
                     status_text = "NEEDS_IMPROVEMENT" if errors else "COMPLETED"
                     filename = f"{student_name.replace(' ', '_')}_{rubric_type}_{status_text}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
                     
-                    st.download_button(
+                    render_pdf_download(
+                        f"final_report:{eval_id}",
+                        pdf_data,
+                        filename,
+                        draft_id=eval_id,
                         label="📄 Download Final Report (PDF)",
-                        data=pdf_bytes,
-                        file_name=filename,
-                        mime="application/pdf",
                         help="Download the completed evaluation report",
                         type="primary"
                     )
@@ -2969,6 +3357,10 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                     st.success("📋 **Report Status:** Complete\nThis report shows a fully completed evaluation.")
                 
                 st.info("💡 **Tip:** You can also use the 'Download Draft Report' section below for additional options.")
+        elif f"final_report:{eval_id}" in st.session_state.get('pdf_jobs', {}):
+            # The final report was queued for the worker on the click's run; keep showing it
+            st.subheader("📄 Download Completed Evaluation Report")
+            show_pdf_job(f"final_report:{eval_id}")
             
             
     # PDF Download Section - Always Available
@@ -3054,8 +3446,6 @@ Be as detailed as possible - these notes will be used to generate evidence-based
             
             # Generate PDF
             try:
-                pdf_bytes = pdf_service.generate_evaluation_pdf(pdf_data)
-                
                 # Create filename with draft indicator
                 status_indicator = "DRAFT" if (len(st.session_state.scores) < len(items)) else "COMPLETE"
                 filename = f"{student_name.replace(' ', '_')}_{rubric_type}_{status_indicator}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -3063,11 +3453,12 @@ Be as detailed as possible - these notes will be used to generate evidence-based
                 col_dl1, col_dl2, col_dl3 = st.columns(3)
                 
                 with col_dl1:
-                    st.download_button(
+                    render_pdf_download(
+                        f"current_report:{get_draft_id()}",
+                        pdf_data,
+                        filename,
+                        draft_id=get_draft_id(),
                         label="📄 Download Current Report (PDF)",
-                        data=pdf_bytes,
-                        file_name=filename,
-                        mime="application/pdf",
                         help="Download the evaluation report in its current state"
                     )
                 
@@ -3263,7 +3654,7 @@ def show_test_data():
                         evaluations = load_evaluations()
                         if len(evaluations) < 5:
                             st.info("Loading demo scenarios...")
-                            os.system("python load_demo_data.py")
+                            generate_synthetic_evaluations(count=5 - len(evaluations), score_distribution="mixed", save=True)
                             evaluations = load_evaluations()
                         
                         # Generate all visualizations
@@ -3549,6 +3940,7 @@ def show_test_data():
         # AI Confidence Testing
         st.markdown("### 🤖 AI Confidence Testing")
         st.info("Test how well the AI extracts information from different lesson plan formats")
+        st.caption("💡 To benchmark the whole catalog across models, run `python3 scripts/benchmark_ai_confidence.py`")
         
         # Import required modules
         import json
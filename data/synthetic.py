@@ -241,7 +241,8 @@ Reflection Notes:
 def generate_synthetic_evaluations(
     count: int = 10,
     rubric_type: str = "both",
-    score_distribution: str = "random"
+    score_distribution: str = "random",
+    save: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Generate synthetic evaluation data for testing
@@ -250,6 +251,7 @@ def generate_synthetic_evaluations(
         count: Number of evaluations to generate
         rubric_type: "field_evaluation", "ster", or "both"
         score_distribution: "random", "high_performing", "low_performing", "mixed"
+        save: If True, store the evaluations in a single batch write
     
     Returns:
         List of synthetic evaluation dictionaries
@@ -348,6 +350,10 @@ def generate_synthetic_evaluations(
         
         evaluations.append(evaluation)
     
+    if save:
+        from utils.storage import save_evaluations
+        save_evaluations(evaluations)
+    
     return evaluations
 
 def generate_scores(items: List[Dict], distribution: str) -> Dict[str, int]:
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Move evaluations from closed semesters into the semester archive
+
+Archived evaluations are written to compressed, read-only segments in
+data_storage/archive/ and removed from the hot store; they remain searchable
+and can be restored. Uses the storage backend selected by STORAGE_BACKEND.
+
+Usage:
+    python3 scripts/archive_semesters.py --keep "Fall 2025"
+    python3 scripts/archive_semesters.py --semester "Spring 2024" [--dry-run]
+    python3 scripts/archive_semesters.py --list
+    python3 scripts/archive_semesters.py --restore "Spring 2024"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.storage import (
+    archive_closed_semesters, archive_semester, count_evaluations, list_archived_semesters,
+    load_evaluation_summaries, prune_unreferenced_blobs, restore_semester
+)
+
+
+def print_archive():
+    """Print the archived semesters"""
+    archived = list_archived_semesters()
+    if not archived:
+        print("📭 The archive is empty")
+        return
+    for semester, count in sorted(archived.items()):
+        print(f"   {semester or '(no semester)'}: {count} evaluation(s)")
+    print(f"📦 {sum(archived.values())} archived evaluation(s)")
+
+
+def main():
+    """Parse arguments and archive or restore semesters"""
+    parser = argparse.ArgumentParser(description="Archive AI-STER evaluations from closed semesters")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--keep', metavar='SEMESTER', action='append',
+                        help="Current semester to keep in the hot store (repeatable); all others are archived")
+    action.add_argument('--semester', metavar='SEMESTER', action='append', help="Semester to archive (repeatable)")
+    action.add_argument('--restore', metavar='SEMESTER', help="Move an archived semester back into the hot store")
+    action.add_argument('--list', action='store_true', help="List archived semesters")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would be archived without moving anything")
+    args = parser.parse_args()
+
+    print("\n📦 AI-STER Semester Archive")
+    print("=" * 60)
+
+    if args.list:
+        print_archive()
+        return
+
+    if args.restore:
+        restored = restore_semester(args.restore)
+        print(f"✅ Restored {restored} evaluation(s) from {args.restore}")
+        return
+
+    if args.keep:
+        keep = set(args.keep)
+        semesters = sorted({
+            summary['semester'] for summary in load_evaluation_summaries(['semester'])
+            if summary.get('semester') and summary['semester'] not in keep
+        })
+    else:
+        semesters = args.semester
+
+    if args.dry_run:
+        for semester in semesters:
+            print(f"   {semester}: {count_evaluations(semester=semester)} evaluation(s) would be archived")
+        print("ℹ️  Dry run: nothing was moved")
+        return
+
+    if args.keep:
+        results = archive_closed_semesters(args.keep)
+    else:
+        results = {semester: archive_semester(semester) for semester in semesters}
+    for semester, count in results.items():
+        print(f"✅ {semester}: {count} evaluation(s) archived")
+    if not results:
+        print("ℹ️  No closed semesters to archive")
+
+    if any(results.values()):
+        print(f"🧹 Pruned {prune_unreferenced_blobs()} unreferenced blob(s)")
+    print_archive()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Incremental, deduplicated backups of the evaluation store
+
+Each run snapshots the hot store, the semester archive and their blobs into
+data_storage/backups/ (STORAGE_BACKUP_DIR, best pointed at another disk).
+Evaluations and blobs already held by an earlier snapshot are not written
+again, so a nightly backup costs only the day's changes. Uses the storage
+backend selected by STORAGE_BACKEND.
+
+Usage:
+    python3 scripts/backup_storage.py --create [--label nightly] [--keep 30]
+    python3 scripts/backup_storage.py --list
+    python3 scripts/backup_storage.py --verify [--snapshot ID]
+    python3 scripts/backup_storage.py --restore --snapshot ID [--evaluation ID ...]
+    python3 scripts/backup_storage.py --restore --at 2025-03-01T18:00
+    python3 scripts/backup_storage.py --prune 30
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.storage import (
+    create_backup, find_backup, list_backups, prune_backups, restore_backup, verify_backup
+)
+
+
+def format_bytes(size: int) -> str:
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_snapshots():
+    """Print the backup snapshots"""
+    snapshots = list_backups()
+    if not snapshots:
+        print("📭 No backups yet")
+        return
+    for snapshot in snapshots:
+        stats = snapshot['stats']
+        label = f" [{snapshot['label']}]" if snapshot.get('label') else ""
+        print(f"   {snapshot['id']}{label}: {stats['evaluations']} evaluation(s), {stats['archived']} archived, "
+              f"{stats['blobs']} blob(s); wrote {stats['new_chunks']} new chunk(s), {format_bytes(stats['new_bytes'])}")
+    print(f"🗄️  {len(snapshots)} snapshot(s)")
+
+
+def print_verification(result):
+    """Print a verify_backup() result; exits with code 1 if anything is damaged"""
+    print(f"🔍 Checked {result['chunks']} chunk(s) of {result['snapshots']} snapshot(s)")
+    for digest in result['missing']:
+        print(f"   missing: {digest}")
+    for digest in result['corrupt']:
+        print(f"   corrupt: {digest}")
+    if not result['ok']:
+        print(f"❌ {len(result['missing'])} missing, {len(result['corrupt'])} corrupt")
+        sys.exit(1)
+    print("✅ All chunks present and intact")
+
+
+def main():
+    """Parse arguments and create, list, verify, restore or prune backups"""
+    parser = argparse.ArgumentParser(description="Incremental backups of the AI-STER evaluation store")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--create', action='store_true', help="Take a snapshot")
+    action.add_argument('--list', action='store_true', help="List snapshots")
+    action.add_argument('--verify', action='store_true', help="Check snapshot chunks (all snapshots by default)")
+    action.add_argument('--restore', action='store_true',
+                        help="Restore a snapshot (replaces all data unless --evaluation is given)")
+    action.add_argument('--prune', metavar='KEEP', type=int,
+                        help="Delete all but the newest KEEP snapshots and the chunks only they used")
+    parser.add_argument('--label', help="Note stored with a new snapshot (--create)")
+    parser.add_argument('--keep', type=int, help="After --create, prune to this many snapshots")
+    parser.add_argument('--snapshot', metavar='ID', help="Snapshot to verify or restore")
+    parser.add_argument('--at', metavar='TIME', help="Restore the latest snapshot taken at or before this ISO time")
+    parser.add_argument('--evaluation', metavar='ID', action='append',
+                        help="Only restore this evaluation (repeatable); other evaluations are left alone")
+    args = parser.parse_args()
+
+    print("\n🗄️  AI-STER Backups")
+    print("=" * 60)
+
+    if args.list:
+        print_snapshots()
+        return
+
+    if args.create:
+        snapshot = create_backup(label=args.label)
+        stats = snapshot['stats']
+        print(f"✅ Snapshot {snapshot['id']}: {stats['evaluations']} evaluation(s), {stats['archived']} archived, "
+              f"{stats['blobs']} blob(s)")
+        print(f"💾 Wrote {stats['new_chunks']} new chunk(s), {format_bytes(stats['new_bytes'])}; "
+              f"everything else was already backed up")
+        if args.keep:
+            pruned = prune_backups(args.keep)
+            print(f"🧹 Pruned {pruned['snapshots']} old snapshot(s) and {pruned['chunks']} unused chunk(s)")
+        return
+
+    if args.verify:
+        try:
+            print_verification(verify_backup(args.snapshot))
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            sys.exit(1)
+        return
+
+    if args.prune is not None:
+        pruned = prune_backups(args.prune)
+        print(f"🧹 Pruned {pruned['snapshots']} snapshot(s) and {pruned['chunks']} unused chunk(s)")
+        return
+
+    snapshot_id = args.snapshot or (find_backup(args.at) if args.at else None)
+    if snapshot_id is None:
+        print("❌ --restore needs --snapshot, or --at with a snapshot taken by then")
+        sys.exit(1)
+    try:
+        restored = restore_backup(snapshot_id, evaluation_ids=args.evaluation)
+    except (KeyError, ValueError) as e:
+        print(f"❌ Could not restore: {e.args[0]}")
+        sys.exit(1)
+    print(f"✅ Restored {restored} evaluation(s) from snapshot {snapshot_id}")
+    if not args.evaluation:
+        print("ℹ️  All other current data was replaced by the snapshot")
+
+
+if __name__ == "__main__":
+    main()
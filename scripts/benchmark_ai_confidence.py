@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Headless AI confidence benchmark for the test lesson plan catalog
+
+Runs every entry in test_data/TEST_DATA_CATALOG.json through
+OpenAIService.analyze_lesson_plan concurrently, across one or more models and
+repeated N times, and compares the confidence score against the expected range.
+Results are written as JSON and CSV.
+
+Usage:
+    python3 scripts/benchmark_ai_confidence.py --models gpt-5-mini,gpt-4o-mini --repeats 3
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from services.openai_service import OpenAIService
+
+DEFAULT_CATALOG = PROJECT_ROOT / "test_data" / "TEST_DATA_CATALOG.json"
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "test_output" / "benchmarks"
+
+# Inference task the benchmark exercises (see AI_TASK_BACKENDS)
+BENCHMARK_TASK = 'lesson_plan_analysis'
+
+# USD per 1M tokens (input, output); override with --price MODEL=IN:OUT
+MODEL_PRICING = {
+    'gpt-5': (1.25, 10.00),
+    'gpt-5-mini': (0.25, 2.00),
+    'gpt-5-nano': (0.05, 0.40),
+    'gpt-4.1': (2.00, 8.00),
+    'gpt-4.1-mini': (0.40, 1.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+}
+
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+
+def parse_expected_confidence(expected: str) -> Tuple[float, float]:
+    """Parse an expected confidence label such as "90-95%" into a (min, max) fraction range"""
+    parts = expected.replace('%', '').split('-')
+    min_expected = float(parts[0]) / 100
+    max_expected = float(parts[-1]) / 100
+    return min_expected, max_expected
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile of a list of values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, pricing: Dict[str, Tuple[float, float]]) -> Optional[float]:
+    """Estimate request cost in USD, or None if the model has no known pricing"""
+    # Match dated model snapshots (e.g. gpt-4o-mini-2024-07-18) to their base price
+    for name in sorted(pricing, key=len, reverse=True):
+        if model == name or model.startswith(name + '-'):
+            input_price, output_price = pricing[name]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return None
+
+
+def load_catalog_plans(catalog_path: Path) -> List[Dict[str, Any]]:
+    """Load catalog entries together with their lesson plan text"""
+    with open(catalog_path, 'r') as f:
+        catalog = json.load(f)
+
+    plans = []
+    lesson_plans_dir = catalog_path.parent / "lesson_plans"
+    for entry in catalog.get("test_lesson_plans", []):
+        lesson_file_path = lesson_plans_dir / entry['filename']
+        if not lesson_file_path.exists():
+            print(f"⚠️  Skipping {entry['id']}: lesson plan file not found ({entry['filename']})")
+            continue
+        with open(lesson_file_path, 'r') as f:
+            plans.append({**entry, 'text': f.read()})
+
+    return plans
+
+
+def run_single(service: OpenAIService, plan: Dict[str, Any], repeat: int, pricing: Dict[str, Tuple[float, float]]) -> Dict[str, Any]:
+    """Analyze one lesson plan once and score the result against the expected range"""
+    min_expected, max_expected = parse_expected_confidence(plan['expected_confidence'])
+    model = service.model_for_task(BENCHMARK_TASK)
+    result = {
+        'model': model,
+        'plan_id': plan['id'],
+        'plan_name': plan['name'],
+        'category': plan['category'],
+        'expected_confidence': plan['expected_confidence'],
+        'repeat': repeat,
+        'confidence': None,
+        'hit': False,
+        'latency_seconds': None,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'total_tokens': 0,
+        'cost_usd': None,
+        'error': None
+    }
+
+    start = time.perf_counter()
+    try:
+        analysis = service.analyze_lesson_plan(plan['text'])
+        confidence = analysis.get('confidence_score', 0)
+        result['confidence'] = round(confidence, 4)
+        result['hit'] = min_expected <= confidence <= max_expected
+    except Exception as e:
+        result['error'] = str(e)
+    result['latency_seconds'] = round(time.perf_counter() - start, 3)
+
+    usage = service.get_last_usage()
+    if usage:
+        result.update(usage)
+        result['cost_usd'] = estimate_cost(model, usage['prompt_tokens'], usage['completion_tokens'], pricing)
+
+    return result
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize a group of runs: hit rate, confidence, latency percentiles, tokens and cost"""
+    completed = [r for r in runs if r['error'] is None]
+    latencies = [r['latency_seconds'] for r in completed]
+    confidences = [r['confidence'] for r in completed]
+    costs = [r['cost_usd'] for r in runs if r['cost_usd'] is not None]
+
+    summary = {
+        'runs': len(runs),
+        'errors': len(runs) - len(completed),
+        'hits': sum(1 for r in runs if r['hit']),
+        'hit_rate': round(sum(1 for r in runs if r['hit']) / len(runs), 4) if runs else 0.0,
+        'mean_confidence': round(sum(confidences) / len(confidences), 4) if confidences else None,
+        'min_confidence': min(confidences) if confidences else None,
+        'max_confidence': max(confidences) if confidences else None,
+        'prompt_tokens': sum(r['prompt_tokens'] for r in runs),
+        'completion_tokens': sum(r['completion_tokens'] for r in runs),
+        'total_tokens': sum(r['total_tokens'] for r in runs),
+        'cost_usd': round(sum(costs), 6) if costs else None
+    }
+    for pct in LATENCY_PERCENTILES:
+        value = percentile(latencies, pct)
+        summary[f'latency_p{pct}'] = round(value, 3) if value is not None else None
+
+    return summary
+
+
+def run_benchmark(
+    models: List[str],
+    repeats: int = 1,
+    concurrency: int = 8,
+    catalog_path: Path = DEFAULT_CATALOG,
+    pricing: Optional[Dict[str, Tuple[float, float]]] = None
+) -> Dict[str, Any]:
+    """
+    Run the confidence benchmark across models and repeats
+
+    Args:
+        models: Model names to benchmark
+        repeats: Number of times each lesson plan is analyzed per model
+        concurrency: Maximum number of in-flight API calls
+        catalog_path: Path to the test data catalog
+        pricing: Per-model (input, output) USD per 1M tokens
+
+    Returns:
+        Dictionary with run-level results and per-model / per-plan summaries
+    """
+    pricing = pricing or MODEL_PRICING
+    plans = load_catalog_plans(catalog_path)
+
+    # Key services by the model that actually serves the task; AI_TASK_BACKENDS may route it
+    # to a backend with its own model, which then replaces the requested one
+    services = {}
+    for requested_model in models:
+        service = OpenAIService(model=requested_model)
+        if not service.is_enabled():
+            raise RuntimeError("OpenAI service not enabled. Please set OPENAI_API_KEY in .env")
+        model = service.model_for_task(BENCHMARK_TASK)
+        if model != requested_model:
+            print(f"WARNING: {BENCHMARK_TASK} is routed to a backend serving {model}; benchmarking it instead of {requested_model}")
+        services.setdefault(model, service)
+    models = list(services)
+
+    tasks = [(services[model], plan, repeat) for model in models for plan in plans for repeat in range(repeats)]
+    print(f"🚀 Running {len(tasks)} analyses ({len(plans)} plans × {len(models)} models × {repeats} repeats, concurrency {concurrency})")
+
+    runs = []
+    started_at = datetime.now()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_single, service, plan, repeat, pricing) for service, plan, repeat in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            runs.append(result)
+            status = "✅" if result['hit'] else ("❌" if result['error'] is None else "⚠️ ")
+            print(f"   {status} [{len(runs)}/{len(tasks)}] {result['model']} {result['plan_id']} "
+                  f"confidence={result['confidence']} expected={result['expected_confidence']} "
+                  f"latency={result['latency_seconds']}s")
+    wall_seconds = time.perf_counter() - wall_start
+
+    runs.sort(key=lambda r: (r['model'], r['plan_id'], r['repeat']))
+
+    plan_summaries = []
+    for model in models:
+        for plan in plans:
+            plan_runs = [r for r in runs if r['model'] == model and r['plan_id'] == plan['id']]
+            plan_summaries.append({
+                'model': model,
+                'plan_id': plan['id'],
+                'plan_name': plan['name'],
+                'category': plan['category'],
+                'expected_confidence': plan['expected_confidence'],
+                **summarize(plan_runs)
+            })
+
+    model_summaries = {model: summarize([r for r in runs if r['model'] == model]) for model in models}
+
+    return {
+        'started_at': started_at.isoformat(),
+        'wall_seconds': round(wall_seconds, 3),
+        'config': {
+            'models': models,
+            'repeats': repeats,
+            'concurrency': concurrency,
+            'catalog': str(catalog_path),
+            'plans': len(plans)
+        },
+        'models': model_summaries,
+        'plans': plan_summaries,
+        'runs': runs
+    }
+
+
+def write_results(results: Dict[str, Any], output_dir: Path) -> Dict[str, Path]:
+    """Write benchmark results as JSON plus run-level and plan-level CSV files"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.fromisoformat(results['started_at']).strftime('%Y%m%d_%H%M%S')
+    paths = {
+        'json': output_dir / f"confidence_benchmark_{stamp}.json",
+        'runs_csv': output_dir / f"confidence_benchmark_{stamp}_runs.csv",
+        'plans_csv': output_dir / f"confidence_benchmark_{stamp}_plans.csv"
+    }
+
+    with open(paths['json'], 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    for key, rows in (('runs_csv', results['runs']), ('plans_csv', results['plans'])):
+        with open(paths[key], 'w', newline='', encoding='utf-8') as f:
+            if rows:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+
+    return paths
+
+
+def parse_price_overrides(values: List[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse MODEL=IN:OUT price overrides"""
+    pricing = dict(MODEL_PRICING)
+    for value in values:
+        model, prices = value.split('=', 1)
+        input_price, output_price = prices.split(':', 1)
+        pricing[model] = (float(input_price), float(output_price))
+    return pricing
+
+
+def main():
+    """Parse arguments, run the benchmark and print a summary"""
+    parser = argparse.ArgumentParser(description="Benchmark AI lesson plan confidence against TEST_DATA_CATALOG.json")
+    parser.add_argument('--models', default=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
+                        help="Comma-separated list of models (default: OPENAI_MODEL)")
+    parser.add_argument('--repeats', type=int, default=1, help="Runs per lesson plan per model")
+    parser.add_argument('--concurrency', type=int, default=8, help="Maximum concurrent API calls")
+    parser.add_argument('--catalog', type=Path, default=DEFAULT_CATALOG, help="Path to the test data catalog")
+    parser.add_argument('--output-dir', type=Path, default=DEFAULT_OUTPUT_DIR, help="Directory for JSON/CSV results")
+    parser.add_argument('--price', action='append', default=[], metavar="MODEL=IN:OUT",
+                        help="Override USD per 1M input/output tokens for a model")
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+
+    print("\n🎯 AI-STER Confidence Benchmark")
+    print("=" * 60)
+
+    try:
+        results = run_benchmark(
+            models,
+            repeats=args.repeats,
+            concurrency=args.concurrency,
+            catalog_path=args.catalog,
+            pricing=parse_price_overrides(args.price)
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    paths = write_results(results, args.output_dir)
+
+    print("\n📊 Summary")
+    print("=" * 60)
+    for model, summary in results['models'].items():
+        cost = f"${summary['cost_usd']:.4f}" if summary['cost_usd'] is not None else "unknown"
+        print(f"\n🤖 {model}")
+        print(f"   Hit rate: {summary['hits']}/{summary['runs']} ({summary['hit_rate']:.1%}), errors: {summary['errors']}")
+        print(f"   Latency p50/p95/p99: {summary['latency_p50']}s / {summary['latency_p95']}s / {summary['latency_p99']}s")
+        print(f"   Tokens: {summary['total_tokens']} (prompt {summary['prompt_tokens']}, completion {summary['completion_tokens']}), cost: {cost}")
+        for plan in results['plans']:
+            if plan['model'] == model:
+                print(f"     - {plan['plan_id']:<16} {plan['hits']}/{plan['runs']} in {plan['expected_confidence']:<8} "
+                      f"mean={plan['mean_confidence']}")
+
+    print(f"\n⏱️  Wall time: {results['wall_seconds']}s")
+    print("📁 Results:")
+    for path in paths.values():
+        print(f"   - {path}")
+
+
+if __name__ == "__main__":
+    main()
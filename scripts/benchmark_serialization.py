@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark evaluation store serialization formats
+
+Writes and reads an evaluations file of synthetic evaluations in each format
+and reports save time, load time and file size against the legacy
+pretty-printed JSON file:
+
+    legacy        json.dump(..., indent=2), the format used before utils.serialization
+    json-stdlib   minified JSON with the standard library encoder
+    json          minified JSON through utils.serialization (orjson when installed)
+    msgpack       MessagePack through utils.serialization (needs msgpack)
+
+Usage:
+    python3 scripts/benchmark_serialization.py
+    python3 scripts/benchmark_serialization.py --sizes 1000,10000 --repeats 5 --output results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from data.synthetic import generate_synthetic_evaluations
+from utils.serialization import (
+    JSON, MSGPACK, MSGPACK_AVAILABLE, ORJSON_AVAILABLE, decode_document, encode_document
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Distinct synthetic evaluations generated; larger stores repeat them under new IDs
+BASE_EVALUATIONS = 1000
+
+
+def make_evaluations(count: int, base: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """count evaluations cycling through base, each with a unique ID"""
+    return [{**base[i % len(base)], 'id': f"bench-{i}"} for i in range(count)]
+
+
+def _legacy_write(path: str, evaluations: List[Dict[str, Any]]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(evaluations, f, indent=2, ensure_ascii=False)
+
+
+def _legacy_read(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _stdlib_write(path: str, evaluations: List[Dict[str, Any]]) -> None:
+    with open(path, 'wb') as f:
+        f.write(json.dumps(evaluations, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _document_writer(encoding: str) -> Callable[[str, List[Dict[str, Any]]], None]:
+    def write(path: str, evaluations: List[Dict[str, Any]]) -> None:
+        with open(path, 'wb') as f:
+            f.write(encode_document(evaluations, encoding))
+    return write
+
+
+def _document_read(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return decode_document(f.read())
+
+
+def available_formats() -> Dict[str, Tuple[Callable, Callable]]:
+    """Format name -> (write, read)"""
+    formats = {
+        'legacy': (_legacy_write, _legacy_read),
+        'json-stdlib': (_stdlib_write, _legacy_read),
+        'json': (_document_writer(JSON), _document_read),
+    }
+    if MSGPACK_AVAILABLE:
+        formats['msgpack'] = (_document_writer(MSGPACK), _document_read)
+    return formats
+
+
+def run_benchmark(count: int, base: List[Dict[str, Any]], repeats: int, work_dir: str) -> Dict[str, Dict[str, float]]:
+    """Best-of-repeats save/load seconds and file size per format for one store size"""
+    evaluations = make_evaluations(count, base)
+    results = {}
+    for name, (write, read) in available_formats().items():
+        path = os.path.join(work_dir, f"evaluations-{name}-{count}")
+        save_times, load_times = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            write(path, evaluations)
+            save_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            loaded = read(path)
+            load_times.append(time.perf_counter() - start)
+            if len(loaded) != count:
+                raise RuntimeError(f"{name}: read back {len(loaded)} of {count} evaluations")
+            del loaded
+        results[name] = {
+            'save_seconds': min(save_times),
+            'load_seconds': min(load_times),
+            'bytes': os.path.getsize(path),
+        }
+        os.remove(path)
+    return results
+
+
+def print_results(count: int, results: Dict[str, Dict[str, float]]) -> None:
+    """Print one store size's results relative to the legacy format"""
+    legacy = results['legacy']
+    print(f"\n📦 {count:,} evaluations")
+    print(f"   {'format':<12} {'save':>9} {'load':>9} {'size':>10}   vs legacy (save / load / size)")
+    for name, result in results.items():
+        print(f"   {name:<12} {result['save_seconds']:>8.3f}s {result['load_seconds']:>8.3f}s "
+              f"{result['bytes'] / 1_000_000:>8.1f}MB   "
+              f"{legacy['save_seconds'] / result['save_seconds']:.1f}x / "
+              f"{legacy['load_seconds'] / result['load_seconds']:.1f}x / "
+              f"{result['bytes'] / legacy['bytes']:.0%}")
+
+
+def main():
+    """Parse arguments and run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark AI-STER storage serialization formats")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated store sizes (default: 1000,10000,100000)")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per measurement; the fastest is reported")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    print("\n⏱️  AI-STER Serialization Benchmark")
+    print("=" * 60)
+    print(f"orjson: {'✅' if ORJSON_AVAILABLE else '❌ not installed (json uses the stdlib encoder)'}")
+    print(f"msgpack: {'✅' if MSGPACK_AVAILABLE else '❌ not installed (msgpack skipped)'}")
+
+    base = generate_synthetic_evaluations(count=min(BASE_EVALUATIONS, max(sizes)))
+    all_results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in sizes:
+            all_results[count] = run_benchmark(count, base, args.repeats, work_dir)
+            print_results(count, all_results[count])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'orjson': ORJSON_AVAILABLE, 'msgpack': MSGPACK_AVAILABLE, 'results': all_results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
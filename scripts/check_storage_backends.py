@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Check storage backends against the StorageBackend interface and benchmark them
+
+Every backend (see utils/storage_backend.py) runs the same conformance checks
+in a temporary directory: versions and compare-and-set saves, batches,
+imports, deletes, summaries, AI originals, moving an evaluation to another
+department or evaluator, query pushdown, visibility of writes made by
+another instance, and the blob store and AI comparison that utils/storage.py
+layers on top. It then measures throughput of the common
+operations on a synthetic store.
+
+Usage:
+    python3 scripts/check_storage_backends.py
+    python3 scripts/check_storage_backends.py --backend sqlite --backend jsonl --count 10000
+    python3 scripts/check_storage_backends.py --skip-benchmark
+    python3 scripts/check_storage_backends.py --output results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from data.synthetic import generate_synthetic_evaluations
+from utils.blob_store import is_blob_ref
+from utils.concurrency import VersionConflictError
+from utils.evaluation_cache import thaw
+from utils.query import apply_query, build_query, matches
+from utils.storage_backend import BACKEND_NAMES, StorageBackend, missing_methods, open_backend
+from utils.summaries import summarize_evaluation
+
+DEFAULT_COUNT = 5000
+
+# Distinct synthetic evaluations generated; larger stores repeat them under new IDs
+BASE_EVALUATIONS = 500
+
+# Operations timed one call at a time
+SINGLE_SAVES = 200
+LOOKUPS = 500
+QUERIES = 100
+
+
+def make_evaluations(count: int, base: List[Dict[str, Any]], prefix: str = 'eval') -> List[Dict[str, Any]]:
+    """count evaluations cycling through base, each with a unique ID"""
+    return [{**base[i % len(base)], 'id': f"{prefix}-{i}"} for i in range(count)]
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+# Conformance checks: each gets a fresh backend, a factory reopening the same files, and sample evaluations
+
+def check_interface(backend, reopen, samples):
+    missing = missing_methods(backend)
+    expect(not missing, f"missing methods: {', '.join(missing)}")
+    expect(isinstance(backend, StorageBackend), "not recognised as a StorageBackend")
+
+
+def check_empty_store(backend, reopen, samples):
+    expect(backend.count() == 0, "a new store is not empty")
+    expect(list(backend.load_evaluations()) == [], "load_evaluations() of a new store is not empty")
+    expect(list(backend.iter_summaries()) == [], "iter_summaries() of a new store is not empty")
+    expect(backend.get_evaluation_by_id('missing') is None, "get_evaluation_by_id() of a missing ID is not None")
+
+
+def check_save_and_get(backend, reopen, samples):
+    evaluation = dict(samples[0])
+    expect(backend.save_evaluation(evaluation) == 1, "a new evaluation is not saved as version 1")
+    stored = backend.get_evaluation_by_id(evaluation['id'])
+    expect(stored == evaluation, "get_evaluation_by_id() does not return the saved evaluation")
+
+    evaluation = {**evaluation, 'status': 'completed'}
+    expect(backend.save_evaluation(evaluation) == 2, "a second save does not bump the version to 2")
+    stored = backend.get_evaluation_by_id(evaluation['id'])
+    expect(stored['status'] == 'completed' and stored['version'] == 2, "an update is not stored")
+    expect(backend.count() == 1, "an update adds a record")
+
+    try:
+        backend.save_evaluation({'status': 'draft'})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an evaluation without an ID is saved")
+
+
+def check_compare_and_set(backend, reopen, samples):
+    evaluation = dict(samples[0])
+    expect(backend.save_evaluation(evaluation, expected_version=0) == 1, "expected_version=0 fails for a new ID")
+    expect(backend.save_evaluation(dict(evaluation), expected_version=1) == 2, "a current expected_version fails")
+    for stale in (0, 1):
+        try:
+            backend.save_evaluation({**evaluation, 'status': 'stale'}, expected_version=stale)
+        except VersionConflictError as e:
+            expect(e.current_version == 2, f"the conflict reports version {e.current_version} instead of 2")
+        else:
+            raise AssertionError(f"a save expecting version {stale} overwrote version 2")
+    expect(backend.get_evaluation_by_id(evaluation['id'])['status'] != 'stale', "a refused save was stored")
+
+
+def check_preserve_ai_original(backend, reopen, samples):
+    evaluation = {**samples[0], 'ai_original': {'justifications': {'a': 'AI'}}, 'ai_original_saved_at': 'then'}
+    backend.save_evaluation(evaluation)
+    backend.save_evaluation({**samples[0], 'ai_original': {'justifications': {'a': 'edited'}}})
+    stored = backend.get_evaluation_by_id(evaluation['id'])
+    expect(stored['ai_original'] == {'justifications': {'a': 'AI'}}, "preserve_ai_original did not keep it")
+    expect(stored['ai_original_saved_at'] == 'then', "preserve_ai_original did not keep its saved_at")
+
+    backend.save_evaluation({**samples[0], 'ai_original': {'justifications': {'a': 'new'}}}, preserve_ai_original=False)
+    stored = backend.get_evaluation_by_id(evaluation['id'])
+    expect(stored['ai_original'] == {'justifications': {'a': 'new'}}, "preserve_ai_original=False kept the old one")
+
+
+def check_reassignment(backend, reopen, samples):
+    """Changing an evaluation's department or evaluator (which moves it between partitions)"""
+    backend.save_evaluations([dict(e) for e in samples[:3]])
+    moved = {**samples[1], 'ai_original': {'justifications': {'a': 'AI'}}, 'ai_original_saved_at': 'then'}
+    backend.save_evaluation(moved)
+    version = backend.save_evaluation({**samples[1], 'department': 'Reassigned Dept',
+                                       'evaluator_name': 'New Supervisor'}, expected_version=2)
+    expect(version == 3, f"a reassigned evaluation got version {version}, expected 3")
+    stored = backend.get_evaluation_by_id(moved['id'])
+    expect(stored['department'] == 'Reassigned Dept' and stored['evaluator_name'] == 'New Supervisor',
+           "the reassignment was not stored")
+    expect(stored['ai_original'] == {'justifications': {'a': 'AI'}}, "a reassignment lost the AI original")
+    expect(backend.count() == 3, f"count() is {backend.count()} after a reassignment, expected 3")
+    expect([e['id'] for e in backend.load_evaluations()] == [e['id'] for e in samples[:3]],
+           "a reassignment changed the insertion order")
+    try:
+        backend.save_evaluation({**samples[1], 'department': 'Other Dept'}, expected_version=2)
+        expect(False, "a stale reassignment was accepted")
+    except VersionConflictError:
+        pass
+
+    backend.save_evaluations([{**samples[0], 'evaluator_name': 'New Supervisor'}, {**samples[0]}])
+    expect(backend.count() == 3, "moving an evaluation twice in one batch duplicated it")
+    expect(backend.get_evaluation_by_id(samples[0]['id'])['evaluator_name'] == samples[0]['evaluator_name'],
+           "the last save of a batch did not win")
+    if hasattr(backend, 'query_summaries'):
+        page, _ = backend.query_summaries(build_query({'department': 'Reassigned Dept'}))
+        expect([s['id'] for s in page] == [moved['id']], "a query does not find the reassigned evaluation")
+
+
+def check_batch_save(backend, reopen, samples):
+    backend.save_evaluation(dict(samples[1]))
+    batch = [dict(samples[0]), dict(samples[1]), dict(samples[2]), {**samples[0], 'status': 'later'}]
+    expect(backend.save_evaluations(batch) == 4, "save_evaluations() does not return the batch size")
+    expect(backend.count() == 3, f"the store holds {backend.count()} evaluations instead of 3")
+    order = [e['id'] for e in backend.load_evaluations()]
+    expect(order == [samples[1]['id'], samples[0]['id'], samples[2]['id']], f"insertion order not kept: {order}")
+    versions = {e['id']: (e['version'], e.get('status')) for e in backend.iter_evaluations()}
+    expect(versions[samples[0]['id']] == (2, 'later'), "a repeated ID in a batch does not win with version 2")
+    expect(versions[samples[1]['id']][0] == 2, "a batch update does not bump the version")
+    expect(versions[samples[2]['id']][0] == 1, "a batch insert is not version 1")
+
+
+def check_summaries(backend, reopen, samples):
+    backend.save_evaluations([dict(e) for e in samples[:5]])
+    evaluations = list(backend.load_evaluations())
+    expected = [summarize_evaluation(e) for e in evaluations]
+    expect(list(backend.load_summaries()) == expected, "load_summaries() differs from summarize_evaluation()")
+    expect(list(backend.iter_summaries()) == expected, "iter_summaries() differs from load_summaries()")
+
+
+def check_delete(backend, reopen, samples):
+    backend.save_evaluations([dict(e) for e in samples[:5]])
+    expect(backend.delete_evaluation(samples[0]['id']) is True, "delete_evaluation() of a stored ID is not True")
+    expect(backend.delete_evaluation(samples[0]['id']) is False, "delete_evaluation() of a deleted ID is not False")
+    deleted = backend.delete_evaluations([samples[1]['id'], samples[2]['id'], samples[1]['id'], 'missing'])
+    expect(deleted == 2, f"delete_evaluations() reports {deleted} instead of 2")
+    expect([e['id'] for e in backend.load_evaluations()] == [samples[3]['id'], samples[4]['id']],
+           "the wrong evaluations remain")
+    expect(backend.get_evaluation_by_id(samples[0]['id']) is None, "a deleted evaluation is still returned")
+    expect(len(list(backend.iter_summaries())) == 2, "deleted evaluations remain in the summaries")
+
+
+def check_import(backend, reopen, samples):
+    backend.save_evaluation({**samples[0], 'status': 'kept'})
+    imported = backend.import_evaluations([
+        {**samples[0], 'status': 'overwritten'}, {**samples[1], 'version': 7}, {**samples[1], 'status': 'repeat'},
+        {'status': 'no id'}, dict(samples[2]),
+    ])
+    expect(imported == 2, f"import_evaluations() reports {imported} instead of 2")
+    expect(backend.get_evaluation_by_id(samples[0]['id'])['status'] == 'kept', "an import overwrote a stored ID")
+    stored = backend.get_evaluation_by_id(samples[1]['id'])
+    expect(stored == {**samples[1], 'version': 7}, "an imported evaluation was changed")
+    expect(backend.count() == 3, f"the store holds {backend.count()} evaluations instead of 3")
+
+
+def check_set_ai_original(backend, reopen, samples):
+    expect(backend.set_ai_original('missing', {'scores': {}}, 'now') is False, "set_ai_original() of a missing ID")
+    backend.save_evaluation(dict(samples[0]))
+    diff = {'changed_fields': 1}
+    expect(backend.set_ai_original(samples[0]['id'], {'scores': {'a': 2}}, 'now', diff) is True,
+           "set_ai_original() of a stored ID is not True")
+    stored = backend.get_evaluation_by_id(samples[0]['id'])
+    expect(stored['ai_original'] == {'scores': {'a': 2}} and stored['has_ai_original'] is True
+           and stored['ai_original_saved_at'] == 'now' and stored['ai_diff'] == diff, "AI original not stored")
+    expect(stored['version'] == 2, "set_ai_original() does not bump the version")
+
+
+def check_version_marker(backend, reopen, samples):
+    # The process cache compares each marker with the previous one
+    last = backend.version()
+    writes = [
+        lambda: backend.save_evaluation(dict(samples[0])),
+        lambda: backend.save_evaluations([dict(samples[1]), dict(samples[2])]),
+        lambda: backend.set_ai_original(samples[0]['id'], {}, 'now'),
+        lambda: backend.import_evaluations([dict(samples[3])]),
+        lambda: backend.delete_evaluation(samples[1]['id']),
+        lambda: backend.delete_evaluations([samples[2]['id']]),
+        lambda: backend.clear(),
+    ]
+    for number, write in enumerate(writes, start=1):
+        write()
+        expect(backend.version() != last, f"version() did not change after write {number}")
+        last = backend.version()
+
+
+def check_reopen(backend, reopen, samples):
+    backend.save_evaluations([dict(e) for e in samples[:3]])
+    backend.delete_evaluation(samples[1]['id'])
+    expected = list(backend.load_evaluations())
+    expect(list(reopen().load_evaluations()) == expected, "a reopened store reads different evaluations")
+
+
+def check_other_writer(backend, reopen, samples):
+    backend.save_evaluation(dict(samples[0]))
+    before = backend.version()
+    other = reopen()
+    other.save_evaluation({**samples[0], 'status': 'from other'})
+    other.save_evaluation(dict(samples[1]))
+    expect(backend.version() != before, "version() misses another instance's writes")
+    expect(backend.get_evaluation_by_id(samples[0]['id'])['status'] == 'from other',
+           "another instance's update is not visible")
+    expect(backend.count() == 2, "another instance's insert is not visible")
+    try:
+        backend.save_evaluation(dict(samples[0]), expected_version=1)
+    except VersionConflictError:
+        pass
+    else:
+        raise AssertionError("a save expecting a version another instance replaced was stored")
+
+
+def check_clear(backend, reopen, samples):
+    backend.save_evaluations([dict(e) for e in samples[:3]])
+    backend.clear()
+    expect(backend.count() == 0 and list(backend.load_evaluations()) == [], "clear() left evaluations")
+    expect(reopen().count() == 0, "clear() is not persistent")
+    expect(backend.save_evaluation(dict(samples[0])) == 1, "a store cannot be written after clear()")
+
+
+def check_query_pushdown(backend, reopen, samples):
+    if not hasattr(backend, 'query_summaries'):
+        return
+    backend.save_evaluations([dict(e) for e in samples])
+    summaries = list(backend.load_summaries())
+    queries = [
+        build_query({}),
+        build_query({'status': 'completed'}, sort_by='student_name', descending=False),
+        build_query({'rubric_type': ['ster', 'field_evaluation']}, sort_by='semester'),
+        build_query({'department': summaries[0].get('department')}, created_from='2000-01-01'),
+    ]
+    for query in queries:
+        expected, _ = apply_query(summaries, query)
+        pages, cursor = [], None
+        while True:
+            page, cursor = backend.query_summaries(query, limit=7, cursor=cursor)
+            pages.extend(page)
+            if cursor is None:
+                break
+        expect([s['id'] for s in pages] == [s['id'] for s in expected],
+               f"query_summaries() pages differ from apply_query() for {query['conditions']}")
+        if hasattr(backend, 'count_matching'):
+            expect(backend.count_matching(query) == sum(1 for s in summaries if matches(s, query)),
+                   f"count_matching() differs for {query['conditions']}")
+
+
+def check_storage_layers(backend, reopen, samples):
+    """Blob store, AI comparison and search through utils/storage.py on this backend"""
+    from utils import storage
+
+    storage.set_storage_backend(backend)
+    try:
+        lesson_plan = "Students model photosynthesis with a sealed terrarium. " * 50
+        evaluation = {**samples[0], 'lesson_plan': lesson_plan}
+        storage.save_evaluation(evaluation)
+        stored = backend.get_evaluation_by_id(evaluation['id'])
+        expect(is_blob_ref(stored['lesson_plan']), "a large lesson plan was not moved to the blob store")
+        expect(storage.get_evaluation_by_id(evaluation['id'])['lesson_plan'] == lesson_plan,
+               "the lesson plan does not resolve from the blob store")
+
+        justifications = dict(samples[0].get('justifications') or {'item': 'text'})
+        item = next(iter(justifications))
+        storage.save_ai_original(evaluation['id'], {'justifications': justifications,
+                                                    'scores': samples[0].get('scores', {})})
+        edited = {**storage.get_evaluation_by_id(evaluation['id'], resolve_blobs=False),
+                  'justifications': {**justifications, item: "Rewritten by the supervisor"}}
+        storage.save_evaluation(thaw(edited))
+        comparison = storage.get_evaluation_comparison(evaluation['id'])
+        expect(comparison is not None and comparison['has_changes'], "the AI comparison shows no changes")
+        expect(any(d['field'] == 'justification' and d.get('item_id') == item
+                   and d['current_value'] == "Rewritten by the supervisor" for d in comparison['differences']),
+               "the edited justification is not in the comparison")
+
+        hits = storage.search_evaluations("terrarium")
+        expect([hit['id'] for hit in hits] == [evaluation['id']], "full-text search does not find the lesson plan")
+        expect(storage.delete_evaluation(evaluation['id']), "delete through utils/storage.py failed")
+        expect(storage.search_evaluations("terrarium") == [], "a deleted evaluation is still found by search")
+    finally:
+        storage.clear_all_data()
+        storage.set_storage_backend(None)
+
+
+CHECKS = [
+    check_interface, check_empty_store, check_save_and_get, check_compare_and_set, check_preserve_ai_original,
+    check_reassignment, check_batch_save, check_summaries, check_delete, check_import, check_set_ai_original,
+    check_version_marker, check_reopen, check_other_writer, check_clear, check_query_pushdown, check_storage_layers,
+]
+
+
+def run_conformance(name: str, work_dir: str, samples: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Run every check on a fresh store; returns (check, error) for each failure"""
+    failures = []
+    for number, check in enumerate(CHECKS):
+        storage_dir = os.path.join(work_dir, f"{name}-check-{number}")
+        try:
+            check(open_backend(name, storage_dir), lambda: open_backend(name, storage_dir),
+                  [dict(e) for e in samples])
+        except Exception as e:
+            failures.append((check.__name__, f"{type(e).__name__}: {e}"))
+    return failures
+
+
+# Throughput
+
+def timed(operations: int, fn: Callable[[], Any]) -> float:
+    """Operations per second of running fn once"""
+    start = time.perf_counter()
+    fn()
+    return operations / max(time.perf_counter() - start, 1e-9)
+
+
+def run_benchmark(name: str, work_dir: str, evaluations: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Operations per second for the common operations on a store of len(evaluations)"""
+    backend = open_backend(name, os.path.join(work_dir, f"{name}-benchmark"))
+    singles = [{**e, 'id': f"single-{i}"} for i, e in enumerate(evaluations[:SINGLE_SAVES])]
+    ids = [e['id'] for e in evaluations]
+    rng = random.Random(0)
+    lookups = [rng.choice(ids) for _ in range(LOOKUPS)]
+    queries = [
+        build_query({'status': rng.choice(['draft', 'completed', 'needs_improvement'])},
+                    sort_by=rng.choice(['created_at', 'student_name']))
+        for _ in range(QUERIES)
+    ]
+
+    def run_queries():
+        for query in queries:
+            if hasattr(backend, 'query_summaries'):
+                backend.query_summaries(query, limit=50)
+            else:
+                apply_query(backend.load_summaries(), query, limit=50)
+
+    results = {
+        'bulk_save': timed(len(evaluations), lambda: backend.save_evaluations([dict(e) for e in evaluations])),
+        'single_save': timed(len(singles), lambda: [backend.save_evaluation(dict(e)) for e in singles]),
+        'load_all': timed(backend.count(), lambda: list(backend.load_evaluations())),
+        'iterate': timed(backend.count(), lambda: sum(1 for _ in backend.iter_evaluations())),
+        'summaries': timed(backend.count(), lambda: list(backend.load_summaries())),
+        'get_by_id': timed(len(lookups), lambda: [backend.get_evaluation_by_id(i) for i in lookups]),
+        'query_page': timed(len(queries), run_queries),
+        'bulk_delete': timed(len(ids) // 10, lambda: backend.delete_evaluations(ids[::10])),
+    }
+    if backend.count() != len(evaluations) + len(singles) - len(ids[::10]):
+        raise RuntimeError(f"{name}: the store holds {backend.count()} evaluations after the benchmark")
+    return results
+
+
+def print_benchmark(count: int, results: Dict[str, Dict[str, float]]) -> None:
+    """Print operations per second, one column per backend"""
+    names = list(results)
+    print(f"\n⏱️  Throughput on {count:,} evaluations (operations per second, higher is better)")
+    print(f"   {'operation':<12}" + ''.join(f"{name:>12}" for name in names))
+    for operation in next(iter(results.values())):
+        print(f"   {operation:<12}" + ''.join(f"{results[name][operation]:>12,.0f}" for name in names))
+
+
+def main():
+    """Parse arguments, run the conformance checks and the benchmark"""
+    parser = argparse.ArgumentParser(description="Check and benchmark AI-STER storage backends")
+    parser.add_argument('--backend', action='append', choices=BACKEND_NAMES,
+                        help="Backend to check (repeatable; default: all)")
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT,
+                        help=f"Evaluations in the benchmark store (default: {DEFAULT_COUNT})")
+    parser.add_argument('--skip-benchmark', action='store_true', help="Only run the conformance checks")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    names = args.backend or list(BACKEND_NAMES)
+
+    print("\n🗄️  AI-STER Storage Backend Check")
+    print("=" * 60)
+
+    base = generate_synthetic_evaluations(count=BASE_EVALUATIONS)
+    samples = make_evaluations(20, base, prefix='sample')
+    report = {'conformance': {}, 'benchmark': {}}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Keep the layers utils/storage.py adds (blobs, search, archive) out of the real data directory
+        for variable, path in (('STORAGE_BLOB_DIR', 'blobs'), ('STORAGE_SEARCH_DB', 'search.db'),
+                               ('STORAGE_ARCHIVE_DIR', 'archive'), ('STORAGE_ANALYTICS_DIR', 'analytics')):
+            os.environ[variable] = os.path.join(work_dir, path)
+        os.environ['STORAGE_ANALYTICS'] = 'false'
+
+        for name in names:
+            failures = run_conformance(name, work_dir, samples)
+            report['conformance'][name] = dict(failures)
+            if failures:
+                print(f"❌ {name}: {len(failures)} of {len(CHECKS)} checks failed")
+                for check, error in failures:
+                    print(f"   {check}: {error}")
+            else:
+                print(f"✅ {name}: all {len(CHECKS)} checks passed")
+
+        if not args.skip_benchmark:
+            evaluations = make_evaluations(args.count, base)
+            for name in names:
+                report['benchmark'][name] = run_benchmark(name, work_dir, evaluations)
+            print_benchmark(args.count, report['benchmark'])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'count': args.count, **report}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if any(report['conformance'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Upgrade stored evaluations to the current record schema
+
+Runs the migrations in utils/migrations.py over every evaluation in the hot
+store and the semester archive. The store is streamed and outdated records
+are rewritten a batch at a time; progress is checkpointed after each batch,
+so an interrupted run picks up where it stopped when started again. Uses the
+storage backend selected by STORAGE_BACKEND. Run it while no one is editing.
+
+Usage:
+    python3 scripts/migrate_schema.py --dry-run
+    python3 scripts/migrate_schema.py [--batch-size 500] [--checkpoint PATH] [--skip-archive]
+    python3 scripts/migrate_schema.py --list
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.migrations import SCHEMA_VERSION, migrations
+from utils.storage import migrate_schema
+
+
+def print_progress(phase: str, done: int, total: int):
+    """Print migration progress on one line"""
+    if phase == 'scan':
+        print(f"\r🔎 Scanned {done} evaluation(s)", end='', flush=True)
+    else:
+        print(f"\r💾 Upgraded {done}/{total} evaluation(s)", end='', flush=True)
+
+
+def print_report(report):
+    """Print a migrate_schema() report"""
+    verb = "would be" if report['dry_run'] else "were"
+    if report['resumed_at'] is not None:
+        print(f"⏩ Resumed an interrupted run after {report['resumed_at']} evaluation(s)")
+    print(f"📊 Scanned {report['scanned']} evaluation(s): {report['outdated']} outdated, "
+          f"{report['newer']} from a newer schema")
+    archived = report['archived']
+    print(f"📦 Scanned {archived['scanned']} archived evaluation(s): {archived['outdated']} outdated")
+
+    for version, fields in report['changes'].items():
+        description = next(m['description'] for m in migrations() if m['version'] == version)
+        changed = ", ".join(f"{field} ({count})" for field, count in sorted(fields.items()))
+        print(f"   v{version} {description}: {changed or 'no field changes'}")
+
+    if report['newer']:
+        print(f"⚠️  {report['newer']} evaluation(s) were written by newer code and were left alone")
+    if report['dry_run']:
+        print(f"ℹ️  Dry run: {report['outdated'] + archived['outdated']} evaluation(s) {verb} upgraded")
+    else:
+        print(f"✅ {report['upgraded']} evaluation(s) and {archived['upgraded']} archived evaluation(s) "
+              f"{verb} upgraded to schema version {report['schema_version']}")
+
+
+def main():
+    """Parse arguments and run the schema migration"""
+    parser = argparse.ArgumentParser(description="Upgrade stored AI-STER evaluations to the current schema")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    parser.add_argument('--batch-size', type=int, default=500, help="Evaluations upgraded per write (default 500)")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="Progress file (default data_storage/schema_migration.checkpoint)")
+    parser.add_argument('--skip-archive', action='store_true', help="Leave the semester archive alone")
+    parser.add_argument('--list', action='store_true', help="List the migrations and exit")
+    args = parser.parse_args()
+
+    print("\n🧬 AI-STER Schema Migration")
+    print("=" * 60)
+
+    if args.list:
+        for m in migrations():
+            print(f"   v{m['version']}: {m['description']}")
+        print(f"📌 Current schema version: {SCHEMA_VERSION}")
+        return
+
+    if args.batch_size < 1:
+        print("❌ --batch-size must be at least 1")
+        sys.exit(1)
+
+    report = migrate_schema(batch_size=args.batch_size, dry_run=args.dry_run, checkpoint_path=args.checkpoint,
+                            include_archive=not args.skip_archive, progress=print_progress)
+    print()
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migrate evaluations from data_storage/evaluations.json to the SQLite, journal or partitioned backend
+
+Already-migrated evaluations are skipped, so the script can be re-run safely.
+After migrating, set STORAGE_BACKEND to the target to use it.
+
+Usage:
+    python3 scripts/migrate_storage.py
+    python3 scripts/migrate_storage.py --to jsonl
+    python3 scripts/migrate_storage.py --to partitioned --partition-backend sqlite
+    python3 scripts/migrate_storage.py --source path/to/evaluations.json --db path/to/evaluations.db
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.journal_storage import JournalStorage
+from utils.partitioned_storage import PartitionedStorage
+from utils.serialization import read_document
+from utils.sqlite_storage import SQLiteStorage
+from utils.storage import EVALUATIONS_FILE, JOURNAL_DIR, PARTITIONS_DIR, SQLITE_DB_FILE
+
+
+def main():
+    """Parse arguments and run the migration"""
+    parser = argparse.ArgumentParser(description="Migrate AI-STER evaluations from JSON to another storage backend")
+    parser.add_argument('--to', choices=['sqlite', 'jsonl', 'partitioned'], default='sqlite',
+                        help="Target backend (default: sqlite)")
+    parser.add_argument('--source', default=EVALUATIONS_FILE, help="JSON evaluations file to read")
+    parser.add_argument('--db', default=SQLITE_DB_FILE, help="SQLite database to write (--to sqlite)")
+    parser.add_argument('--journal-dir', default=JOURNAL_DIR, help="Journal directory to write (--to jsonl)")
+    parser.add_argument('--partition-dir', default=PARTITIONS_DIR, help="Partition directory to write (--to partitioned)")
+    parser.add_argument('--partition-backend', choices=['json', 'jsonl', 'sqlite'], default='json',
+                        help="Backend of each partition (--to partitioned; default: json)")
+    args = parser.parse_args()
+    target = {'sqlite': args.db, 'jsonl': args.journal_dir, 'partitioned': args.partition_dir}[args.to]
+
+    print("\n🗄️  AI-STER Storage Migration")
+    print("=" * 60)
+    print(f"📄 Source: {args.source}")
+    print(f"🗃️  Target: {target} ({args.to})")
+
+    if not Path(args.source).exists():
+        print(f"❌ Source file not found: {args.source}")
+        sys.exit(1)
+
+    try:
+        evaluations = read_document(args.source)
+        if not isinstance(evaluations, list):
+            raise ValueError("expected a list of evaluations")
+    except ValueError as e:
+        print(f"❌ Could not read source file: {e}")
+        sys.exit(1)
+
+    if args.to == 'sqlite':
+        backend = SQLiteStorage(args.db)
+    elif args.to == 'jsonl':
+        backend = JournalStorage(args.journal_dir)
+    else:
+        backend = PartitionedStorage(args.partition_dir, partition_backend=args.partition_backend)
+    migrated = backend.import_evaluations(evaluations)
+    print(f"\n✅ Migrated {migrated} evaluation(s); {args.to} store now holds {backend.count()}")
+    print(f"💡 Set STORAGE_BACKEND={args.to} to use it")
+    if args.to == 'partitioned' and args.partition_backend != 'json':
+        print(f"💡 and STORAGE_PARTITION_BACKEND={args.partition_backend}")
+
+
+if __name__ == "__main__":
+    main()
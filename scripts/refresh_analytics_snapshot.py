@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Refresh the columnar analytics snapshot of the evaluation store
+
+Writes data_storage/analytics/evaluations.arrow (one row per evaluation, one
+column per item score) and justifications.arrow (one row per justification),
+loading only evaluations changed since the last refresh. Uses the storage
+backend selected by STORAGE_BACKEND. Requires pyarrow.
+
+Usage:
+    python3 scripts/refresh_analytics_snapshot.py
+    python3 scripts/refresh_analytics_snapshot.py --parquet exports/
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.analytics_snapshot import PYARROW_AVAILABLE
+from utils.storage import load_analytics_snapshot, refresh_analytics_snapshot
+
+
+def main():
+    """Parse arguments and refresh the snapshot"""
+    parser = argparse.ArgumentParser(description="Refresh the AI-STER columnar analytics snapshot")
+    parser.add_argument('--parquet', metavar='DIR', help="Also write Parquet copies of both tables to DIR")
+    args = parser.parse_args()
+
+    print("\n📊 AI-STER Analytics Snapshot")
+    print("=" * 60)
+
+    if not PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed: pip install pyarrow")
+        sys.exit(1)
+
+    result = refresh_analytics_snapshot()
+    print(f"✅ {result['updated']} evaluation(s) updated, {result['removed']} removed; "
+          f"snapshot holds {result['total']}")
+
+    tables = load_analytics_snapshot(refresh=False)
+    for name, table in tables.items():
+        print(f"   {name}: {table.num_rows} rows × {table.num_columns} columns")
+
+    if args.parquet:
+        import pyarrow.parquet as pq
+        out_dir = Path(args.parquet)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name, table in tables.items():
+            pq.write_table(table, out_dir / f"{name}.parquet")
+        print(f"💾 Parquet copies written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
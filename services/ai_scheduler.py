@@ -0,0 +1,202 @@
+"""
+Request scheduling, deadlines and cancellation for AI calls
+
+Copyright © 2025 Utah Valley University School of Education
+All Rights Reserved.
+
+This software is proprietary and confidential property of Utah Valley University
+School of Education. Licensed for educational use only.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class AIRequestCancelled(Exception):
+    """Raised when an AI request is cancelled or its deadline passes"""
+
+
+class CancellationToken:
+    """Cancellation flag and deadline carried by an AI request
+
+    Callbacks registered with add_callback (e.g. closing the HTTP stream) run
+    on the thread that cancels the token, so an in-flight request is aborted
+    rather than left to run to completion.
+    """
+
+    def __init__(self, draft_id: Optional[str] = None, operation: Optional[str] = None,
+                 deadline_seconds: Optional[float] = None):
+        self.id = str(uuid.uuid4())
+        self.draft_id = draft_id
+        self.operation = operation
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._timer = None
+
+        if deadline_seconds:
+            self._timer = threading.Timer(deadline_seconds, self.cancel, args=("deadline exceeded",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled or its deadline has passed"""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the token and run registered callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # Aborting a request must never fail the canceller
+
+    def raise_if_cancelled(self) -> None:
+        """Raise AIRequestCancelled if the token was cancelled"""
+        if self.cancelled:
+            label = f"AI request '{self.operation}'" if self.operation else "AI request"
+            raise AIRequestCancelled(f"{label} cancelled: {self.reason}")
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback to run on cancellation; returns a function that unregisters it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+
+        if not registered:
+            callback()
+            return lambda: None
+
+        def remove():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return remove
+
+    def close(self) -> None:
+        """Release the deadline timer once the request has finished"""
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+class AIRequestScheduler:
+    """Process-wide scheduler for AI requests tied to evaluation drafts
+
+    Each request is keyed by (draft_id, operation). Beginning a new request
+    for the same key supersedes and cancels the previous one, and cancelling
+    a draft drops its queued work before it reaches the API.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        max_workers = max_workers or int(os.getenv('AI_MAX_CONCURRENT_REQUESTS', '4'))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-request")
+        self._lock = threading.Lock()
+        self._active: Dict[Tuple[Optional[str], Optional[str]], CancellationToken] = {}
+        self._futures: Dict[str, Future] = {}
+
+    def begin(self, draft_id: Optional[str], operation: str,
+              deadline_seconds: Optional[float] = None) -> CancellationToken:
+        """Create a token for a new request, cancelling any request it supersedes"""
+        token = CancellationToken(draft_id, operation, deadline_seconds)
+        with self._lock:
+            previous = self._active.get((draft_id, operation))
+            self._active[(draft_id, operation)] = token
+        if previous is not None:
+            self._cancel_token(previous, "superseded by a newer request")
+        return token
+
+    def submit(self, token: CancellationToken, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, cancel_token=token, **kwargs); work cancelled while queued never runs"""
+        def run():
+            token.raise_if_cancelled()
+            return fn(*args, cancel_token=token, **kwargs)
+
+        future = self._executor.submit(run)
+        with self._lock:
+            self._futures[token.id] = future
+        future.add_done_callback(lambda _: self._forget_future(token.id))
+        return future
+
+    def finish(self, token: CancellationToken) -> None:
+        """Mark a request as finished and release its resources"""
+        token.close()
+        with self._lock:
+            key = (token.draft_id, token.operation)
+            if self._active.get(key) is token:
+                del self._active[key]
+
+    def cancel(self, draft_id: Optional[str], operation: str, reason: str = "cancelled") -> bool:
+        """Cancel the active request for a draft operation; returns True if one was cancelled"""
+        with self._lock:
+            token = self._active.pop((draft_id, operation), None)
+        if token is None:
+            return False
+        self._cancel_token(token, reason)
+        return True
+
+    def cancel_draft(self, draft_id: Optional[str], reason: str = "draft abandoned") -> int:
+        """Cancel every active or queued request for a draft; returns the number cancelled"""
+        with self._lock:
+            keys = [key for key in self._active if key[0] == draft_id]
+            tokens = [self._active.pop(key) for key in keys]
+        for token in tokens:
+            self._cancel_token(token, reason)
+        return len(tokens)
+
+    def active_requests(self, draft_id: Optional[str] = None) -> List[CancellationToken]:
+        """List active request tokens, optionally for a single draft"""
+        with self._lock:
+            return [t for (d, _), t in self._active.items() if draft_id is None or d == draft_id]
+
+    def _cancel_token(self, token: CancellationToken, reason: str) -> None:
+        token.cancel(reason)
+        with self._lock:
+            future = self._futures.get(token.id)
+        if future is not None:
+            future.cancel()  # Drops the work if it is still queued
+
+    def _forget_future(self, token_id: str) -> None:
+        with self._lock:
+            self._futures.pop(token_id, None)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_ai_request_scheduler() -> AIRequestScheduler:
+    """Get the process-wide AI request scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AIRequestScheduler()
+        return _scheduler
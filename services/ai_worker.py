@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Out-of-process worker for AI and PDF jobs
+
+Copyright © 2025 Utah Valley University School of Education
+All Rights Reserved.
+
+This software is proprietary and confidential property of Utah Valley University
+School of Education. Licensed for educational use only.
+
+Consumes the persistent job queue in utils/job_queue.py so long-running AI
+calls do not block Streamlit sessions and survive web server restarts.
+
+Usage:
+    python -m services.ai_worker --workers 4
+"""
+
+import argparse
+import base64
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from dotenv import load_dotenv
+
+from services.ai_scheduler import AIRequestCancelled, CancellationToken
+from utils.ai_results import save_ai_result
+from utils.job_queue import CANCEL_REQUESTED, JOBS_DB_FILE, JobQueue
+
+# Job types handled by the worker
+LESSON_PLAN_ANALYSIS = 'lesson_plan_analysis'
+COMPETENCY_ANALYSIS = 'competency_analysis'
+TARGETED_IMPROVEMENT_ANALYSIS = 'targeted_improvement_analysis'
+PDF_GENERATION = 'pdf_generation'
+
+# OpenAIService method run for each AI job type
+AI_JOB_METHODS = {
+    LESSON_PLAN_ANALYSIS: 'analyze_lesson_plan',
+    COMPETENCY_ANALYSIS: 'generate_analysis_for_competencies',
+    TARGETED_IMPROVEMENT_ANALYSIS: 'analyze_evaluation',
+}
+
+# PDFService method run for each PDF report type (app.py queues evaluation reports)
+PDF_REPORT_METHODS = {
+    'evaluation': 'generate_evaluation_pdf',
+}
+
+POLL_INTERVAL_SECONDS = 1.0
+LEASE_SECONDS = 300
+
+
+class AIWorker:
+    """Single worker loop that claims and runs jobs from the queue"""
+
+    def __init__(self, worker_id: str, queue: JobQueue):
+        self.worker_id = worker_id
+        self.queue = queue
+        self._openai_service = None
+        self._pdf_service = None
+        self._stopping = threading.Event()
+
+    @property
+    def openai_service(self):
+        if self._openai_service is None:
+            from services.openai_service import OpenAIService
+            self._openai_service = OpenAIService()
+        return self._openai_service
+
+    @property
+    def pdf_service(self):
+        if self._pdf_service is None:
+            from services.pdf_service import PDFService
+            self._pdf_service = PDFService()
+        return self._pdf_service
+
+    def run_forever(self) -> None:
+        """Claim and run jobs until stopped"""
+        print(f"🤖 Worker {self.worker_id} started (queue: {self.queue.db_path})")
+        while not self._stopping.is_set():
+            job = self.queue.claim(self.worker_id, lease_seconds=LEASE_SECONDS)
+            if job is None:
+                time.sleep(POLL_INTERVAL_SECONDS)
+                continue
+            self.run_job(job)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run_job(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job, recording its result, retry or cancellation"""
+        print(f"▶️  {self.worker_id}: {job['job_type']} {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+        token = CancellationToken(job.get('draft_id'), job['job_type'])
+        watcher_done = threading.Event()
+        watcher = threading.Thread(target=self._watch_job, args=(job['id'], token, watcher_done), daemon=True)
+        watcher.start()
+
+        try:
+            result = self._handlers()[job['job_type']](job, token)
+            if self.queue.complete(job['id'], self.worker_id, result):
+                self._persist_result(job, result)
+                print(f"✅ {self.worker_id}: {job['job_type']} {job['id']} succeeded")
+            elif self.queue.mark_cancelled(job['id'], self.worker_id):
+                print(f"⏹️  {self.worker_id}: {job['job_type']} {job['id']} cancelled before its result was saved")
+            else:
+                print(f"WARNING: {self.worker_id} lost the lease on {job['id']}; its result was discarded")
+        except AIRequestCancelled as e:
+            if self.queue.mark_cancelled(job['id'], self.worker_id):
+                print(f"⏹️  {self.worker_id}: {job['job_type']} {job['id']} cancelled ({e})")
+            else:
+                print(f"WARNING: {self.worker_id} stopped {job['id']} after losing its lease ({e})")
+        except Exception as e:
+            status = self.queue.fail(job['id'], self.worker_id, str(e))
+            if status is None:
+                print(f"WARNING: {self.worker_id} lost the lease on {job['id']} before recording its failure ({e})")
+            else:
+                print(f"❌ {self.worker_id}: {job['job_type']} {job['id']} failed ({e}), now {status}")
+        finally:
+            watcher_done.set()
+            token.close()
+
+    def _watch_job(self, job_id: str, token: CancellationToken, done: threading.Event) -> None:
+        """Keep the job's lease alive and abort it when cancellation is requested or the lease is lost"""
+        while not done.wait(POLL_INTERVAL_SECONDS):
+            status = self.queue.heartbeat(job_id, self.worker_id, lease_seconds=LEASE_SECONDS)
+            if status is None:
+                token.cancel("lease lost to another worker")
+                return
+            if status == CANCEL_REQUESTED:
+                token.cancel("job cancelled")
+                return
+
+    def _handlers(self) -> Dict[str, Callable[[Dict[str, Any], CancellationToken], Any]]:
+        handlers = {job_type: self._run_ai_job for job_type in AI_JOB_METHODS}
+        handlers[PDF_GENERATION] = self._run_pdf_job
+        return handlers
+
+    def _run_ai_job(self, job: Dict[str, Any], token: CancellationToken) -> Any:
+        service = self.openai_service
+        if not service.is_enabled():
+            raise Exception("OpenAI service is not configured")
+        method = getattr(service, AI_JOB_METHODS[job['job_type']])
+        payload = job['payload']
+        return method(*payload.get('args', []), cancel_token=token, **payload.get('kwargs', {}))
+
+    def _run_pdf_job(self, job: Dict[str, Any], token: CancellationToken) -> Dict[str, Any]:
+        payload = job['payload']
+        token.raise_if_cancelled()
+        method = getattr(self.pdf_service, PDF_REPORT_METHODS[payload.get('report', 'evaluation')])
+        pdf_bytes = method(payload['data'])
+        return {
+            'file_name': payload.get('file_name', f"{job['id']}.pdf"),
+            'pdf_base64': base64.b64encode(pdf_bytes).decode('ascii')
+        }
+
+    def _persist_result(self, job: Dict[str, Any], result: Any) -> None:
+        """Write AI results through to the draft result store so sessions can rehydrate them"""
+        result_key = job['payload'].get('result_key')
+        if job.get('draft_id') and result_key:
+            save_ai_result(job['draft_id'], result_key['kind'], result_key.get('input_hash'), result)
+
+
+def _worker_main(worker_id: str, db_path: str) -> None:
+    load_dotenv()
+    worker = AIWorker(worker_id, JobQueue(db_path))
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+def main():
+    """Start the configured number of worker processes"""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run AI-STER background job workers")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('AI_WORKER_COUNT', '2')),
+                        help="Number of worker processes (default: AI_WORKER_COUNT or 2)")
+    parser.add_argument('--db', default=JOBS_DB_FILE, help="Path to the job queue database")
+    args = parser.parse_args()
+
+    # Initialize the schema once before the workers start
+    JobQueue(args.db)
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = []
+    for i in range(args.workers):
+        process = multiprocessing.Process(target=_worker_main, args=(f"{prefix}-{i + 1}", args.db), daemon=False)
+        process.start()
+        processes.append(process)
+
+    print(f"🚀 Started {len(processes)} AI worker process(es). Press Ctrl+C to stop.")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping workers...")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Inference backends for OpenAI-compatible chat completion servers
+
+Copyright © 2025 Utah Valley University School of Education
+All Rights Reserved.
+
+This software is proprietary and confidential property of Utah Valley University
+School of Education. Licensed for educational use only.
+
+Backends are configured from environment variables:
+    OPENAI_API_KEY / OPENAI_BASE_URL / OPENAI_MAX_CONCURRENCY   hosted backend ("openai")
+    OPENAI_JSON_MODE  send response_format=json_object for JSON tasks (off by default)
+    LOCAL_LLM_BASE_URL / LOCAL_LLM_MODEL / LOCAL_LLM_API_KEY     local server ("local")
+    LOCAL_LLM_MAX_CONCURRENCY / LOCAL_LLM_JSON_MODE / LOCAL_LLM_STREAMING / LOCAL_LLM_USAGE
+    AI_BACKENDS       optional JSON object of additional backends by name
+    AI_TASK_BACKENDS  task routing, e.g. "lesson_plan_analysis=local,bulk_justification=local"
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from openai import OpenAI
+
+DEFAULT_BACKEND = 'openai'
+LOCAL_BACKEND = 'local'
+
+# Task names used by OpenAIService when routing requests
+TASKS = (
+    'lesson_plan_analysis',
+    'justification',
+    'evaluation_analysis',
+    'bulk_justification',
+    'competency_analysis',
+)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class InferenceBackend:
+    """An OpenAI-compatible chat completion endpoint with its limits and capabilities"""
+
+    def __init__(
+        self,
+        name: str,
+        api_key: Optional[str],
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: int = 8,
+        supports_json_mode: bool = False,
+        supports_streaming: bool = True,
+        reports_usage: bool = True
+    ):
+        """
+        Args:
+            name: Backend name used for task routing
+            api_key: API key (local servers usually accept any value)
+            base_url: Server URL, e.g. "http://localhost:8080/v1" (None for api.openai.com)
+            model: Model served by this backend (None to use the service's model)
+            max_concurrency: Maximum in-flight requests to this backend per process
+            supports_json_mode: Whether response_format={"type": "json_object"} is supported
+            supports_streaming: Whether streamed responses are supported
+            reports_usage: Whether token usage is returned
+        """
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.supports_json_mode = supports_json_mode
+        self.supports_streaming = supports_streaming
+        self.reports_usage = reports_usage
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        """OpenAI client for this backend, created on first use"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+            return self._client
+
+    def config_key(self) -> tuple:
+        return (self.name, self.api_key, self.base_url, self.model, self.max_concurrency,
+                self.supports_json_mode, self.supports_streaming, self.reports_usage)
+
+    def __repr__(self) -> str:
+        return f"InferenceBackend(name={self.name!r}, base_url={self.base_url!r}, model={self.model!r})"
+
+
+# Backends are shared per process so concurrency limits and connections apply across service instances
+_backends: Dict[tuple, InferenceBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _shared(backend: InferenceBackend) -> InferenceBackend:
+    with _backends_lock:
+        return _backends.setdefault(backend.config_key(), backend)
+
+
+def load_backends(api_key: Optional[str]) -> Dict[str, InferenceBackend]:
+    """Build the configured backends, keyed by name
+
+    Args:
+        api_key: API key for the hosted backend (None leaves it unconfigured)
+    """
+    backends = {}
+
+    if api_key:
+        backends[DEFAULT_BACKEND] = _shared(InferenceBackend(
+            DEFAULT_BACKEND,
+            api_key,
+            base_url=os.getenv('OPENAI_BASE_URL') or None,
+            max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', '8')),
+            supports_json_mode=_env_flag('OPENAI_JSON_MODE', False)
+        ))
+
+    local_base_url = os.getenv('LOCAL_LLM_BASE_URL')
+    if local_base_url:
+        backends[LOCAL_BACKEND] = _shared(InferenceBackend(
+            LOCAL_BACKEND,
+            os.getenv('LOCAL_LLM_API_KEY', 'not-needed'),
+            base_url=local_base_url,
+            model=os.getenv('LOCAL_LLM_MODEL') or None,
+            max_concurrency=int(os.getenv('LOCAL_LLM_MAX_CONCURRENCY', '2')),
+            supports_json_mode=_env_flag('LOCAL_LLM_JSON_MODE', False),
+            supports_streaming=_env_flag('LOCAL_LLM_STREAMING', True),
+            reports_usage=_env_flag('LOCAL_LLM_USAGE', True)
+        ))
+
+    extra = os.getenv('AI_BACKENDS')
+    if extra:
+        try:
+            for name, config in json.loads(extra).items():
+                config = dict(config)
+                backend_api_key = config.pop('api_key', None)
+                api_key_env = config.pop('api_key_env', None)
+                if not backend_api_key and api_key_env:
+                    backend_api_key = os.getenv(api_key_env)
+                backends[name] = _shared(InferenceBackend(name, backend_api_key or 'not-needed', **config))
+        except (json.JSONDecodeError, TypeError, AttributeError) as e:
+            print(f"ERROR: Invalid AI_BACKENDS configuration: {e}")
+
+    return backends
+
+
+def load_task_routes() -> Dict[str, str]:
+    """Parse AI_TASK_BACKENDS ("task=backend,...") into a task -> backend name mapping"""
+    routes = {}
+    for entry in os.getenv('AI_TASK_BACKENDS', '').split(','):
+        if '=' in entry:
+            task, backend = entry.split('=', 1)
+            routes[task.strip()] = backend.strip()
+    return routes
@@ -9,12 +9,17 @@ School of Education. Licensed for educational use only.
 """
 
 import os
+import threading
+from types import SimpleNamespace
 from typing import Dict, List, Optional
 import openai
 from openai import OpenAI
 import json
 from datetime import datetime
 
+from services.ai_scheduler import AIRequestCancelled, CancellationToken
+from services.inference_backends import DEFAULT_BACKEND, InferenceBackend, load_backends, load_task_routes
+
 try:
     import streamlit as st
     HAS_STREAMLIT = True
@@ -24,26 +29,46 @@ except ImportError:
 class OpenAIService:
     """Service for OpenAI API integration"""
     
-    def __init__(self):
-        """Initialize OpenAI service"""
+    def __init__(self, model: Optional[str] = None):
+        """Initialize OpenAI service
+        
+        Args:
+            model: Model name to use (defaults to the OPENAI_MODEL environment variable)
+        """
         self.client = None
-        self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        self.model = model or os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        self.backends: Dict[str, InferenceBackend] = {}
+        self.task_routes = load_task_routes()
+        # Usage is tracked per thread so one service can be shared by concurrent callers
+        self._call_state = threading.local()
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize OpenAI client if API key is available"""
+        """Initialize inference backends and the default OpenAI client"""
         api_key = self._get_api_key()
-        if api_key:
+        if not api_key:
+            print("ERROR: No API key found for OpenAI")
+        try:
+            self.backends = load_backends(api_key)
+        except Exception as e:
+            print(f"ERROR: Failed to initialize inference backends: {e}")
+            self.backends = {}
+        
+        default_backend = self.backends.get(self.task_routes.get('default', DEFAULT_BACKEND))
+        if default_backend is not None:
             try:
-                print(f"DEBUG: Initializing OpenAI client with model: {self.model}")
-                print(f"DEBUG: API key length: {len(api_key)}")
-                self.client = OpenAI(api_key=api_key)
+                print(f"DEBUG: Initializing OpenAI client with model: {default_backend.model or self.model}")
+                if default_backend.base_url:
+                    print(f"DEBUG: Using backend '{default_backend.name}' at {default_backend.base_url}")
+                self.client = default_backend.client
                 print(f"DEBUG: OpenAI client initialized successfully")
             except Exception as e:
                 print(f"ERROR: Failed to initialize OpenAI client: {e}")
                 self.client = None
-        else:
-            print("ERROR: No API key found for OpenAI")
+        
+        for task, backend_name in self.task_routes.items():
+            if backend_name not in self.backends:
+                print(f"ERROR: Task '{task}' is routed to unknown backend '{backend_name}'")
     
     def _get_api_key(self) -> Optional[str]:
         """Get OpenAI API key from Streamlit secrets or environment variables"""
@@ -62,12 +87,124 @@ class OpenAIService:
         """Check if OpenAI service is enabled and configured"""
         return self.client is not None
     
-    def analyze_lesson_plan(self, lesson_plan_text: str) -> Dict[str, any]:
+    def get_last_usage(self) -> Optional[Dict[str, int]]:
+        """Get token usage of the most recent API call made from the current thread"""
+        return getattr(self._call_state, 'last_usage', None)
+    
+    def model_for_task(self, task: Optional[str]) -> str:
+        """Get the model that serves a task: its backend's model, or the service's own"""
+        return self._backend_for(task).model or self.model
+    
+    def _backend_for(self, task: Optional[str]) -> InferenceBackend:
+        """Get the backend a task is routed to, falling back to the default backend"""
+        default_name = self.task_routes.get('default', DEFAULT_BACKEND)
+        backend = self.backends.get(self.task_routes.get(task, default_name)) or self.backends.get(default_name)
+        if backend is None:
+            raise Exception("OpenAI service is not configured")
+        return backend
+    
+    def _create_chat_completion(
+        self,
+        task: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        json_mode: bool = False,
+        **kwargs
+    ):
+        """Call the chat completions API on the task's backend and record token usage
+        
+        When a cancellation token is given and the backend supports streaming, the
+        response is streamed so cancelling the token (or reaching its deadline)
+        closes the HTTP connection mid-request.
+        
+        Args:
+            task: Task name used to pick the inference backend
+            cancel_token: Optional token that aborts the request when cancelled
+            json_mode: Request a JSON object response when the backend supports it
+        """
+        self._call_state.last_usage = None
+        backend = self._backend_for(task)
+        if backend.model:
+            kwargs['model'] = backend.model
+        print(f"DEBUG: Calling {backend.name} backend with model: {kwargs.get('model')}")
+        if json_mode and backend.supports_json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+        
+        self._acquire_backend_slot(backend, cancel_token)
+        try:
+            if cancel_token is None or not backend.supports_streaming:
+                if cancel_token is not None and cancel_token.remaining() is not None:
+                    kwargs['timeout'] = cancel_token.remaining()
+                response = backend.client.chat.completions.create(**kwargs)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                self._record_usage(getattr(response, 'usage', None))
+                return response
+            
+            return self._stream_chat_completion(backend, cancel_token, **kwargs)
+        finally:
+            backend.semaphore.release()
+    
+    def _acquire_backend_slot(self, backend: InferenceBackend, cancel_token: Optional[CancellationToken]) -> None:
+        """Wait for a free slot under the backend's concurrency limit"""
+        if cancel_token is None:
+            backend.semaphore.acquire()
+            return
+        while not backend.semaphore.acquire(timeout=0.25):
+            cancel_token.raise_if_cancelled()
+        if cancel_token.cancelled:
+            backend.semaphore.release()
+            cancel_token.raise_if_cancelled()
+    
+    def _stream_chat_completion(self, backend: InferenceBackend, cancel_token: CancellationToken, **kwargs):
+        """Stream a chat completion so it can be aborted by closing the connection"""
+        if cancel_token.remaining() is not None:
+            kwargs['timeout'] = cancel_token.remaining()
+        if backend.reports_usage:
+            kwargs['stream_options'] = {"include_usage": True}
+        
+        stream = backend.client.chat.completions.create(stream=True, **kwargs)
+        unregister = cancel_token.add_callback(stream.close)
+        content_parts = []
+        usage = None
+        try:
+            for chunk in stream:
+                cancel_token.raise_if_cancelled()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content_parts.append(chunk.choices[0].delta.content)
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+            cancel_token.raise_if_cancelled()
+        except AIRequestCancelled:
+            raise
+        except Exception:
+            # Closing the stream from another thread surfaces as a read error
+            cancel_token.raise_if_cancelled()
+            raise
+        finally:
+            unregister()
+            stream.close()
+        
+        self._record_usage(usage)
+        # Mirror the non-streaming response shape used by the callers
+        message = SimpleNamespace(content=''.join(content_parts))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+    
+    def _record_usage(self, usage) -> None:
+        """Store token usage for the calling thread"""
+        if usage is not None:
+            self._call_state.last_usage = {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+                'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+                'total_tokens': getattr(usage, 'total_tokens', 0) or 0
+            }
+    
+    def analyze_lesson_plan(self, lesson_plan_text: str, cancel_token: Optional[CancellationToken] = None) -> Dict[str, any]:
         """
         Analyze lesson plan and extract key information
         
         Args:
             lesson_plan_text: The lesson plan content as text
+            cancel_token: Optional token that aborts the request when cancelled
         
         Returns:
             Dictionary containing extracted information
@@ -78,8 +215,10 @@ class OpenAIService:
         prompt = self._build_lesson_plan_analysis_prompt(lesson_plan_text)
         
         try:
-            print(f"DEBUG: Calling OpenAI API with model: {self.model}")
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
+                task='lesson_plan_analysis',
+                cancel_token=cancel_token,
+                json_mode=True,
                 model=self.model,
                 messages=[
                     {
@@ -202,6 +341,8 @@ class OpenAIService:
                 # Return fallback instead of raising exception
                 return self._validate_lesson_plan_extraction(fallback_response)
         
+        except AIRequestCancelled:
+            raise
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
         except Exception as e:
@@ -329,7 +470,8 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
         item: Dict,
         score: int,
         student_name: str,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> str:
         """
         Generate AI-assisted justification for a given score
@@ -339,6 +481,7 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
             score: Score level (0-3)
             student_name: Name of the student being evaluated
             context: Additional context (optional)
+            cancel_token: Optional token that aborts the request when cancelled
         
         Returns:
             Generated justification text
@@ -354,7 +497,9 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
         prompt = self._build_justification_prompt(item, score, student_name, context)
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
+                task='justification',
+                cancel_token=cancel_token,
                 model=self.model,
                 messages=[
                     {
@@ -378,6 +523,8 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
             
             return ai_response
         
+        except AIRequestCancelled:
+            raise
         except Exception as e:
             # Fallback to generic justification on error
             return self._create_generic_justification(item, score)
@@ -387,7 +534,8 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
         scores: Dict[str, int],
         justifications: Dict[str, str],
         disposition_scores: Dict[str, int],
-        rubric_type: str
+        rubric_type: str,
+        cancel_token: Optional[CancellationToken] = None
     ) -> str:
         """
         Analyze complete evaluation and provide feedback
@@ -397,6 +545,7 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
             justifications: Assessment justifications
             disposition_scores: Professional disposition scores
             rubric_type: Type of rubric ("field_evaluation" or "ster")
+            cancel_token: Optional token that aborts the request when cancelled
         
         Returns:
             Analysis and feedback text
@@ -407,7 +556,9 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
         prompt = self._build_analysis_prompt(scores, justifications, disposition_scores, rubric_type)
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
+                task='evaluation_analysis',
+                cancel_token=cancel_token,
                 model=self.model,
                 messages=[
                     {
@@ -425,6 +576,8 @@ IMPORTANT: Return ONLY the JSON object. No explanations, no markdown, no extra t
             
             return response.choices[0].message.content.strip()
         
+        except AIRequestCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate AI analysis: {str(e)}")
     
@@ -524,7 +677,8 @@ FORMAT: Provide clear, actionable analysis that helps supervisors guide students
         scores: Dict[str, int],
         observation_notes: str,
         student_name: str,
-        rubric_type: str
+        rubric_type: str,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Dict[str, str]:
         """
         Generate justifications for all scored items using supervisor's observation notes
@@ -535,6 +689,7 @@ FORMAT: Provide clear, actionable analysis that helps supervisors guide students
             observation_notes: Supervisor's classroom observation notes
             student_name: Name of the student being evaluated
             rubric_type: Type of rubric ("field_evaluation" or "ster")
+            cancel_token: Optional token that aborts the request when cancelled
         
         Returns:
             Dictionary mapping item IDs to generated justifications
@@ -547,7 +702,10 @@ FORMAT: Provide clear, actionable analysis that helps supervisors guide students
         )
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
+                task='bulk_justification',
+                cancel_token=cancel_token,
+                json_mode=True,
                 model=self.model,
                 messages=[
                     {
@@ -587,6 +745,8 @@ FORMAT: Provide clear, actionable analysis that helps supervisors guide students
             else:
                 raise Exception("Could not parse JSON from AI response")
         
+        except AIRequestCancelled:
+            raise
         except json.JSONDecodeError as e:
             # Fallback: Generate generic justifications
             fallback_justifications = {}
@@ -696,7 +856,8 @@ JSON Response:"""
         observation_notes: str,
         student_name: str,
         rubric_type: str,
-        lesson_plan_context: Optional[str] = None
+        lesson_plan_context: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Dict[str, str]:
         """
         Generate AI analysis for competencies based on observation notes and lesson plan
@@ -708,6 +869,7 @@ JSON Response:"""
             student_name: Name of the student being evaluated
             rubric_type: Type of rubric ("field_evaluation" or "ster")
             lesson_plan_context: Optional lesson plan context
+            cancel_token: Optional token that aborts the request when cancelled
         
         Returns:
             Dictionary mapping item IDs to generated analysis text
@@ -724,7 +886,10 @@ JSON Response:"""
 
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
+                task='competency_analysis',
+                cancel_token=cancel_token,
+                json_mode=True,
                 model=self.model,
                 messages=[
                     {
@@ -813,6 +978,8 @@ JSON Response:"""
                 # Fallback to text extraction
                 return self._extract_analyses_from_text(response_text, items)
         
+        except AIRequestCancelled:
+            raise
         except Exception as e:
             # Only in case of complete failure, provide informative fallback
             fallback_analyses = {}
@@ -23,9 +23,17 @@ load_dotenv()
 from data.rubrics import get_ster_items, get_professional_dispositions
 from services.openai_service import OpenAIService
 from services.pdf_service import PDFService
-from utils.storage import save_evaluation, load_evaluations, save_ai_original
+from utils.storage import save_evaluation, load_evaluations, save_ai_original, get_storage_backend
 from data.sample_observation_notes import SAMPLE_OBSERVATION_NOTES
 
+def storage_location() -> str:
+    """File or directory the configured storage backend writes to"""
+    backend = get_storage_backend()
+    for attribute in ('evaluations_path', 'db_path', 'storage_dir'):
+        if hasattr(backend, attribute):
+            return getattr(backend, attribute)
+    return type(backend).__name__
+
 def create_test_evaluation():
     """Create a complete test evaluation with all features"""
     print("\n🚀 AI-STER Feature Test - Automatic Setup")
@@ -206,18 +214,9 @@ def create_test_evaluation():
         'ai_original': ai_original_data  # Include AI original for comparison
     }
     
-    # Save to storage manually since we need to handle the list format
+    # Save through the storage facade so the version, summaries, blobs and search index are written
     try:
-        # Load existing evaluations
-        with open('data_storage/evaluations.json', 'r') as f:
-            evaluations = json.load(f)
-        
-        # Add new evaluation
-        evaluations.append(evaluation_data)
-        
-        # Save back
-        with open('data_storage/evaluations.json', 'w') as f:
-            json.dump(evaluations, f, indent=2)
+        save_evaluation(evaluation_data)
         
         print(f"   ✅ Evaluation saved with ID: {evaluation_id}")
     except Exception as e:
@@ -294,7 +293,7 @@ def test_all_features():
     print("\n📁 Output Files:")
     print("   - AI Original PDF in test_output/")
     print("   - Final Report PDF in test_output/")
-    print("   - Evaluation saved to data_storage/evaluations.json")
+    print(f"   - Evaluation saved to {storage_location()} ({os.getenv('STORAGE_BACKEND', 'json').lower()} backend)")
     
     print("\n🌐 To see in the app:")
     print("1. Go to https://aister.ngrok.app")
@@ -0,0 +1,117 @@
+"""
+AI-vs-supervisor differences for research comparison
+The difference between an evaluation and its AI-generated original is computed
+when the evaluation is saved and stored with it as 'ai_diff', so comparison
+views only read it. Text changes are measured in words.
+"""
+
+import re
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+# Totals kept in 'ai_diff' and copied into evaluation summaries as 'ai_changes'
+AI_DIFF_TOTALS = ('total_changes', 'score_changes', 'justification_changes', 'edit_distance', 'changed_tokens')
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Words and punctuation marks of a justification"""
+    return _TOKEN_PATTERN.findall(text) if isinstance(text, str) else []
+
+
+def token_edit_distance(a: List[str], b: List[str]) -> int:
+    """Levenshtein distance between two token lists (insertions, deletions, substitutions)"""
+    # Common prefix and suffix cost nothing and are usually most of a lightly edited text
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return max(len(a), len(b))
+
+    previous = list(range(len(b) + 1))
+    for i, token_a in enumerate(a, start=1):
+        current = [i]
+        for j, token_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (token_a != token_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def _text_change(ai_text: Any, current_text: Any) -> Dict[str, int]:
+    ai_tokens, current_tokens = tokenize(ai_text), tokenize(current_text)
+    added = removed = 0
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, ai_tokens, current_tokens, autojunk=False).get_opcodes():
+        if tag != 'equal':
+            removed += i2 - i1
+            added += j2 - j1
+    return {
+        'edit_distance': token_edit_distance(ai_tokens, current_tokens),
+        'tokens_added': added,
+        'tokens_removed': removed,
+    }
+
+
+def compute_ai_diff(evaluation: Dict[str, Any], ai_original: Dict[str, Any]) -> Dict[str, Any]:
+    """Differences between an evaluation and its AI original, ready to store as 'ai_diff'
+
+    Items only record what changed; the texts themselves stay in the
+    evaluation and its ai_original and are filled in by expand_differences().
+    """
+    items = []
+
+    current_just = evaluation.get('justifications') or {}
+    ai_just = ai_original.get('justifications') or {}
+    for item_id in sorted(set(current_just) | set(ai_just), key=str):
+        ai_text, current_text = ai_just.get(item_id, ''), current_just.get(item_id, '')
+        if current_text != ai_text:
+            items.append({'field': 'justification', 'item_id': item_id, **_text_change(ai_text, current_text)})
+
+    current_scores = evaluation.get('scores') or {}
+    ai_scores = ai_original.get('scores') or {}
+    for item_id in sorted(set(current_scores) | set(ai_scores), key=str):
+        if current_scores.get(item_id) != ai_scores.get(item_id):
+            items.append({'field': 'score', 'item_id': item_id,
+                          'ai_value': ai_scores.get(item_id), 'current_value': current_scores.get(item_id)})
+
+    justification_items = [item for item in items if item['field'] == 'justification']
+    return {
+        'computed_at': datetime.now().isoformat(),
+        'ai_original_saved_at': ai_original.get('saved_at'),
+        'total_changes': len(items),
+        'score_changes': len(items) - len(justification_items),
+        'justification_changes': len(justification_items),
+        'edit_distance': sum(item['edit_distance'] for item in justification_items),
+        'changed_tokens': sum(item['tokens_added'] + item['tokens_removed'] for item in justification_items),
+        'items': items,
+    }
+
+
+def is_current(ai_diff: Optional[Dict[str, Any]], ai_original: Dict[str, Any]) -> bool:
+    """Whether a stored diff was computed against this AI original"""
+    return bool(ai_diff) and 'items' in ai_diff and ai_diff.get('ai_original_saved_at') == ai_original.get('saved_at')
+
+
+def expand_differences(ai_diff: Dict[str, Any], evaluation: Dict[str, Any],
+                       ai_original: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stored diff items with the AI and current values filled in"""
+    current_just = evaluation.get('justifications') or {}
+    ai_just = ai_original.get('justifications') or {}
+    differences = []
+    for item in ai_diff['items']:
+        difference = dict(item)
+        if item['field'] == 'justification':
+            difference['ai_value'] = ai_just.get(item['item_id'], '')
+            difference['current_value'] = current_just.get(item['item_id'], '')
+        differences.append(difference)
+    return differences
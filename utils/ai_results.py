@@ -0,0 +1,120 @@
+"""
+Durable store for AI-generated results of draft evaluations
+Results are written through to JSON files keyed by draft ID and input hash,
+so they survive browser refreshes, reconnects and server restarts
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from utils.storage import STORAGE_DIR
+
+AI_RESULTS_DIR = os.path.join(STORAGE_DIR, "ai_results")
+
+_lock = threading.Lock()
+
+
+def compute_input_hash(*parts: Any) -> str:
+    """Hash the inputs of an AI request so a stored result is only reused for identical inputs"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _draft_file(draft_id: str) -> str:
+    """Path of the results file for a draft"""
+    safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', draft_id)
+    return os.path.join(AI_RESULTS_DIR, f"{safe_id}.json")
+
+
+def _read_draft(draft_id: str) -> Dict[str, Any]:
+    path = _draft_file(draft_id)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError):
+        return {}
+
+
+def _write_draft(draft_id: str, results: Dict[str, Any]) -> None:
+    os.makedirs(AI_RESULTS_DIR, exist_ok=True)
+    path = _draft_file(draft_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def save_ai_result(draft_id: str, kind: str, input_hash: Optional[str], result: Any) -> None:
+    """Write an AI result for a draft through to disk
+
+    Args:
+        draft_id: The evaluation draft ID
+        kind: Result type (e.g. 'lesson_plan_analysis', 'ai_analyses')
+        input_hash: Hash of the request inputs from compute_input_hash
+        result: JSON-serializable AI output
+    """
+    with _lock:
+        results = _read_draft(draft_id)
+        results[kind] = {
+            'input_hash': input_hash,
+            'result': result,
+            'saved_at': datetime.now().isoformat()
+        }
+        _write_draft(draft_id, results)
+
+
+def update_ai_result(draft_id: str, kind: str, result: Any) -> None:
+    """Replace a stored result while keeping the input hash it was generated for"""
+    with _lock:
+        results = _read_draft(draft_id)
+        input_hash = results.get(kind, {}).get('input_hash')
+        results[kind] = {
+            'input_hash': input_hash,
+            'result': result,
+            'saved_at': datetime.now().isoformat()
+        }
+        _write_draft(draft_id, results)
+
+
+def load_ai_result(draft_id: str, kind: str, input_hash: Optional[str] = None) -> Optional[Any]:
+    """Get a stored AI result, or None if missing or generated for different inputs"""
+    with _lock:
+        entry = _read_draft(draft_id).get(kind)
+    if not entry:
+        return None
+    if input_hash is not None and entry.get('input_hash') != input_hash:
+        return None
+    return entry.get('result')
+
+
+def load_ai_results(draft_id: str) -> Dict[str, Any]:
+    """Get all stored AI results for a draft, keyed by result type"""
+    with _lock:
+        entries = _read_draft(draft_id)
+    return {kind: entry.get('result') for kind, entry in entries.items()}
+
+
+def delete_ai_result(draft_id: str, kind: str) -> bool:
+    """Remove one stored result (e.g. before regenerating it)"""
+    with _lock:
+        results = _read_draft(draft_id)
+        if kind not in results:
+            return False
+        del results[kind]
+        _write_draft(draft_id, results)
+        return True
+
+
+def delete_ai_results(draft_id: str) -> None:
+    """Remove all stored results for a draft"""
+    with _lock:
+        path = _draft_file(draft_id)
+        if os.path.exists(path):
+            os.remove(path)
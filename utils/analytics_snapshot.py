@@ -0,0 +1,246 @@
+"""
+Columnar analytics snapshot of the evaluation store
+Keeps two Arrow IPC (Feather v2) files that research tools can memory-map
+instead of re-parsing nested JSON:
+
+    evaluations.arrow     one row per evaluation: metadata plus one column per
+                          rubric item score (score_<item>) and disposition
+                          score (disposition_<item>)
+    justifications.arrow  one row per justification or disposition comment
+
+Read them with pyarrow (read_snapshot_table()) or pandas
+(pd.read_feather(path, memory_map=True)). Requires pyarrow.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.concurrency import file_lock, stored_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EVALUATIONS_TABLE = 'evaluations'
+JUSTIFICATIONS_TABLE = 'justifications'
+MANIFEST_FILE_NAME = 'manifest.json'
+
+SCORE_PREFIX = 'score_'
+DISPOSITION_PREFIX = 'disposition_'
+
+# Metadata columns of the evaluations table and their Arrow type names
+META_COLUMNS = {
+    'id': 'string',
+    'version': 'int64',
+    'student_name': 'string',
+    'evaluator_name': 'string',
+    'evaluator_role': 'string',
+    'school_name': 'string',
+    'subject_area': 'string',
+    'grade_levels': 'string',
+    'department': 'string',
+    'semester': 'string',
+    'rubric_type': 'string',
+    'status': 'string',
+    'total_score': 'float64',
+    'date': 'string',
+    'created_at': 'string',
+    'completed_at': 'string',
+    'lesson_plan_provided': 'bool',
+    'is_synthetic': 'bool',
+    'has_ai_original': 'bool',
+}
+
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Analytics snapshots require pyarrow: pip install pyarrow")
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _convert(value: Any, type_name: str) -> Any:
+    if value is None:
+        return None
+    if type_name == 'string':
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if type_name == 'bool':
+        return bool(value)
+    if type_name == 'int64':
+        return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return _number(value)
+
+
+def evaluation_rows(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """Wide row of an evaluation: metadata and one column per item score"""
+    row = {column: _convert(evaluation.get(column), type_name) for column, type_name in META_COLUMNS.items()}
+    row['version'] = stored_version(evaluation)
+    for item_id, score in (evaluation.get('scores') or {}).items():
+        row[f"{SCORE_PREFIX}{item_id}"] = _number(score)
+    for item_id, score in (evaluation.get('disposition_scores') or {}).items():
+        row[f"{DISPOSITION_PREFIX}{item_id}"] = _number(score)
+    return row
+
+
+def justification_rows(evaluation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Long rows of an evaluation: one per justification or disposition comment"""
+    rows = []
+    for kind, texts, scores in (
+        ('competency', evaluation.get('justifications'), evaluation.get('scores')),
+        ('disposition', evaluation.get('disposition_comments'), evaluation.get('disposition_scores')),
+    ):
+        scores = scores or {}
+        for item_id, text in (texts or {}).items():
+            if isinstance(text, str) and text.strip():
+                rows.append({
+                    'id': evaluation.get('id'),
+                    'kind': kind,
+                    'item_id': str(item_id),
+                    'score': _number(scores.get(item_id)),
+                    'text': text,
+                })
+    return rows
+
+
+class AnalyticsSnapshot:
+    """Incrementally refreshed columnar copy of the evaluation store
+
+    A manifest records the version of every evaluation in the snapshot, so a
+    refresh only loads evaluations that were added or changed since and
+    drops the ones that were deleted. Files are replaced atomically and the
+    manifest is written last, so an interrupted refresh is redone next time.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        _require_pyarrow()
+        self.snapshot_dir = snapshot_dir
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._lock = file_lock(os.path.join(snapshot_dir, '.lock'))
+
+    def path(self, table_name: str) -> str:
+        """Path of a snapshot table file"""
+        return os.path.join(self.snapshot_dir, f"{table_name}.arrow")
+
+    # Files
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.snapshot_dir, MANIFEST_FILE_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.snapshot_dir, MANIFEST_FILE_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _read_for_update(self, table_name: str) -> Optional['pa.Table']:
+        # Read into memory rather than mapping: the file is replaced afterwards
+        if not os.path.exists(self.path(table_name)):
+            return None
+        with pa.OSFile(self.path(table_name), 'rb') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _write_table(self, table_name: str, table: 'pa.Table') -> None:
+        # Uncompressed IPC so readers can memory-map the columns without copying
+        path = self.path(table_name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    # Refresh
+
+    @staticmethod
+    def _concat(tables: List['pa.Table']) -> 'pa.Table':
+        """Concatenate tables whose column sets differ (new rubric items add columns)"""
+        tables = [table for table in tables if table is not None]
+        try:
+            return pa.concat_tables(tables, promote_options='default')
+        except TypeError:  # pyarrow < 14
+            return pa.concat_tables(tables, promote=True)
+
+    @staticmethod
+    def _without(table: Optional['pa.Table'], evaluation_ids: Iterable[str]) -> Optional['pa.Table']:
+        ids = list(evaluation_ids)
+        if table is None or not ids:
+            return table
+        return table.filter(pc.invert(pc.is_in(table['id'], value_set=pa.array(ids, type=pa.string()))))
+
+    @staticmethod
+    def _evaluations_table(evaluations: List[Dict[str, Any]]) -> 'pa.Table':
+        rows = [evaluation_rows(evaluation) for evaluation in evaluations]
+        item_columns = sorted({column for row in rows for column in row if column not in META_COLUMNS})
+        fields = [pa.field(column, pa.type_for_alias(type_name)) for column, type_name in META_COLUMNS.items()]
+        fields += [pa.field(column, pa.float64()) for column in item_columns]
+        schema = pa.schema(fields)
+        return pa.Table.from_pylist(rows, schema=schema)
+
+    @staticmethod
+    def _justifications_table(evaluations: List[Dict[str, Any]]) -> 'pa.Table':
+        schema = pa.schema([
+            pa.field('id', pa.string()),
+            pa.field('kind', pa.string()),
+            pa.field('item_id', pa.string()),
+            pa.field('score', pa.float64()),
+            pa.field('text', pa.string()),
+        ])
+        rows = [row for evaluation in evaluations for row in justification_rows(evaluation)]
+        return pa.Table.from_pylist(rows, schema=schema)
+
+    def refresh(self, versions: Dict[str, int],
+                load_evaluation: Callable[[str], Optional[Dict[str, Any]]]) -> Dict[str, int]:
+        """Bring the snapshot up to date with the store
+
+        Args:
+            versions: Current version of every stored evaluation, by ID
+            load_evaluation: Loads a full evaluation by ID (only called for changed ones)
+
+        Returns:
+            {'updated': n, 'removed': n, 'total': n}
+        """
+        with self._lock:
+            snapshot_versions = self._read_manifest().get('versions', {})
+            changed = [evaluation_id for evaluation_id, version in versions.items()
+                       if snapshot_versions.get(evaluation_id) != version]
+            removed = [evaluation_id for evaluation_id in snapshot_versions if evaluation_id not in versions]
+            tables_exist = all(os.path.exists(self.path(name)) for name in (EVALUATIONS_TABLE, JUSTIFICATIONS_TABLE))
+            if not changed and not removed and tables_exist:
+                return {'updated': 0, 'removed': 0, 'total': len(versions)}
+
+            evaluations = [evaluation for evaluation in map(load_evaluation, changed) if evaluation]
+            stale = changed + removed
+            self._write_table(EVALUATIONS_TABLE, self._concat([
+                self._without(self._read_for_update(EVALUATIONS_TABLE), stale),
+                self._evaluations_table(evaluations),
+            ]))
+            self._write_table(JUSTIFICATIONS_TABLE, self._concat([
+                self._without(self._read_for_update(JUSTIFICATIONS_TABLE), stale),
+                self._justifications_table(evaluations),
+            ]))
+
+            snapshot_versions = {evaluation_id: version for evaluation_id, version in snapshot_versions.items()
+                                 if evaluation_id in versions}
+            snapshot_versions.update({evaluation['id']: stored_version(evaluation) for evaluation in evaluations})
+            self._write_manifest({'versions': snapshot_versions})
+            return {'updated': len(evaluations), 'removed': len(removed), 'total': len(snapshot_versions)}
+
+    # Reads
+
+    def read_table(self, table_name: str, memory_map: bool = True) -> 'pa.Table':
+        """Read a snapshot table; with memory_map the columns are not copied into memory"""
+        path = self.path(table_name)
+        source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')
+        return pa.ipc.open_file(source).read_all()
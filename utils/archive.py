@@ -0,0 +1,178 @@
+"""
+Archive tier for evaluations from closed semesters
+Archived evaluations leave the hot store and are kept in compressed,
+read-only segment files with a summary index, so the hot store only holds
+the current term. They can still be read, searched and restored.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.concurrency import file_lock
+from utils.serialization import dumps_json, loads_json
+from utils.summaries import summarize_evaluation
+
+INDEX_FILE_NAME = "index.json"
+
+
+def _segment_slug(semester: Optional[str]) -> str:
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', str(semester or '')).strip('-').lower()
+    return slug or 'no-semester'
+
+
+class SemesterArchive:
+    """Read-only archive segments plus an index of their evaluations
+
+    A segment is a .ndjson.gz file holding one gzip member per evaluation,
+    so it can be read with any gzip tool, while the index records each
+    member's offset for reading one evaluation without decompressing the
+    rest. Segments are never modified; restoring an evaluation only drops
+    it from the index, and a segment is deleted once nothing in it is
+    indexed.
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self.index_path = os.path.join(archive_dir, INDEX_FILE_NAME)
+        os.makedirs(archive_dir, exist_ok=True)
+        self._lock = file_lock(os.path.join(archive_dir, '.lock'))
+        self._index: Optional[Dict[str, Any]] = None
+        self._index_stat = None
+
+    # Index
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _load_index(self) -> Dict[str, Any]:
+        """The index, re-read only when another writer replaced it"""
+        stat = self._stat()
+        if self._index is None or stat != self._index_stat:
+            if stat is None:
+                self._index = {'segments': {}, 'entries': {}}
+            else:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            self._index_stat = stat
+        return self._index
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._index = index
+        self._index_stat = self._stat()
+
+    # Writes
+
+    def add(self, semester: Optional[str], evaluations: Iterable[Dict[str, Any]]) -> Optional[str]:
+        """Write evaluations to a new segment and index them; returns the segment name
+
+        Evaluations are written as they are read, so a semester never has to
+        be held in memory. They must be self-contained (blob fields
+        resolved). Ones already archived are re-indexed to the new copy.
+        Returns None if there was nothing to write.
+        """
+        with self._lock:
+            segment = f"{_segment_slug(semester)}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.ndjson.gz"
+            path = os.path.join(self.archive_dir, segment)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            entries = {}
+            with open(tmp_path, 'wb') as f:
+                for evaluation in evaluations:
+                    if not evaluation.get('id'):
+                        continue
+                    member = gzip.compress(dumps_json(evaluation) + b'\n')
+                    entries[evaluation['id']] = {
+                        'segment': segment,
+                        'offset': f.tell(),
+                        'length': len(member),
+                        'summary': summarize_evaluation(evaluation),
+                    }
+                    f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+            if not entries:
+                os.remove(tmp_path)
+                return None
+            os.replace(tmp_path, path)
+
+            index = self._load_index()
+            index = {'segments': dict(index['segments']), 'entries': dict(index['entries'])}
+            index['entries'].update(entries)
+            index['segments'][segment] = {
+                'semester': semester,
+                'count': len(entries),
+                'archived_at': datetime.now().isoformat(),
+            }
+            self._drop_unreferenced_segments(index)
+            self._write_index(index)
+            return segment
+
+    def remove(self, evaluation_ids: Iterable[str]) -> int:
+        """Drop evaluations from the archive (after restoring them); returns the number removed"""
+        with self._lock:
+            index = self._load_index()
+            entries = dict(index['entries'])
+            removed = sum(entries.pop(evaluation_id, None) is not None for evaluation_id in set(evaluation_ids))
+            if removed:
+                index = {'segments': dict(index['segments']), 'entries': entries}
+                self._drop_unreferenced_segments(index)
+                self._write_index(index)
+            return removed
+
+    def _drop_unreferenced_segments(self, index: Dict[str, Any]) -> None:
+        live = {entry['segment'] for entry in index['entries'].values()}
+        for segment in [segment for segment in index['segments'] if segment not in live]:
+            del index['segments'][segment]
+            try:
+                os.remove(os.path.join(self.archive_dir, segment))
+            except FileNotFoundError:
+                pass
+
+    # Reads
+
+    def get(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """Read one archived evaluation, decompressing only its own member"""
+        entry = self._load_index()['entries'].get(evaluation_id)
+        if entry is None:
+            return None
+        with open(os.path.join(self.archive_dir, entry['segment']), 'rb') as f:
+            f.seek(entry['offset'])
+            return loads_json(gzip.decompress(f.read(entry['length'])))
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """Yield every archived evaluation, reading each segment front to back"""
+        by_segment: Dict[str, List[Tuple[int, int]]] = {}
+        for entry in self._load_index()['entries'].values():
+            by_segment.setdefault(entry['segment'], []).append((entry['offset'], entry['length']))
+        for segment, members in by_segment.items():
+            with open(os.path.join(self.archive_dir, segment), 'rb') as f:
+                for offset, length in sorted(members):
+                    f.seek(offset)
+                    yield loads_json(gzip.decompress(f.read(length)))
+
+    def contains(self, evaluation_id: str) -> bool:
+        return evaluation_id in self._load_index()['entries']
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Summaries of all archived evaluations"""
+        return [entry['summary'] for entry in self._load_index()['entries'].values()]
+
+    def segments(self) -> Dict[str, Dict[str, Any]]:
+        """Segment name -> {'semester', 'count', 'archived_at'}"""
+        return dict(self._load_index()['segments'])
+
+    def count(self) -> int:
+        return len(self._load_index()['entries'])
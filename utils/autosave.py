@@ -0,0 +1,291 @@
+"""
+Debounced write-behind autosave for draft evaluations
+Draft edits are staged in memory and written to the evaluation store in the
+background, so a burst of edits costs one store write. Every staged edit is
+first appended to a small crash-recovery journal; edits a crash kept from
+reaching the store are saved by the next process that starts.
+"""
+
+import atexit
+import glob
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.concurrency import FileLock, VersionConflictError
+from utils.serialization import dumps_json, loads_json
+
+# Fields whose changes trigger an autosave; other fields (timestamps) are saved along with them
+AUTOSAVE_FIELDS = (
+    'scores', 'justifications', 'disposition_scores', 'disposition_comments',
+    'ai_analyses', 'targeted_improvement_analysis', 'observation_notes', 'notes',
+)
+
+# (evaluation, expected version) -> new version; raises VersionConflictError
+SaveFunction = Callable[[Dict[str, Any], Optional[int]], int]
+
+
+def _fingerprint(evaluation: Dict[str, Any]) -> bytes:
+    return dumps_json({field: evaluation.get(field) for field in AUTOSAVE_FIELDS})
+
+
+class DraftAutosaver:
+    """Coalesces draft edits and flushes them to storage in the background
+
+    A flush happens once edits pause for idle_seconds, but never sooner than
+    interval seconds after the previous flush and never later than max_wait
+    seconds after the first unsaved edit. Saves are compare-and-set against
+    the version the editing session last saw, so autosave never overwrites a
+    newer save from another session; such drafts are reported by conflict().
+    """
+
+    def __init__(self, save: SaveFunction, journal_dir: str, interval: float = 10.0,
+                 idle_seconds: float = 2.0, max_wait: float = 60.0):
+        """
+        Args:
+            save: Writes one evaluation to the store (see SaveFunction)
+            journal_dir: Directory of crash-recovery journals, one per process
+            interval: Minimum seconds between flushes
+            idle_seconds: Seconds without edits before a flush
+            max_wait: Maximum seconds an edit stays unsaved while edits continue
+        """
+        self.save = save
+        self.journal_dir = journal_dir
+        self.journal_path = os.path.join(journal_dir, f"drafts-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+        self.interval = interval
+        self.idle_seconds = idle_seconds
+        self.max_wait = max_wait
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Tuple[Dict[str, Any], Optional[int]]] = {}
+        self._fingerprints: Dict[str, bytes] = {}
+        self._versions: Dict[str, int] = {}
+        self._saved_from: Dict[str, Optional[int]] = {}
+        self._conflicts: Dict[str, VersionConflictError] = {}
+        self._first_edit = None
+        self._last_edit = None
+        self._last_flush = 0.0
+        self._timer = None
+
+        os.makedirs(journal_dir, exist_ok=True)
+        # Held for the life of the process; a journal whose lock is free belongs to a process that is gone
+        self._journal_lock = FileLock(f"{self.journal_path}.lock")
+        self._journal_lock.acquire()
+        self._recover()
+        atexit.register(self.close)
+
+    # Crash-recovery journal
+
+    def _recover(self) -> None:
+        """Take over the edits left in the journals of processes that stopped before flushing them"""
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'drafts-*.jsonl'))):
+            if path == self.journal_path:
+                continue
+            lock = FileLock(f"{path}.lock")
+            if not lock.acquire(blocking=False):
+                continue  # Its process is still running
+            try:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # Torn write from a crash
+                        try:
+                            record = loads_json(line)
+                        except ValueError:
+                            break
+                        evaluation = record['evaluation']
+                        self._pending[evaluation['id']] = (evaluation, record.get('expected_version'))
+                if self._pending:
+                    self._rewrite_journal()
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Taken over by another process meanwhile
+            finally:
+                lock.release()
+                try:
+                    os.remove(lock.path)
+                except FileNotFoundError:
+                    pass
+
+        if self._pending:
+            print(f"WARNING: Recovered {len(self._pending)} unsaved draft(s) from {self.journal_dir}")
+            self._first_edit = self._last_edit = time.monotonic()
+            self._schedule(delay=0)
+
+    def _append(self, evaluation: Dict[str, Any], expected_version: Optional[int]) -> None:
+        line = dumps_json({'expected_version': expected_version, 'evaluation': evaluation}) + b'\n'
+        with open(self.journal_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self) -> None:
+        """Keep only the edits still pending"""
+        if not self._pending:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        tmp_path = f"{self.journal_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for evaluation, expected_version in self._pending.values():
+                f.write(dumps_json({'expected_version': expected_version, 'evaluation': evaluation}) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    # Staging
+
+    def stage(self, evaluation: Dict[str, Any], expected_version: Optional[int] = None) -> bool:
+        """Stage a draft for saving if its content changed since it was last staged
+
+        Args:
+            evaluation: The full draft; it is copied, so the caller may keep editing it
+            expected_version: Version the editing session last saw (for the compare-and-set save)
+
+        Returns:
+            True if the draft changed and was staged
+        """
+        evaluation_id = evaluation['id']
+        fingerprint = _fingerprint(evaluation)
+        with self._lock:
+            if self._fingerprints.get(evaluation_id) == fingerprint:
+                return False
+            if evaluation_id in self._pending and expected_version is None:
+                expected_version = self._pending[evaluation_id][1]
+            elif expected_version is not None and evaluation_id in self._saved_from \
+                    and self._saved_from[evaluation_id] == expected_version:
+                # The session has not yet seen the version its previous autosave wrote
+                expected_version = self._versions[evaluation_id]
+            evaluation = loads_json(dumps_json(evaluation))
+            self._append(evaluation, expected_version)
+            self._pending[evaluation_id] = (evaluation, expected_version)
+            self._fingerprints[evaluation_id] = fingerprint
+            self._conflicts.pop(evaluation_id, None)
+
+            now = time.monotonic()
+            self._last_edit = now
+            if self._first_edit is None:
+                self._first_edit = now
+            self._schedule()
+            return True
+
+    def mark_saved(self, evaluation: Dict[str, Any], version: int) -> None:
+        """Record a draft saved directly (e.g. by a Save button) so the same content is not autosaved"""
+        with self._lock:
+            self._fingerprints[evaluation['id']] = _fingerprint(evaluation)
+            self._versions[evaluation['id']] = version
+            self._saved_from.pop(evaluation['id'], None)
+            self._conflicts.pop(evaluation['id'], None)
+            if self._pending.pop(evaluation['id'], None) is not None:
+                self._rewrite_journal()
+
+    def _schedule(self, delay: Optional[float] = None) -> None:
+        if delay is None:
+            due = max(self._last_flush + self.interval, self._last_edit + self.idle_seconds)
+            due = min(due, self._first_edit + self.max_wait)
+            delay = max(0.0, due - time.monotonic())
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    # Flushing
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"ERROR: Draft autosave failed: {e}")
+
+    def flush(self, evaluation_id: Optional[str] = None) -> int:
+        """Save pending drafts now (all, or only evaluation_id); returns the number saved
+
+        A draft whose save fails for a reason other than a version conflict
+        stays pending and is retried on the next flush.
+        """
+        with self._lock:
+            ids = [evaluation_id] if evaluation_id is not None else list(self._pending)
+            saved = 0
+            failed = False
+            for draft_id in ids:
+                pending = self._pending.get(draft_id)
+                if pending is None:
+                    continue
+                evaluation, expected_version = pending
+                try:
+                    self._versions[draft_id] = self.save(dict(evaluation), expected_version)
+                    self._saved_from[draft_id] = expected_version
+                    saved += 1
+                except VersionConflictError as e:
+                    self._conflicts[draft_id] = e
+                except Exception as e:
+                    print(f"ERROR: Could not autosave draft {draft_id}: {e}")
+                    failed = True
+                    continue
+                del self._pending[draft_id]
+
+            if ids:
+                self._rewrite_journal()
+            self._last_flush = time.monotonic()
+            if self._pending:
+                if failed:
+                    self._first_edit = self._last_edit = time.monotonic()
+                self._schedule()
+            else:
+                self._first_edit = None
+            return saved
+
+    def close(self) -> None:
+        """Flush and give up the journal; drafts that could not be saved stay in it for the next process"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self.flush()
+            if self._journal_lock is None:
+                return
+            self._journal_lock.release()
+            self._journal_lock = None
+            if not os.path.exists(self.journal_path):
+                try:
+                    os.remove(f"{self.journal_path}.lock")
+                except FileNotFoundError:
+                    pass
+
+    # Status
+
+    def has_pending(self, evaluation_id: str) -> bool:
+        """Whether a draft has edits not yet written to the store"""
+        with self._lock:
+            return evaluation_id in self._pending
+
+    def saved_version(self, evaluation_id: str) -> Optional[int]:
+        """Version written by the last autosave of a draft, if any"""
+        with self._lock:
+            return self._versions.get(evaluation_id)
+
+    def conflict(self, evaluation_id: str) -> Optional[VersionConflictError]:
+        """The version conflict that stopped a draft's last autosave, if any"""
+        with self._lock:
+            return self._conflicts.get(evaluation_id)
+
+
+_autosaver = None
+_autosaver_lock = threading.Lock()
+
+
+def get_draft_autosaver() -> DraftAutosaver:
+    """Get the process-wide draft autosaver writing to utils.storage"""
+    global _autosaver
+    with _autosaver_lock:
+        if _autosaver is None:
+            from utils.storage import STORAGE_DIR, save_evaluation
+            _autosaver = DraftAutosaver(
+                lambda evaluation, expected_version: save_evaluation(evaluation, expected_version=expected_version),
+                os.getenv('AUTOSAVE_JOURNAL_DIR', os.path.join(STORAGE_DIR, 'autosave')),
+                interval=float(os.getenv('AUTOSAVE_INTERVAL_SECONDS', '10')),
+                idle_seconds=float(os.getenv('AUTOSAVE_IDLE_SECONDS', '2')),
+                max_wait=float(os.getenv('AUTOSAVE_MAX_WAIT_SECONDS', '60')),
+            )
+        return _autosaver
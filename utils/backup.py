@@ -0,0 +1,209 @@
+"""
+Incremental, deduplicated backups of the evaluation store
+utils/storage.py takes and restores snapshots through BackupStore
+(create_backup(), restore_backup()); scripts/backup_storage.py runs them
+
+A snapshot is a small manifest listing its evaluations by content hash. The
+evaluations, and the blobs they reference, live in a content-addressed chunk
+store (utils.blob_store.BlobStore) shared by every snapshot, so a snapshot
+only writes what changed since any earlier one: an unchanged evaluation or
+blob is stored once however many snapshots contain it.
+
+Layout:
+
+    <backup_dir>/chunks/      evaluations and blobs, by SHA-256
+    <backup_dir>/snapshots/   one manifest per snapshot
+"""
+
+import os
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from utils.blob_store import BLOB_REF_KEY, BlobStore, blob_digest, canonical_payload, is_blob_ref
+from utils.concurrency import file_lock
+from utils.serialization import read_document, write_document
+
+MANIFEST_FORMAT = 1
+MANIFEST_SUFFIX = '.manifest'
+
+# Snapshot IDs are their creation time, so they sort chronologically
+SNAPSHOT_ID_FORMAT = '%Y%m%dT%H%M%S%f'
+
+
+class BackupStore:
+    """Snapshots of evaluations sharing one deduplicated chunk store
+
+    Creating and pruning snapshots hold a lock file in the backup directory,
+    so pruning never removes chunks of a snapshot being written. A manifest
+    is written only after all its chunks, so an interrupted backup leaves no
+    snapshot behind (its chunks are reused by the next one).
+    """
+
+    def __init__(self, backup_dir: str, compress: bool = True):
+        self.backup_dir = backup_dir
+        self.chunks = BlobStore(os.path.join(backup_dir, 'chunks'), compress=compress)
+        self.snapshots_dir = os.path.join(backup_dir, 'snapshots')
+        self._lock = file_lock(os.path.join(backup_dir, '.lock'))
+
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshots_dir, snapshot_id + MANIFEST_SUFFIX)
+
+    def _put(self, record: Dict[str, Any], stats: Dict[str, int]) -> str:
+        """Store a record unless an identical one is stored; returns its digest"""
+        payload = canonical_payload(record)
+        digest = blob_digest(payload)
+        if not self.chunks.has(digest):
+            self.chunks.put(record)
+            stats['new_chunks'] += 1
+            stats['new_bytes'] += len(payload)
+        return digest
+
+    # Snapshots
+
+    def create(self, evaluations: Iterable[Dict[str, Any]], archived: Iterable[Dict[str, Any]] = (),
+               blobs: Optional[BlobStore] = None, label: Optional[str] = None) -> Dict[str, Any]:
+        """Take a snapshot; returns its manifest header
+
+        Args:
+            evaluations: Hot-store records, possibly holding blob references
+            archived: Archived (self-contained) records
+            blobs: Store the blob references point into; referenced blobs are copied from it
+            label: Free-text note kept with the snapshot
+        """
+        with self._lock:
+            stats = {'evaluations': 0, 'archived': 0, 'blobs': 0, 'new_chunks': 0, 'new_bytes': 0}
+            hot_entries = []
+            blob_digests = set()
+            for evaluation in evaluations:
+                hot_entries.append([evaluation.get('id'), self._put(evaluation, stats)])
+                for value in evaluation.values():
+                    if is_blob_ref(value):
+                        blob_digests.add(value[BLOB_REF_KEY])
+
+            for digest in sorted(blob_digests):
+                if blobs is None:
+                    raise ValueError("Evaluations reference blobs but no blob store was given")
+                if blobs.copy_to(self.chunks, digest):
+                    stats['new_chunks'] += 1
+                    stats['new_bytes'] += len(self.chunks.read_payload(digest))
+
+            archived_entries = [[evaluation.get('id'), self._put(evaluation, stats), evaluation.get('semester')]
+                                for evaluation in archived]
+
+            stats.update(evaluations=len(hot_entries), archived=len(archived_entries), blobs=len(blob_digests))
+            now = datetime.now()
+            snapshot_id = now.strftime(SNAPSHOT_ID_FORMAT)
+            manifest = {
+                'format': MANIFEST_FORMAT,
+                'id': snapshot_id,
+                'created_at': now.isoformat(),
+                'label': label,
+                'stats': stats,
+                'evaluations': hot_entries,
+                'archived': archived_entries,
+                'blobs': sorted(blob_digests),
+            }
+            os.makedirs(self.snapshots_dir, exist_ok=True)
+            write_document(self._manifest_path(snapshot_id), manifest)
+            return _header(manifest)
+
+    def snapshot_ids(self) -> List[str]:
+        """IDs of all snapshots, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name[:-len(MANIFEST_SUFFIX)] for name in os.listdir(self.snapshots_dir)
+                      if name.endswith(MANIFEST_SUFFIX))
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Headers (id, created_at, label, stats) of all snapshots, oldest first"""
+        return [_header(self.load(snapshot_id)) for snapshot_id in self.snapshot_ids()]
+
+    def load(self, snapshot_id: str) -> Dict[str, Any]:
+        """Full manifest of a snapshot
+
+        Raises:
+            KeyError: No such snapshot
+        """
+        try:
+            manifest = read_document(self._manifest_path(snapshot_id))
+        except FileNotFoundError:
+            raise KeyError(f"No backup snapshot {snapshot_id} in {self.backup_dir}")
+        if manifest.get('format') != MANIFEST_FORMAT:
+            raise ValueError(f"Unsupported backup manifest format: {manifest.get('format')}")
+        return manifest
+
+    def snapshot_at(self, when: Union[str, datetime]) -> Optional[str]:
+        """ID of the latest snapshot taken at or before a time (ISO string or datetime), or None"""
+        when = when.isoformat() if isinstance(when, datetime) else str(when)
+        candidates = [snapshot_id for snapshot_id in self.snapshot_ids()
+                      if datetime.strptime(snapshot_id, SNAPSHOT_ID_FORMAT).isoformat()[:len(when)] <= when]
+        return candidates[-1] if candidates else None
+
+    # Restore
+
+    def iter_evaluations(self, snapshot_id: str, archived: bool = False,
+                         evaluation_ids: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield a snapshot's hot (or archived) evaluations in their stored order, one at a time"""
+        wanted = set(evaluation_ids) if evaluation_ids is not None else None
+        for entry in self.load(snapshot_id)['archived' if archived else 'evaluations']:
+            if wanted is None or entry[0] in wanted:
+                yield self.chunks.get({BLOB_REF_KEY: entry[1]})
+
+    def restore_blobs(self, snapshot_id: str, blobs: BlobStore, digests: Optional[Iterable[str]] = None) -> int:
+        """Copy a snapshot's blobs (only digests, if given) back into a blob store; returns the number copied"""
+        wanted = set(digests) if digests is not None else None
+        return sum(1 for digest in self.load(snapshot_id)['blobs']
+                   if (wanted is None or digest in wanted) and self.chunks.copy_to(blobs, digest))
+
+    # Maintenance
+
+    def verify(self, snapshot_id: Optional[str] = None) -> Dict[str, Any]:
+        """Check that every chunk of a snapshot (all snapshots if None) exists and matches its hash
+
+        Returns:
+            {'snapshots': n, 'chunks': n, 'missing': [digest, ...], 'corrupt': [digest, ...], 'ok': bool}
+        """
+        ids = [snapshot_id] if snapshot_id is not None else self.snapshot_ids()
+        digests = set()
+        for manifest in map(self.load, ids):
+            digests.update(entry[1] for entry in manifest['evaluations'])
+            digests.update(entry[1] for entry in manifest['archived'])
+            digests.update(manifest['blobs'])
+
+        missing, corrupt = [], []
+        for digest in sorted(digests):
+            try:
+                if blob_digest(self.chunks.read_payload(digest)) != digest:
+                    corrupt.append(digest)
+            except FileNotFoundError:
+                missing.append(digest)
+            except (OSError, EOFError, zlib.error):
+                corrupt.append(digest)  # Unreadable or truncated gzip
+        return {'snapshots': len(ids), 'chunks': len(digests), 'missing': missing, 'corrupt': corrupt,
+                'ok': not missing and not corrupt}
+
+    def prune(self, keep: int) -> Dict[str, int]:
+        """Delete all but the newest keep snapshots, then the chunks no remaining snapshot uses
+
+        Returns:
+            {'snapshots': deleted, 'chunks': deleted}
+        """
+        if keep < 1:
+            raise ValueError("At least one snapshot must be kept")
+        with self._lock:
+            snapshot_ids = self.snapshot_ids()
+            expired = snapshot_ids[:-keep]
+            for expired_id in expired:
+                os.remove(self._manifest_path(expired_id))
+
+            referenced = set()
+            for manifest in map(self.load, snapshot_ids[-keep:]):
+                referenced.update(entry[1] for entry in manifest['evaluations'])
+                referenced.update(entry[1] for entry in manifest['archived'])
+                referenced.update(manifest['blobs'])
+            return {'snapshots': len(expired), 'chunks': self.chunks.prune(referenced)}
+
+
+def _header(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: manifest.get(key) for key in ('id', 'created_at', 'label', 'stats')}
@@ -0,0 +1,116 @@
+"""
+Content-addressed blob store for large evaluation fields
+Large values such as ai_original snapshots and lesson plan text are stored once
+per distinct content and referenced from evaluation records by hash
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Optional
+
+BLOB_REF_KEY = '__blob__'
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Whether a field value is a reference to a stored blob"""
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+def canonical_payload(value: Any) -> bytes:
+    """Serialization a value is stored and addressed by"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def blob_digest(payload: bytes) -> str:
+    """Address of a canonical payload"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class BlobStore:
+    """Stores JSON values under the SHA-256 of their canonical serialization
+
+    Identical values are written once. Blobs are gzip-compressed unless
+    compression is disabled; both forms are readable either way.
+    """
+
+    def __init__(self, blob_dir: str, compress: bool = True):
+        self.blob_dir = blob_dir
+        self.compress = compress
+
+    def _path(self, digest: str, compressed: bool) -> str:
+        suffix = '.json.gz' if compressed else '.json'
+        return os.path.join(self.blob_dir, digest[:2], digest + suffix)
+
+    def _find(self, digest: str) -> Optional[str]:
+        for compressed in (True, False):
+            path = self._path(digest, compressed)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """Store a JSON-serializable value and return a reference to it"""
+        payload = canonical_payload(value)
+        digest = blob_digest(payload)
+
+        if self._find(digest) is None:
+            path = self._path(digest, self.compress)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(payload) if self.compress else payload)
+            os.replace(tmp_path, path)
+
+        return {BLOB_REF_KEY: digest, 'size': len(payload)}
+
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """Load the value a reference points to"""
+        return json.loads(self.read_payload(ref[BLOB_REF_KEY]))
+
+    def has(self, digest: str) -> bool:
+        """Whether a blob is stored"""
+        return self._find(digest) is not None
+
+    def read_payload(self, digest: str) -> bytes:
+        """Stored serialization of a blob (uncompressed)"""
+        path = self._find(digest)
+        if path is None:
+            raise FileNotFoundError(f"Blob {digest} is missing from {self.blob_dir}")
+        with open(path, 'rb') as f:
+            payload = f.read()
+        if path.endswith('.gz'):
+            payload = gzip.decompress(payload)
+        return payload
+
+    def copy_to(self, other: 'BlobStore', digest: str) -> bool:
+        """Copy a blob file into another store unless it is there already; returns True if copied"""
+        if other.has(digest):
+            return False
+        path = self._find(digest)
+        if path is None:
+            raise FileNotFoundError(f"Blob {digest} is missing from {self.blob_dir}")
+        target = other._path(digest, path.endswith('.gz'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+        return True
+
+    def prune(self, referenced: Iterable[str]) -> int:
+        """Delete blobs whose digest is not in referenced; returns the number deleted"""
+        keep = set(referenced)
+        removed = 0
+        if not os.path.isdir(self.blob_dir):
+            return 0
+        for root, _, files in os.walk(self.blob_dir):
+            for file_name in files:
+                if file_name.endswith('.tmp'):
+                    continue  # Blob still being written
+                digest = file_name.split('.', 1)[0]
+                if digest not in keep:
+                    os.remove(os.path.join(root, file_name))
+                    removed += 1
+        return removed
@@ -0,0 +1,146 @@
+"""
+Concurrency control for evaluation storage
+Per-record versions let a save fail cleanly instead of overwriting a newer
+save, and file locks serialize writers across app processes that share one
+data directory.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Evaluation field holding the record version; bumped by every save
+VERSION_FIELD = 'version'
+
+
+class VersionConflictError(Exception):
+    """A compare-and-set save found a different stored version than expected"""
+
+    def __init__(self, evaluation_id: str, expected_version: int, current_version: int):
+        self.evaluation_id = evaluation_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Evaluation {evaluation_id} was changed by another save "
+            f"(expected version {expected_version}, stored version is {current_version})"
+        )
+
+
+def stored_version(evaluation: Optional[Dict[str, Any]]) -> int:
+    """Version of a stored evaluation; 0 if it does not exist or predates versioning"""
+    if not evaluation:
+        return 0
+    return int(evaluation.get(VERSION_FIELD) or 0)
+
+
+def next_version(evaluation_id: str, current_version: int, expected_version: Optional[int]) -> int:
+    """Version for the next save of a record, checking expected_version if one is given
+
+    Raises:
+        VersionConflictError: expected_version is set and differs from current_version
+    """
+    if expected_version is not None and expected_version != current_version:
+        raise VersionConflictError(evaluation_id, expected_version, current_version)
+    return current_version + 1
+
+
+class FileLock:
+    """Exclusive lock on a lock file, shared by threads and processes
+
+    Re-entrant within a thread, so a locked operation may call another one.
+    Use file_lock() to get the instance for a path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False, return False instead of waiting for another holder"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                lock_dir = os.path.dirname(self.path)
+                if lock_dir:
+                    os.makedirs(lock_dir, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    locked = _lock_file(fd, blocking)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                if not locked:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    return False
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_file(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+_file_locks: Dict[str, FileLock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path: str) -> FileLock:
+    """Get the process-wide lock for a lock file path"""
+    key = os.path.abspath(path)
+    with _file_locks_guard:
+        if key not in _file_locks:
+            _file_locks[key] = FileLock(key)
+        return _file_locks[key]
+
+
+def _lock_file(fd: int, blocking: bool = True) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            continue  # LK_LOCK gives up after ~10 seconds; keep waiting
+
+
+def _unlock_file(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
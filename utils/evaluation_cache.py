@@ -0,0 +1,121 @@
+"""
+Process-level cache of parsed evaluations for AI-STER
+Shared by every Streamlit session so the store is parsed once per change,
+not once per rerun. Cached evaluations are handed out as read-only views.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+_READ_ONLY_MESSAGE = "Cached evaluations are read-only; use thaw() or copy.deepcopy() for a mutable copy"
+
+
+class ReadOnlyDict(dict):
+    """dict view that rejects mutation; copy(), copy.copy() and copy.deepcopy() return plain dicts"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict[str, Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+class ReadOnlyList(list):
+    """list view that rejects mutation; copy(), copy.copy() and copy.deepcopy() return plain lists"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def copy(self) -> List[Any]:
+        return list(self)
+
+    def __copy__(self) -> List[Any]:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> List[Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts and lists into read-only views"""
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively copy read-only views (or any dicts and lists) into mutable containers"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+class EvaluationCache:
+    """Thread-safe cache of the evaluation store keyed by a change marker
+
+    The key is whatever identifies the current state of the store (file
+    mtime/size, a backend version counter); a different key reloads it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._evaluations: Optional[ReadOnlyList] = None
+        self._by_id: Dict[Any, ReadOnlyDict] = {}
+        self._summary_key = None
+        self._summaries: Optional[ReadOnlyList] = None
+
+    def _ensure(self, key: Hashable, loader: Callable[[], List[Dict[str, Any]]]) -> None:
+        if self._evaluations is None or key != self._key:
+            self._evaluations = freeze(loader())
+            self._by_id = {evaluation.get('id'): evaluation for evaluation in self._evaluations}
+            self._key = key
+
+    def get_all(self, key: Hashable, loader: Callable[[], List[Dict[str, Any]]]) -> ReadOnlyList:
+        """Get all evaluations, reloading with loader() if the key changed"""
+        with self._lock:
+            self._ensure(key, loader)
+            return self._evaluations
+
+    def get_by_id(self, key: Hashable, loader: Callable[[], List[Dict[str, Any]]],
+                  evaluation_id: str) -> Optional[ReadOnlyDict]:
+        """Get one evaluation by ID, reloading with loader() if the key changed"""
+        with self._lock:
+            self._ensure(key, loader)
+            return self._by_id.get(evaluation_id)
+
+    def get_summaries(self, key: Hashable, loader: Callable[[], List[Dict[str, Any]]]) -> ReadOnlyList:
+        """Get all evaluation summaries, reloading with loader() if the key changed"""
+        with self._lock:
+            if self._summaries is None or key != self._summary_key:
+                self._summaries = freeze(loader())
+                self._summary_key = key
+            return self._summaries
+
+    def invalidate(self) -> None:
+        """Drop the cached evaluations and summaries"""
+        with self._lock:
+            self._key = None
+            self._evaluations = None
+            self._by_id = {}
+            self._summary_key = None
+            self._summaries = None
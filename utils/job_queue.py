@@ -0,0 +1,248 @@
+"""
+Persistent SQLite-backed job queue for background AI work
+Jobs survive server restarts and are processed by services/ai_worker.py
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.storage import STORAGE_DIR
+
+JOBS_DB_FILE = os.path.join(STORAGE_DIR, "jobs.db")
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+CANCEL_REQUESTED = 'cancel_requested'
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    draft_id TEXT,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after REAL NOT NULL,
+    lease_expires REAL,
+    worker_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_draft_id ON jobs(draft_id);
+"""
+
+
+class JobQueue:
+    """Durable job queue with leases, retries and per-draft cancellation"""
+
+    def __init__(self, db_path: str = JOBS_DB_FILE, retry_backoff_seconds: float = 5.0):
+        self.db_path = db_path
+        self.retry_backoff_seconds = retry_backoff_seconds
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], draft_id: Optional[str] = None,
+                max_attempts: int = 3) -> str:
+        """Add a job to the queue and return its ID"""
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, job_type, draft_id, status, payload, max_attempts, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, draft_id, QUEUED, json.dumps(payload, ensure_ascii=False), max_attempts,
+                 time.time(), now, now)
+            )
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status, result and error by ID"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, draft_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List jobs, optionally filtered by draft and status"""
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        params = []
+        if draft_id is not None:
+            query += " AND draft_id = ?"
+            params.append(draft_id)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at"
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def claim(self, worker_id: str, lease_seconds: float = 300) -> Optional[Dict[str, Any]]:
+        """Atomically claim the next runnable job for a worker
+
+        Running jobs whose lease has expired (e.g. their worker was killed)
+        are claimed again.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = ? AND run_after <= ?) "
+                "OR (status IN (?, ?) AND lease_expires < ?) "
+                "ORDER BY run_after LIMIT 1",
+                (QUEUED, now, RUNNING, CANCEL_REQUESTED, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row['status'] == CANCEL_REQUESTED:
+                # The worker died before it could acknowledge the cancellation
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                             (CANCELLED, datetime.now().isoformat(), row['id']))
+                conn.execute("COMMIT")
+                return self.claim(worker_id, lease_seconds)
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?, lease_expires = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, datetime.now().isoformat(), row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get_job(row['id'])
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = 300) -> Optional[str]:
+        """Extend a job's lease while the worker still holds it
+
+        Returns the job's current status, or None if the worker lost the job
+        (its lease expired and another worker claimed it, or the job is gone).
+        """
+        with self._connection() as conn:
+            held = conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status IN (?, ?)",
+                                (time.time() + lease_seconds, job_id, worker_id, RUNNING, CANCEL_REQUESTED)).rowcount
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row['status'] if held and row else None
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Mark a job as succeeded with its result
+
+        Returns False, leaving the job alone, if the worker no longer holds it
+        or cancellation was requested; the result must then be discarded.
+        """
+        with self._connection() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (SUCCEEDED, json.dumps(result, ensure_ascii=False), datetime.now().isoformat(),
+                 job_id, worker_id, RUNNING)
+            ).rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """Record a failed attempt, re-queueing with backoff if attempts remain
+
+        Returns the new status, or None if the worker no longer holds the job.
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT attempts, max_attempts, status FROM jobs "
+                               "WHERE id = ? AND worker_id = ? AND status IN (?, ?)",
+                               (job_id, worker_id, RUNNING, CANCEL_REQUESTED)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row['status'] == CANCEL_REQUESTED:
+                status = CANCELLED
+                run_after = time.time()
+            elif row['attempts'] < row['max_attempts']:
+                status = QUEUED
+                run_after = time.time() + self.retry_backoff_seconds * (2 ** (row['attempts'] - 1))
+            else:
+                status = FAILED
+                run_after = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (status, error, run_after, datetime.now().isoformat(), job_id)
+            )
+            conn.execute("COMMIT")
+        return status
+
+    def mark_cancelled(self, job_id: str, worker_id: str) -> bool:
+        """Acknowledge that a running job stopped because it was cancelled; False if the worker lost it"""
+        with self._connection() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status IN (?, ?)",
+                (CANCELLED, datetime.now().isoformat(), job_id, worker_id, RUNNING, CANCEL_REQUESTED)
+            ).rowcount > 0
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job: queued jobs are dropped, running jobs are asked to stop"""
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            dropped = conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                                   (CANCELLED, now, job_id, QUEUED)).rowcount
+            requested = conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                                     (CANCEL_REQUESTED, now, job_id, RUNNING)).rowcount
+        return bool(dropped or requested)
+
+    def cancel_draft_jobs(self, draft_id: str) -> int:
+        """Cancel every unfinished job for an abandoned draft; returns the number affected"""
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            dropped = conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE draft_id = ? AND status = ?",
+                                   (CANCELLED, now, draft_id, QUEUED)).rowcount
+            requested = conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE draft_id = ? AND status = ?",
+                                     (CANCEL_REQUESTED, now, draft_id, RUNNING)).rowcount
+        return dropped + requested
+
+    def purge_finished(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than the given age; returns the number deleted"""
+        cutoff = datetime.fromtimestamp(time.time() - older_than_seconds).isoformat()
+        with self._connection() as conn:
+            return conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, cutoff)
+            ).rowcount
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload']) if job['payload'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
@@ -0,0 +1,444 @@
+"""
+Append-only JSONL journal storage backend for evaluations
+Enabled with STORAGE_BACKEND=jsonl; utils/storage.py delegates to it
+
+Each write appends one upsert or delete record to journal.jsonl. An in-memory
+index maps evaluation IDs to the byte offset of their latest record, and a
+background compaction folds the journal into snapshot.jsonl once it grows.
+Records are minified JSON lines; each file starts with a format record
+(files written before it existed are read the same way).
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.concurrency import file_lock, next_version, stored_version
+from utils.serialization import FORMAT_VERSION, dumps_json, loads_json
+from utils.summaries import summarize_evaluation
+
+SNAPSHOT_FILE_NAME = "snapshot.jsonl"
+JOURNAL_FILE_NAME = "journal.jsonl"
+LOCK_FILE_NAME = ".lock"
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+FORMAT = 'format'
+
+# First line of every snapshot and journal file
+_FORMAT_LINE = dumps_json({'op': FORMAT, 'format_version': FORMAT_VERSION}) + b'\n'
+
+# Index entry: (file name, byte offset, byte length) of an evaluation's latest upsert record
+IndexEntry = Tuple[str, int, int]
+
+
+def _fsync_dir(path: str) -> None:
+    """Persist a rename in a directory (no-op where directories cannot be opened)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalStorage:
+    """Flat-file evaluation store whose writes cost one appended line
+
+    Evaluations keep their first-insertion order. Every operation holds a
+    lock file in the storage directory, so several processes can share it;
+    records they append are picked up on the next call, and a torn final
+    line left by a crash is discarded.
+    """
+
+    def __init__(self, storage_dir: str, compact_threshold: int = 500, fsync: bool = True):
+        """
+        Args:
+            storage_dir: Directory holding the snapshot and journal files
+            compact_threshold: Journal records that trigger a background compaction
+            fsync: Whether each append is fsynced before returning
+        """
+        self.storage_dir = storage_dir
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.snapshot_path = os.path.join(storage_dir, SNAPSHOT_FILE_NAME)
+        self.journal_path = os.path.join(storage_dir, JOURNAL_FILE_NAME)
+        os.makedirs(storage_dir, exist_ok=True)
+        self._lock = file_lock(os.path.join(storage_dir, LOCK_FILE_NAME))
+        self._index: Dict[str, IndexEntry] = {}
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._journal_end = 0
+        self._journal_records = 0
+        self._snapshot_stat = None
+        self._compacting = False
+        with self._lock:
+            self._rebuild_index()
+
+    # Index maintenance
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.storage_dir, file_name)
+
+    def _stat(self, path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the index from the snapshot followed by the journal"""
+        self._index = {}
+        self._summaries = {}
+        self._snapshot_stat = self._stat(self.snapshot_path)
+        self._replay(SNAPSHOT_FILE_NAME, 0)
+        self._journal_end = 0
+        self._journal_records = 0
+        self._journal_end, self._journal_records = self._replay(JOURNAL_FILE_NAME, 0, truncate_torn=True)
+
+    def _replay(self, file_name: str, start: int, truncate_torn: bool = False) -> Tuple[int, int]:
+        """Apply records from a file starting at a byte offset; returns (end offset, records applied)"""
+        path = self._path(file_name)
+        if not os.path.exists(path):
+            return start, 0
+
+        offset = start
+        applied = 0
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn write from a crash or a writer still appending
+                try:
+                    record = loads_json(line)
+                except ValueError:
+                    break
+                if record.get('op') == FORMAT:
+                    if record.get('format_version', 0) > FORMAT_VERSION:
+                        raise ValueError(f"{path} was written in format {record['format_version']}; "
+                                         f"this version reads up to {FORMAT_VERSION}")
+                else:
+                    self._apply(record, (file_name, offset, len(line)))
+                    applied += 1
+                offset += len(line)
+
+        if truncate_torn and offset < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+        return offset, applied
+
+    def _apply(self, record: Dict[str, Any], entry: IndexEntry) -> None:
+        """Update the offset index and summary index with one record"""
+        if record.get('op') == DELETE:
+            self._index.pop(record['id'], None)
+            self._summaries.pop(record['id'], None)
+        else:
+            self._index[record['id']] = entry
+            self._summaries[record['id']] = summarize_evaluation(record['data'])
+
+    def _refresh(self) -> None:
+        """Pick up compactions and appends made by other processes"""
+        if self._stat(self.snapshot_path) != self._snapshot_stat:
+            self._rebuild_index()
+            return
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if size < self._journal_end:
+            self._rebuild_index()
+        elif size > self._journal_end:
+            end, applied = self._replay(JOURNAL_FILE_NAME, self._journal_end)
+            self._journal_end = end
+            self._journal_records += applied
+
+    def _read(self, entry: IndexEntry) -> Dict[str, Any]:
+        file_name, offset, length = entry
+        with open(self._path(file_name), 'rb') as f:
+            f.seek(offset)
+            return loads_json(f.read(length))['data']
+
+    # Writes
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the journal and index them"""
+        lines = [dumps_json(record) + b'\n' for record in records]
+        with open(self.journal_path, 'ab') as f:
+            start = f.tell()
+            header = _FORMAT_LINE if start == 0 else b''
+            f.write(header + b''.join(lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        offset = start + len(header)
+
+        if start > self._journal_end:
+            # Another process appended since the last refresh
+            _, applied = self._replay(JOURNAL_FILE_NAME, self._journal_end)
+            self._journal_records += applied
+        for record, line in zip(records, lines):
+            self._apply(record, (JOURNAL_FILE_NAME, offset, len(line)))
+            offset += len(line)
+        self._journal_end = offset
+        self._journal_records += len(records)
+        self._maybe_compact()
+
+    def save_evaluation(self, evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                        expected_version: Optional[int] = None) -> int:
+        """Insert or update a single evaluation; returns its new version
+
+        Raises:
+            VersionConflictError: expected_version is set and the stored version differs
+        """
+        if not evaluation.get('id'):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._lock:
+            self._refresh()
+            self._save_records([evaluation], preserve_ai_original, expected_version)
+            return evaluation['version']
+
+    def save_evaluations(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+        """Insert or update a batch of evaluations with a single append; returns the number saved"""
+        if any(not evaluation.get('id') for evaluation in evaluations):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._lock:
+            self._refresh()
+            self._save_records(evaluations, preserve_ai_original)
+            return len(evaluations)
+
+    def _save_records(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool,
+                      expected_version: Optional[int] = None) -> None:
+        """Bump versions and append upserts; the lock must be held"""
+        records = []
+        latest = {}
+        for evaluation in evaluations:
+            evaluation_id = evaluation['id']
+            if evaluation_id in latest:
+                current_version = stored_version(latest[evaluation_id])
+            else:
+                current_version = stored_version(self._summaries.get(evaluation_id))
+            evaluation['version'] = next_version(evaluation_id, current_version, expected_version)
+
+            if preserve_ai_original:
+                existing = latest.get(evaluation_id)
+                if existing is None and evaluation_id in self._index:
+                    existing = self._read(self._index[evaluation_id])
+                if existing and existing.get('ai_original'):
+                    evaluation['ai_original'] = existing['ai_original']
+                    evaluation['ai_original_saved_at'] = existing.get('ai_original_saved_at')
+                    evaluation['has_ai_original'] = True
+            latest[evaluation_id] = evaluation
+            records.append({'op': UPSERT, 'id': evaluation_id, 'data': evaluation})
+        if records:
+            self._append(records)
+
+    def delete_evaluation(self, evaluation_id: str) -> bool:
+        """Delete an evaluation by ID; returns True if it existed"""
+        with self._lock:
+            self._refresh()
+            if evaluation_id not in self._index:
+                return False
+            self._append([{'op': DELETE, 'id': evaluation_id}])
+            return True
+
+    def delete_evaluations(self, evaluation_ids: Iterable[str]) -> int:
+        """Delete a batch of evaluations with a single append; returns the number deleted"""
+        with self._lock:
+            self._refresh()
+            records = [{'op': DELETE, 'id': evaluation_id}
+                       for evaluation_id in dict.fromkeys(evaluation_ids) if evaluation_id in self._index]
+            if records:
+                self._append(records)
+            return len(records)
+
+    def import_evaluations(self, evaluations: List[Dict[str, Any]]) -> int:
+        """Append evaluations whose IDs are not stored yet; returns the number imported
+
+        Evaluations without an ID are skipped.
+        """
+        with self._lock:
+            self._refresh()
+            records = []
+            seen = set(self._index)
+            for evaluation in evaluations:
+                evaluation_id = evaluation.get('id')
+                if evaluation_id and evaluation_id not in seen:
+                    seen.add(evaluation_id)
+                    records.append({'op': UPSERT, 'id': evaluation_id, 'data': evaluation})
+            if records:
+                self._append(records)
+            return len(records)
+
+    def set_ai_original(self, evaluation_id: str, ai_original: Dict[str, Any], saved_at: str,
+                        ai_diff: Optional[Dict[str, Any]] = None) -> bool:
+        """Attach AI original data (and its diff, see utils.ai_diff) to a stored evaluation
+
+        Returns False if the evaluation does not exist.
+        """
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(evaluation_id)
+            if entry is None:
+                return False
+            evaluation = self._read(entry)
+            evaluation['ai_original'] = ai_original
+            evaluation['has_ai_original'] = True
+            evaluation['ai_original_saved_at'] = saved_at
+            if ai_diff is not None:
+                evaluation['ai_diff'] = ai_diff
+            evaluation['version'] = stored_version(evaluation) + 1
+            self._append([{'op': UPSERT, 'id': evaluation_id, 'data': evaluation}])
+            return True
+
+    def clear(self) -> None:
+        """Delete all evaluations"""
+        with self._lock:
+            for path in (self.snapshot_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._rebuild_index()
+
+    # Reads
+
+    def load_evaluations(self) -> List[Dict[str, Any]]:
+        """Load all evaluations in insertion order"""
+        with self._lock:
+            self._refresh()
+            entries = list(self._index.values())
+            files = {}
+            try:
+                evaluations = []
+                for file_name, offset, length in entries:
+                    if file_name not in files:
+                        files[file_name] = open(self._path(file_name), 'rb')
+                    f = files[file_name]
+                    f.seek(offset)
+                    evaluations.append(loads_json(f.read(length))['data'])
+                return evaluations
+            finally:
+                for f in files.values():
+                    f.close()
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluation summaries from the in-memory summary index"""
+        return iter(self.load_summaries())
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Load all evaluation summaries in insertion order"""
+        with self._lock:
+            self._refresh()
+            return list(self._summaries.values())
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluations in insertion order, reading one record at a time
+
+        The files are opened up front, so a compaction during iteration
+        (which swaps in new files) does not disturb the offsets being read.
+        """
+        with self._lock:
+            self._refresh()
+            entries = list(self._index.values())
+            files = {}
+            for file_name in {entry[0] for entry in entries}:
+                files[file_name] = open(self._path(file_name), 'rb')
+        try:
+            for file_name, offset, length in entries:
+                f = files[file_name]
+                f.seek(offset)
+                yield loads_json(f.read(length))['data']
+        finally:
+            for f in files.values():
+                f.close()
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single evaluation by ID"""
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(evaluation_id)
+            return self._read(entry) if entry is not None else None
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def version(self) -> Tuple[Any, int]:
+        """Marker that changes with every write or compaction (used for cache invalidation)"""
+        with self._lock:
+            self._refresh()
+            return (self._snapshot_stat, self._journal_end)
+
+    # Compaction
+
+    def _maybe_compact(self) -> None:
+        if self._journal_records >= self.compact_threshold and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact_in_background, name="journal-compaction", daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"ERROR: Journal compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot
+
+        The snapshot is written and fsynced without holding the lock; writes
+        appended meanwhile are carried over into the fresh journal before the
+        files are swapped. Replaying a journal over a snapshot that already
+        contains its records is harmless, so a crash at any point is safe.
+        """
+        with self._lock:
+            self._refresh()
+            entries = list(self._index.values())
+            journal_start = self._journal_end
+            snapshot_stat = self._snapshot_stat
+
+        tmp_snapshot = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        files = {}
+        try:
+            with open(tmp_snapshot, 'wb') as out:
+                out.write(_FORMAT_LINE)
+                for file_name, offset, length in entries:
+                    if file_name not in files:
+                        files[file_name] = open(self._path(file_name), 'rb')
+                    f = files[file_name]
+                    f.seek(offset)
+                    out.write(f.read(length))
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for f in files.values():
+                f.close()
+
+        with self._lock:
+            self._refresh()
+            if self._snapshot_stat != snapshot_stat:
+                # Another process compacted meanwhile; journal_start no longer applies
+                os.remove(tmp_snapshot)
+                return
+            tail = b''
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(journal_start)
+                    tail = f.read()
+
+            os.replace(tmp_snapshot, self.snapshot_path)
+            tmp_journal = f"{self.journal_path}.{os.getpid()}.tmp"
+            with open(tmp_journal, 'wb') as f:
+                if tail and not tail.startswith(_FORMAT_LINE):
+                    f.write(_FORMAT_LINE)
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_journal, self.journal_path)
+            _fsync_dir(self.storage_dir)
+            self._rebuild_index()
@@ -0,0 +1,270 @@
+"""
+JSON file storage backend for evaluations
+The default (STORAGE_BACKEND=json); utils/storage.py delegates to it
+
+All evaluations live in one document (see utils.serialization) that every
+write rewrites atomically, with a summary index for list views kept next to
+it. Suited to small deployments; reads parse the whole file, so
+utils.storage serves them from its process cache.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.concurrency import file_lock, next_version, stored_version
+from utils.serialization import JSON, encode_document, read_document, resolve_encoding, write_document
+from utils.summaries import SUMMARY_FORMAT, summarize_evaluation
+
+SUMMARIES_FILE_NAME = "evaluation_summaries.json"
+
+
+class JSONFileStorage:
+    """Evaluation store kept in a single JSON (or MessagePack) document
+
+    Every read-modify-write holds a lock file beside the document, so
+    several processes can share it. Evaluations keep their insertion order.
+    """
+
+    # Reads parse the whole file; utils.storage answers single lookups from its cache instead
+    loads_whole_store = True
+
+    def __init__(self, evaluations_path: str, summaries_path: Optional[str] = None,
+                 encoding: Optional[str] = None):
+        """
+        Args:
+            evaluations_path: Evaluations document
+            summaries_path: Summary index; evaluation_summaries.json beside the document when None
+            encoding: 'json' or 'msgpack' for written files (read in either)
+        """
+        self.evaluations_path = evaluations_path
+        self.summaries_path = summaries_path or os.path.join(os.path.dirname(evaluations_path), SUMMARIES_FILE_NAME)
+        self.encoding = resolve_encoding(encoding or JSON)
+        self._lock = file_lock(f"{evaluations_path}.lock")
+        self._write_count = 0
+
+    # File access
+
+    def _read(self) -> List[Dict[str, Any]]:
+        """Parse the evaluations file into mutable dicts"""
+        if not os.path.exists(self.evaluations_path):
+            return []
+
+        try:
+            return read_document(self.evaluations_path)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return []
+
+    def _write(self, evaluations: List[Dict[str, Any]]) -> None:
+        """Rewrite the evaluations file and its summary index
+
+        The file is replaced atomically, so readers without the lock never
+        see a partial write.
+        """
+        storage_dir = os.path.dirname(self.evaluations_path)
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        write_document(self.evaluations_path, evaluations, self.encoding)
+        self._write_count += 1
+        self._write_summary_index([summarize_evaluation(e) for e in evaluations])
+
+    def _file_state(self) -> Optional[List[int]]:
+        try:
+            st = os.stat(self.evaluations_path)
+        except FileNotFoundError:
+            return None
+        return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+    def _write_summary_index(self, summaries: List[Dict[str, Any]]) -> None:
+        """Write the summary index, tagged with the evaluations file it was built from"""
+        tmp_path = f"{self.summaries_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_document({'source': self._file_state(), 'format': SUMMARY_FORMAT, 'summaries': summaries},
+                                    self.encoding))
+        os.replace(tmp_path, self.summaries_path)
+
+    # Writes
+
+    def save_evaluation(self, evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                        expected_version: Optional[int] = None) -> int:
+        """Insert or update a single evaluation; returns its new version
+
+        Raises:
+            VersionConflictError: expected_version is set and the stored version differs
+        """
+        if not evaluation.get('id'):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._lock:
+            evaluations = self._read()
+
+            # Update existing or add new
+            existing_index = None
+            existing_eval = None
+            for i, existing in enumerate(evaluations):
+                if existing.get('id') == evaluation.get('id'):
+                    existing_index = i
+                    existing_eval = existing
+                    break
+
+            evaluation['version'] = next_version(evaluation.get('id'), stored_version(existing_eval), expected_version)
+
+            if existing_index is not None:
+                # Preserve ai_original if it exists and preserve_ai_original is True
+                if preserve_ai_original and existing_eval.get('ai_original'):
+                    evaluation['ai_original'] = existing_eval['ai_original']
+                    evaluation['ai_original_saved_at'] = existing_eval.get('ai_original_saved_at')
+                    evaluation['has_ai_original'] = True
+
+                evaluations[existing_index] = evaluation
+            else:
+                evaluations.append(evaluation)
+
+            self._write(evaluations)
+            return evaluation['version']
+
+    def save_evaluations(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+        """Insert or update a batch of evaluations with one file rewrite; returns the number saved"""
+        if any(not evaluation.get('id') for evaluation in evaluations):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._lock:
+            stored = self._read()
+            positions = {}
+            for i, existing in enumerate(stored):
+                positions.setdefault(existing.get('id'), i)
+
+            for evaluation in evaluations:
+                existing_index = positions.get(evaluation.get('id'))
+                if existing_index is None:
+                    evaluation['version'] = 1
+                    positions[evaluation.get('id')] = len(stored)
+                    stored.append(evaluation)
+                    continue
+
+                existing_eval = stored[existing_index]
+                evaluation['version'] = stored_version(existing_eval) + 1
+                if preserve_ai_original and existing_eval.get('ai_original'):
+                    evaluation['ai_original'] = existing_eval['ai_original']
+                    evaluation['ai_original_saved_at'] = existing_eval.get('ai_original_saved_at')
+                    evaluation['has_ai_original'] = True
+                stored[existing_index] = evaluation
+
+            self._write(stored)
+            return len(evaluations)
+
+    def delete_evaluation(self, evaluation_id: str) -> bool:
+        """Delete an evaluation by ID; returns True if it existed"""
+        return self.delete_evaluations([evaluation_id]) > 0
+
+    def delete_evaluations(self, evaluation_ids: Iterable[str]) -> int:
+        """Delete a batch of evaluations with one file rewrite; returns the number deleted"""
+        ids = set(evaluation_ids)
+        with self._lock:
+            evaluations = self._read()
+            remaining = [e for e in evaluations if e.get('id') not in ids]
+            deleted_count = len(evaluations) - len(remaining)
+            if deleted_count:
+                self._write(remaining)
+            return deleted_count
+
+    def import_evaluations(self, evaluations: List[Dict[str, Any]]) -> int:
+        """Append evaluations whose IDs are not stored yet; returns the number imported
+
+        Evaluations without an ID are skipped.
+        """
+        with self._lock:
+            current_evaluations = self._read()
+
+            # Merge evaluations, avoiding duplicates
+            existing_ids = {e.get('id') for e in current_evaluations}
+            new_evaluations = []
+            for evaluation in evaluations:
+                if evaluation.get('id') and evaluation['id'] not in existing_ids:
+                    existing_ids.add(evaluation['id'])
+                    new_evaluations.append(evaluation)
+
+            if new_evaluations:
+                self._write(current_evaluations + new_evaluations)
+            return len(new_evaluations)
+
+    def set_ai_original(self, evaluation_id: str, ai_original: Dict[str, Any], saved_at: str,
+                        ai_diff: Optional[Dict[str, Any]] = None) -> bool:
+        """Attach AI original data (and its diff, see utils.ai_diff) to a stored evaluation
+
+        Returns False if the evaluation does not exist.
+        """
+        with self._lock:
+            evaluations = self._read()
+
+            for evaluation in evaluations:
+                if evaluation.get('id') == evaluation_id:
+                    evaluation['ai_original'] = ai_original
+                    evaluation['has_ai_original'] = True
+                    evaluation['ai_original_saved_at'] = saved_at
+                    if ai_diff is not None:
+                        evaluation['ai_diff'] = ai_diff
+                    evaluation['version'] = stored_version(evaluation) + 1
+                    self._write(evaluations)
+                    return True
+
+            return False
+
+    def clear(self) -> None:
+        """Delete all evaluations"""
+        with self._lock:
+            for path in (self.evaluations_path, self.summaries_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._write_count += 1
+
+    # Reads
+
+    def load_evaluations(self) -> List[Dict[str, Any]]:
+        """Load all evaluations in insertion order"""
+        return self._read()
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluations in insertion order (after parsing the whole file)"""
+        return iter(self._read())
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Read evaluation summaries, rebuilding the index if the evaluations file (or the summary format) changed"""
+        source = self._file_state()
+        if source is None:
+            return []
+
+        try:
+            index = read_document(self.summaries_path)
+            if index.get('source') == source and index.get('format') == SUMMARY_FORMAT:
+                return index['summaries']
+        except (ValueError, FileNotFoundError, KeyError, AttributeError):
+            pass
+
+        summaries = [summarize_evaluation(e) for e in self._read()]
+        try:
+            self._write_summary_index(summaries)
+        except OSError as e:
+            print(f"WARNING: Could not write summary index: {e}")
+        return summaries
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluation summaries from the summary index"""
+        return iter(self.load_summaries())
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single evaluation by ID"""
+        for evaluation in self._read():
+            if evaluation.get('id') == evaluation_id:
+                return evaluation
+        return None
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        return len(self.load_summaries())
+
+    def version(self) -> Tuple[Optional[Tuple[int, int, int]], int]:
+        """Marker that changes whenever the file is rewritten (used for cache invalidation)"""
+        state = self._file_state()
+        return (tuple(state) if state is not None else None, self._write_count)
@@ -0,0 +1,231 @@
+"""
+Memory-mapped, read-only view of a journal evaluation store
+For read-mostly processes such as analytics workers: the snapshot and journal
+files of a JournalStorage directory are memory-mapped rather than parsed, so
+several processes share the operating system's page cache for them. An offset
+index is built from the start of each record line, and an evaluation is only
+decoded when it is read.
+"""
+
+import mmap
+import os
+import re
+import threading
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.concurrency import file_lock
+from utils.evaluation_cache import ReadOnlyDict, freeze
+from utils.journal_storage import DELETE, FORMAT, JOURNAL_FILE_NAME, LOCK_FILE_NAME, SNAPSHOT_FILE_NAME
+from utils.serialization import FORMAT_VERSION, loads_json
+from utils.summaries import summarize_evaluation
+
+# Start of a journal record: op and (except for format records) id come before the evaluation
+_RECORD_PREFIX = re.compile(rb'\{"op":\s*"(\w+)"(?:,\s*"id":\s*"((?:[^"\\]|\\.)*)")?')
+
+# Index entry: (mapped file, start offset, end offset) of an evaluation's latest record line
+MappedEntry = Tuple['_MappedFile', int, int]
+
+
+class _MappedFile:
+    """A read-only memory map of one file (None for a missing or empty file)
+
+    Index entries hold the map they point into, so an entry stays readable
+    after a compaction replaces the file; the map is released with the last
+    entry referring to it.
+    """
+
+    def __init__(self, path: str):
+        self.stat = None
+        self.map = None
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                self.stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+                if st.st_size:
+                    self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.map) if self.map is not None else 0
+
+
+def _decode(entry: MappedEntry) -> ReadOnlyDict:
+    mapped, start, end = entry
+    return freeze(loads_json(mapped.map[start:end])['data'])
+
+
+class MappedEvaluations(Sequence):
+    """Evaluations of a MappedJournalStore, decoded one at a time when accessed
+
+    Behaves like the list returned by load_evaluations() (read-only views in
+    insertion order) without decoding records that are never touched.
+    """
+
+    def __init__(self, entries: List[MappedEntry]):
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_decode(entry) for entry in self._entries[index]]
+        return _decode(self._entries[index])
+
+    def __iter__(self) -> Iterator[ReadOnlyDict]:
+        for entry in self._entries:
+            yield _decode(entry)
+
+
+class MappedJournalStore:
+    """Read-only evaluation store over the memory-mapped files of a journal directory
+
+    Offers the read methods of JournalStorage; the write methods raise
+    PermissionError. Appends and compactions by writer processes are picked
+    up on the next call: a grown journal is indexed from where the last scan
+    stopped, and replaced files are mapped again.
+    """
+
+    read_only = True
+
+    def __init__(self, storage_dir: str):
+        self.storage_dir = storage_dir
+        self._file_lock = file_lock(os.path.join(storage_dir, LOCK_FILE_NAME))
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_MappedFile] = None
+        self._journal: Optional[_MappedFile] = None
+        self._index: Dict[str, MappedEntry] = {}
+        self._summaries: Dict[str, Tuple[MappedEntry, Dict[str, Any]]] = {}
+        self._journal_end = 0
+
+    # Index maintenance
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.storage_dir, file_name)
+
+    def _stat(self, file_name: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._path(file_name))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _scan(self, mapped: _MappedFile, start: int) -> int:
+        """Index the complete record lines of a mapped file from a byte offset; returns the end offset"""
+        offset = start
+        while offset < len(mapped):
+            end = mapped.map.find(b'\n', offset)
+            if end == -1:
+                break  # Torn write or a writer still appending
+            end += 1
+            self._index_line(mapped, offset, end)
+            offset = end
+        return offset
+
+    def _index_line(self, mapped: _MappedFile, start: int, end: int) -> None:
+        match = _RECORD_PREFIX.match(mapped.map, start, end)
+        if match is not None and match.group(1) != FORMAT.encode() and match.group(2) is not None:
+            op = match.group(1).decode('ascii')
+            raw_id = match.group(2)
+            evaluation_id = loads_json(b'"' + raw_id + b'"') if b'\\' in raw_id else raw_id.decode('utf-8')
+        else:
+            # Format records, and records written with another key order, are decoded in full
+            record = loads_json(mapped.map[start:end])
+            op, evaluation_id = record.get('op'), record.get('id')
+            if op == FORMAT:
+                if record.get('format_version', 0) > FORMAT_VERSION:
+                    raise ValueError(f"Journal was written in format {record['format_version']}; "
+                                     f"this version reads up to {FORMAT_VERSION}")
+                return
+
+        if op == DELETE:
+            self._index.pop(evaluation_id, None)
+        else:
+            self._index[evaluation_id] = (mapped, start, end)
+
+    def _remap(self) -> None:
+        self._index = {}
+        with self._file_lock:
+            # Map both files at a moment when no compaction is swapping them
+            self._snapshot = _MappedFile(self._path(SNAPSHOT_FILE_NAME))
+            self._journal = _MappedFile(self._path(JOURNAL_FILE_NAME))
+        self._scan(self._snapshot, 0)
+        self._journal_end = self._scan(self._journal, 0)
+
+    def _refresh(self) -> None:
+        """Map the files again if a writer replaced them, or index what was appended"""
+        if self._snapshot is None or self._stat(SNAPSHOT_FILE_NAME) != self._snapshot.stat:
+            self._remap()
+            return
+        journal_stat = self._stat(JOURNAL_FILE_NAME)
+        if journal_stat == self._journal.stat:
+            return
+        if journal_stat is None or self._journal.stat is None or journal_stat[0] != self._journal.stat[0] \
+                or journal_stat[1] < self._journal_end:
+            self._remap()
+            return
+
+        journal = _MappedFile(self._path(JOURNAL_FILE_NAME))
+        if journal.stat is None or journal.stat[0] != self._journal.stat[0]:
+            self._remap()  # Compacted between the stat and the new map
+            return
+        self._journal = journal
+        self._journal_end = self._scan(journal, self._journal_end)
+
+    # Reads
+
+    def load_evaluations(self) -> MappedEvaluations:
+        """All evaluations in insertion order, decoded lazily as they are accessed"""
+        with self._lock:
+            self._refresh()
+            return MappedEvaluations(list(self._index.values()))
+
+    def iter_evaluations(self) -> Iterator[ReadOnlyDict]:
+        """Yield evaluations in insertion order"""
+        return iter(self.load_evaluations())
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[ReadOnlyDict]:
+        """Decode a single evaluation"""
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(evaluation_id)
+        return _decode(entry) if entry is not None else None
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Evaluation summaries; a record is decoded for its summary once, and again only after it changes"""
+        with self._lock:
+            self._refresh()
+            summaries = {}
+            for evaluation_id, entry in self._index.items():
+                cached = self._summaries.get(evaluation_id)
+                if cached is None or cached[0] != entry:
+                    cached = (entry, summarize_evaluation(_decode(entry)))
+                summaries[evaluation_id] = cached
+            self._summaries = summaries
+            return [summary for _, summary in summaries.values()]
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluation summaries"""
+        return iter(self.load_summaries())
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def version(self) -> Tuple[Any, Any, int]:
+        """Marker that changes with every write or compaction (used for cache invalidation)"""
+        with self._lock:
+            self._refresh()
+            return (self._snapshot.stat, self._journal.stat and self._journal.stat[0], self._journal_end)
+
+    # Writes
+
+    def _read_only(self, *args, **kwargs):
+        raise PermissionError(f"The evaluation store in {self.storage_dir} is opened read-only (STORAGE_READ_ONLY)")
+
+    save_evaluation = save_evaluations = delete_evaluation = delete_evaluations = _read_only
+    import_evaluations = set_ai_original = clear = _read_only
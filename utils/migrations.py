@@ -0,0 +1,165 @@
+"""
+Versioned schema migrations for stored evaluations
+Fields were added to the evaluation record over time; each migration below
+upgrades a record by one schema version, and a record stores the version it
+is at in 'schema_version' (missing means 0). utils/storage.py upgrades
+every evaluation it writes, and its migrate_schema() upgrades the records
+already stored, so readers can rely on the fields listed here being present.
+
+Add a migration by appending a function decorated with @migration(n, ...)
+where n is one more than SCHEMA_VERSION; never change a released one.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.serialization import dumps_json, loads_json
+
+SCHEMA_VERSION_FIELD = 'schema_version'
+
+# (version, description, upgrade function) in version order
+_MIGRATIONS: List[Tuple[int, str, Callable[[Dict[str, Any]], None]]] = []
+
+
+def migration(version: int, description: str):
+    """Register a function upgrading a record (in place) from version - 1 to version"""
+    def register(upgrade: Callable[[Dict[str, Any]], None]):
+        expected = len(_MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"Migration {version} registered out of order; expected {expected}")
+        _MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return register
+
+
+def _semester_of(created_at: Any) -> Optional[str]:
+    """Semester an evaluation created at this ISO time falls in, e.g. 'Fall 2024'"""
+    try:
+        created = datetime.fromisoformat(str(created_at))
+    except ValueError:
+        return None
+    season = 'Spring' if created.month <= 5 else 'Summer' if created.month <= 7 else 'Fall'
+    return f"{season} {created.year}"
+
+
+@migration(1, "Add department and semester (semester derived from created_at)")
+def _add_department_and_semester(evaluation: Dict[str, Any]) -> None:
+    evaluation.setdefault('department', None)
+    if not evaluation.get('semester'):
+        evaluation['semester'] = _semester_of(evaluation['created_at']) if evaluation.get('created_at') else None
+
+
+@migration(2, "Add lesson_plan and lesson_plan_provided")
+def _add_lesson_plan(evaluation: Dict[str, Any]) -> None:
+    evaluation.setdefault('lesson_plan', None)
+    if 'lesson_plan_provided' not in evaluation:
+        evaluation['lesson_plan_provided'] = bool(evaluation['lesson_plan'])
+
+
+@migration(3, "Add ai_original and make has_ai_original agree with it")
+def _add_ai_original(evaluation: Dict[str, Any]) -> None:
+    evaluation.setdefault('ai_original', None)
+    evaluation.setdefault('ai_original_saved_at', None)
+    evaluation['has_ai_original'] = bool(evaluation['ai_original'])
+
+
+@migration(4, "Default missing score, justification and analysis maps to empty")
+def _default_item_maps(evaluation: Dict[str, Any]) -> None:
+    for field in ('scores', 'justifications', 'disposition_scores', 'disposition_comments', 'ai_analyses'):
+        if evaluation.get(field) is None:
+            evaluation[field] = {}
+
+
+# Schema version of records written by this code
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+def schema_version(evaluation: Dict[str, Any]) -> int:
+    """Schema version a record is at (0 if it predates versioning)"""
+    return int(evaluation.get(SCHEMA_VERSION_FIELD) or 0)
+
+
+def upgrade_evaluation(evaluation: Dict[str, Any],
+                       changes: Optional[Dict[int, Dict[str, int]]] = None) -> Dict[str, Any]:
+    """A record upgraded to SCHEMA_VERSION
+
+    Returns the record itself if it is current (or from a newer schema),
+    otherwise an upgraded shallow copy.
+
+    Args:
+        changes: If given, counts fields each migration changed: {version: {field: n}}
+    """
+    current = schema_version(evaluation)
+    if current >= SCHEMA_VERSION:
+        return evaluation
+
+    upgraded = dict(evaluation)
+    for version, _, upgrade in _MIGRATIONS[current:]:
+        before = dict(upgraded) if changes is not None else None
+        upgrade(upgraded)
+        if changes is not None:
+            counts = changes.setdefault(version, {})
+            for field in set(before) | set(upgraded):
+                if field not in before or field not in upgraded or before[field] != upgraded[field]:
+                    counts[field] = counts.get(field, 0) + 1
+    upgraded[SCHEMA_VERSION_FIELD] = SCHEMA_VERSION
+    return upgraded
+
+
+def migrations() -> List[Dict[str, Any]]:
+    """Registered migrations: [{'version', 'description'}, ...]"""
+    return [{'version': version, 'description': description} for version, description, _ in _MIGRATIONS]
+
+
+class MigrationCheckpoint:
+    """Progress of a migration run, so an interrupted run can resume
+
+    An append-only file: a header line with the IDs to upgrade, then one
+    line per saved batch with the position reached. A torn last line (a
+    crash while appending) is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """{'schema_version', 'pending', 'scanned', 'newer', 'position'} of an unfinished run, or None"""
+        if not os.path.exists(self.path):
+            return None
+        state = None
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = loads_json(line)
+                except ValueError:
+                    break
+                if state is None:
+                    state = dict(record, position=0)
+                else:
+                    state['position'] = record['position']
+        return state
+
+    def start(self, pending: List[str], scanned: int, newer: int) -> None:
+        """Begin a run over the given IDs"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_json({'schema_version': SCHEMA_VERSION, 'pending': pending,
+                                'scanned': scanned, 'newer': newer}) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def advance(self, position: int) -> None:
+        """Record that the IDs before position are upgraded"""
+        with open(self.path, 'ab') as f:
+            f.write(dumps_json({'position': position}) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        """Forget the run (it finished)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
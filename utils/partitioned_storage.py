@@ -0,0 +1,463 @@
+"""
+Partitioned storage backend for evaluations
+Enabled with STORAGE_BACKEND=partitioned; utils/storage.py delegates to it
+
+Evaluations are split by department and evaluator into partitions, each an
+ordinary backend (a JSON file by default) in its own directory, so reading
+one supervisor's evaluations parses only their caseload. A SQLite index
+beside the partitions maps every evaluation ID to its partition and keeps
+per-partition dashboard totals (utils.summaries.aggregate_summaries), so
+college-wide counts never open a partition, and queries filtered by
+department or evaluator only read the partitions that can match.
+
+Layout:
+
+    <storage_dir>/index.db
+    <storage_dir>/<department>/<evaluator>/   one backend per partition
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.concurrency import file_lock, next_version, stored_version
+from utils.query import apply_query, matches
+from utils.serialization import dumps_json, loads_json
+from utils.storage_backend import StorageBackend, open_backend
+from utils.summaries import aggregate_summaries, merge_aggregates
+
+INDEX_FILE_NAME = "index.db"
+LOCK_FILE_NAME = ".lock"
+
+# Directory name of a missing department or evaluator
+UNASSIGNED = '_unassigned'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    path TEXT PRIMARY KEY,
+    department TEXT NOT NULL,
+    evaluator TEXT NOT NULL,
+    aggregate TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evaluation_partitions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluation_partitions_path ON evaluation_partitions(path);
+CREATE TABLE IF NOT EXISTS partition_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO partition_meta (key, value) VALUES ('generation', 0);
+"""
+
+# Partition key: (department, evaluator name); '' when missing
+PartitionKey = Tuple[str, str]
+
+
+def partition_key(evaluation: Dict[str, Any]) -> PartitionKey:
+    """The partition an evaluation belongs to"""
+    return (str(evaluation.get('department') or ''), str(evaluation.get('evaluator_name') or ''))
+
+
+def _slug(value: str) -> str:
+    """Directory name for a department or evaluator; the hash keeps names that differ only in case apart"""
+    if not value:
+        return UNASSIGNED
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', value).strip('-').lower()[:40]
+    return f"{slug or 'x'}-{hashlib.sha1(value.encode('utf-8')).hexdigest()[:8]}"
+
+
+def partition_path(key: PartitionKey) -> str:
+    """Partition directory relative to the storage directory (always '/'-separated)"""
+    return f"{_slug(key[0])}/{_slug(key[1])}"
+
+
+class PartitionedStorage:
+    """Evaluation store split into one backend per department and evaluator
+
+    Saving an evaluation whose department or evaluator changed moves it to
+    its new partition, keeping its version, AI original and insertion
+    position. Every operation holds a lock file in the storage directory, so
+    several processes can share it. A lost or stale index is rebuilt from
+    the partitions with rebuild_index().
+    """
+
+    def __init__(self, storage_dir: str, partition_backend: str = 'json'):
+        """
+        Args:
+            storage_dir: Directory holding the index and the partition directories
+            partition_backend: Backend of each partition: 'json', 'jsonl' or 'sqlite'
+        """
+        if partition_backend == 'partitioned':
+            raise ValueError("Partitions cannot themselves be partitioned")
+        self.storage_dir = storage_dir
+        self.partition_backend = partition_backend
+        self.index_path = os.path.join(storage_dir, INDEX_FILE_NAME)
+        os.makedirs(storage_dir, exist_ok=True)
+        self._lock = file_lock(os.path.join(storage_dir, LOCK_FILE_NAME))
+        self._partitions: Dict[str, StorageBackend] = {}
+
+        with self._lock:
+            is_new = not os.path.exists(self.index_path)
+            with self._connection() as conn:
+                conn.executescript(_SCHEMA)
+            if is_new and self._partition_dirs():
+                self.rebuild_index()
+
+    # Index and partitions
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Index transaction under the storage lock; partition writes happen inside it"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.execute("UPDATE partition_meta SET value = value + 1 WHERE key = 'generation'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def _partition(self, path: str) -> StorageBackend:
+        if path not in self._partitions:
+            self._partitions[path] = open_backend(self.partition_backend,
+                                                  os.path.join(self.storage_dir, *path.split('/')))
+        return self._partitions[path]
+
+    def _partition_dirs(self) -> List[str]:
+        """Relative paths of the partition directories on disk"""
+        paths = []
+        for department in sorted(os.listdir(self.storage_dir)):
+            department_dir = os.path.join(self.storage_dir, department)
+            if os.path.isdir(department_dir):
+                paths.extend(f"{department}/{evaluator}" for evaluator in sorted(os.listdir(department_dir))
+                             if os.path.isdir(os.path.join(department_dir, evaluator)))
+        return paths
+
+    def _refresh_aggregate(self, conn: sqlite3.Connection, path: str, key: Optional[PartitionKey] = None) -> None:
+        """Recompute a partition's dashboard totals from its own summaries"""
+        ids = {row['id'] for row in conn.execute("SELECT id FROM evaluation_partitions WHERE path = ?", (path,))}
+        if not ids:
+            conn.execute("DELETE FROM partitions WHERE path = ?", (path,))
+            return
+        if key is None:
+            row = conn.execute("SELECT department, evaluator FROM partitions WHERE path = ?", (path,)).fetchone()
+            key = (row['department'], row['evaluator'])
+        aggregate = aggregate_summaries(s for s in self._partition(path).iter_summaries() if s.get('id') in ids)
+        conn.execute(
+            "INSERT INTO partitions (path, department, evaluator, aggregate) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET aggregate = excluded.aggregate",
+            (path, key[0], key[1], dumps_json(aggregate).decode('utf-8'))
+        )
+
+    def _locations(self, conn: sqlite3.Connection, evaluation_ids: Iterable[str]) -> Dict[str, str]:
+        """Partition path of each stored ID among evaluation_ids"""
+        locations = {}
+        for evaluation_id in evaluation_ids:
+            row = conn.execute("SELECT path FROM evaluation_partitions WHERE id = ?", (evaluation_id,)).fetchone()
+            if row is not None:
+                locations[evaluation_id] = row['path']
+        return locations
+
+    def _move(self, conn: sqlite3.Connection, evaluation: Dict[str, Any], old_path: str, path: str,
+              preserve_ai_original: bool, expected_version: Optional[int] = None) -> int:
+        """Save an evaluation into a new partition and remove it from its old one; returns its new version"""
+        evaluation_id = evaluation['id']
+        old = self._partition(old_path)
+        existing = old.get_evaluation_by_id(evaluation_id)
+        evaluation['version'] = next_version(evaluation_id, stored_version(existing), expected_version)
+        if preserve_ai_original and existing and existing.get('ai_original'):
+            evaluation['ai_original'] = existing['ai_original']
+            evaluation['ai_original_saved_at'] = existing.get('ai_original_saved_at')
+            evaluation['has_ai_original'] = True
+
+        new = self._partition(path)
+        new.delete_evaluation(evaluation_id)  # Left behind by an interrupted move
+        new.import_evaluations([evaluation])
+        old.delete_evaluation(evaluation_id)
+        conn.execute("UPDATE evaluation_partitions SET path = ? WHERE id = ?", (path, evaluation_id))
+        return evaluation['version']
+
+    def rebuild_index(self) -> int:
+        """Rebuild the index from the partition directories; returns the number of evaluations indexed
+
+        An evaluation found in two partitions (a move interrupted by a crash)
+        is kept in the one holding the higher version.
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM evaluation_partitions")
+            conn.execute("DELETE FROM partitions")
+            self._partitions = {}
+            found: Dict[str, Tuple[int, str, PartitionKey]] = {}
+            for path in self._partition_dirs():
+                for summary in self._partition(path).iter_summaries():
+                    evaluation_id = summary.get('id')
+                    if evaluation_id and (evaluation_id not in found
+                                          or stored_version(summary) > found[evaluation_id][0]):
+                        found[evaluation_id] = (stored_version(summary), path, partition_key(summary))
+
+            conn.executemany("INSERT INTO evaluation_partitions (id, path) VALUES (?, ?)",
+                             [(evaluation_id, path) for evaluation_id, (_, path, _) in found.items()])
+            keys = {path: key for _, path, key in found.values()}
+            for path, key in keys.items():
+                self._refresh_aggregate(conn, path, key)
+            return len(found)
+
+    # Writes
+
+    def save_evaluation(self, evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                        expected_version: Optional[int] = None) -> int:
+        """Insert or update a single evaluation in its partition; returns its new version
+
+        Raises:
+            VersionConflictError: expected_version is set and the stored version differs
+        """
+        if not evaluation.get('id'):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        key = partition_key(evaluation)
+        path = partition_path(key)
+        with self._transaction() as conn:
+            old_path = self._locations(conn, [evaluation['id']]).get(evaluation['id'])
+            if old_path is not None and old_path != path:
+                version = self._move(conn, evaluation, old_path, path, preserve_ai_original, expected_version)
+                self._refresh_aggregate(conn, old_path)
+            else:
+                version = self._partition(path).save_evaluation(evaluation, preserve_ai_original, expected_version)
+                if old_path is None:
+                    conn.execute("INSERT INTO evaluation_partitions (id, path) VALUES (?, ?)", (evaluation['id'], path))
+            self._refresh_aggregate(conn, path, key)
+            return version
+
+    def save_evaluations(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+        """Insert or update a batch of evaluations with one write per partition; returns the number saved"""
+        if any(not evaluation.get('id') for evaluation in evaluations):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._transaction() as conn:
+            locations = self._locations(conn, {evaluation['id'] for evaluation in evaluations})
+            touched: Dict[str, Optional[PartitionKey]] = {}
+            pending: Dict[str, List[Dict[str, Any]]] = {}
+
+            def flush():
+                for pending_path, group in pending.items():
+                    self._partition(pending_path).save_evaluations(group, preserve_ai_original)
+                pending.clear()
+
+            for evaluation in evaluations:
+                key = partition_key(evaluation)
+                path = partition_path(key)
+                touched[path] = key
+                current = locations.get(evaluation['id'])
+                if current is not None and current != path:
+                    flush()  # The move has to see earlier entries of this batch
+                    self._move(conn, evaluation, current, path, preserve_ai_original)
+                    touched.setdefault(current, None)
+                else:
+                    pending.setdefault(path, []).append(evaluation)
+                    if current is None:
+                        conn.execute("INSERT INTO evaluation_partitions (id, path) VALUES (?, ?)",
+                                     (evaluation['id'], path))
+                locations[evaluation['id']] = path
+            flush()
+
+            for path, key in touched.items():
+                self._refresh_aggregate(conn, path, key)
+            return len(evaluations)
+
+    def delete_evaluation(self, evaluation_id: str) -> bool:
+        """Delete an evaluation by ID; returns True if it existed"""
+        return self.delete_evaluations([evaluation_id]) > 0
+
+    def delete_evaluations(self, evaluation_ids: Iterable[str]) -> int:
+        """Delete a batch of evaluations with one write per partition; returns the number deleted"""
+        with self._transaction() as conn:
+            by_path: Dict[str, List[str]] = {}
+            for evaluation_id, path in self._locations(conn, dict.fromkeys(evaluation_ids)).items():
+                by_path.setdefault(path, []).append(evaluation_id)
+
+            deleted_count = 0
+            for path, ids in by_path.items():
+                deleted_count += self._partition(path).delete_evaluations(ids)
+                conn.executemany("DELETE FROM evaluation_partitions WHERE id = ?", [(i,) for i in ids])
+                self._refresh_aggregate(conn, path)
+            return deleted_count
+
+    def import_evaluations(self, evaluations: List[Dict[str, Any]]) -> int:
+        """Store evaluations whose IDs are not stored yet, unchanged; returns the number imported
+
+        Evaluations without an ID are skipped.
+        """
+        with self._transaction() as conn:
+            stored = self._locations(conn, {e['id'] for e in evaluations if e.get('id')})
+            seen = set(stored)
+            groups: Dict[str, Tuple[PartitionKey, List[Dict[str, Any]]]] = {}
+            for evaluation in evaluations:
+                evaluation_id = evaluation.get('id')
+                if evaluation_id and evaluation_id not in seen:
+                    seen.add(evaluation_id)
+                    key = partition_key(evaluation)
+                    groups.setdefault(partition_path(key), (key, []))[1].append(evaluation)
+
+            imported_count = 0
+            for path, (key, group) in groups.items():
+                imported_count += self._partition(path).import_evaluations(group)
+                conn.executemany("INSERT OR IGNORE INTO evaluation_partitions (id, path) VALUES (?, ?)",
+                                 [(evaluation['id'], path) for evaluation in group])
+                self._refresh_aggregate(conn, path, key)
+            return imported_count
+
+    def set_ai_original(self, evaluation_id: str, ai_original: Dict[str, Any], saved_at: str,
+                        ai_diff: Optional[Dict[str, Any]] = None) -> bool:
+        """Attach AI original data (and its diff, see utils.ai_diff) to a stored evaluation
+
+        Returns False if the evaluation does not exist.
+        """
+        with self._transaction() as conn:
+            path = self._locations(conn, [evaluation_id]).get(evaluation_id)
+            if path is None:
+                return False
+            return self._partition(path).set_ai_original(evaluation_id, ai_original, saved_at, ai_diff)
+
+    def clear(self) -> None:
+        """Delete all evaluations and partitions"""
+        with self._transaction() as conn:
+            for path in self._partition_dirs():
+                shutil.rmtree(os.path.join(self.storage_dir, path.split('/')[0]), ignore_errors=True)
+            conn.execute("DELETE FROM evaluation_partitions")
+            conn.execute("DELETE FROM partitions")
+            self._partitions = {}
+
+    # Reads
+
+    def _snapshot(self, paths: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """{partition path: {ID: insertion sequence}} for the given partitions (all if None)
+
+        Partitions are ordered by their first insertion.
+        """
+        with self._lock, self._connection() as conn:
+            rows = conn.execute("SELECT id, path, seq FROM evaluation_partitions ORDER BY seq").fetchall()
+        wanted = set(paths) if paths is not None else None
+        by_path: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            if wanted is None or row['path'] in wanted:
+                by_path.setdefault(row['path'], {})[row['id']] = row['seq']
+        return by_path
+
+    def _read_partitions(self, read: str, paths: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Records from the partitions' load_evaluations or load_summaries, in insertion order
+
+        Records the index places elsewhere (left by an interrupted move) are skipped.
+        """
+        ordered = []
+        for path, ids in self._snapshot(paths).items():
+            ordered.extend((ids[record['id']], record) for record in getattr(self._partition(path), read)()
+                           if record.get('id') in ids)
+        ordered.sort(key=lambda item: item[0])
+        return [record for _, record in ordered]
+
+    def load_evaluations(self) -> List[Dict[str, Any]]:
+        """Load all evaluations in insertion order"""
+        return self._read_partitions('load_evaluations')
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluations one partition at a time (insertion order within each partition)"""
+        for path, ids in self._snapshot().items():
+            for evaluation in self._partition(path).iter_evaluations():
+                if evaluation.get('id') in ids:
+                    yield evaluation
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Load all evaluation summaries in insertion order"""
+        return self._read_partitions('load_summaries')
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluation summaries in insertion order"""
+        return iter(self.load_summaries())
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single evaluation by ID, reading only its partition"""
+        with self._lock, self._connection() as conn:
+            path = self._locations(conn, [evaluation_id]).get(evaluation_id)
+        return self._partition(path).get_evaluation_by_id(evaluation_id) if path is not None else None
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM evaluation_partitions").fetchone()[0]
+
+    def version(self) -> int:
+        """Change counter bumped by every write (used for cache invalidation)"""
+        with self._connection() as conn:
+            return conn.execute("SELECT value FROM partition_meta WHERE key = 'generation'").fetchone()[0]
+
+    # Partition pruning and aggregates
+
+    def partitions(self, department: Any = None, evaluator: Any = None) -> List[Dict[str, Any]]:
+        """Partitions matching a department / evaluator (single value or list; None means any)
+
+        Returns:
+            [{'path', 'department', 'evaluator', 'aggregate'}, ...]
+        """
+        departments = _accepted(department)
+        evaluators = _accepted(evaluator)
+        with self._connection() as conn:
+            rows = conn.execute("SELECT path, department, evaluator, aggregate FROM partitions ORDER BY path").fetchall()
+        return [
+            {'path': row['path'], 'department': row['department'], 'evaluator': row['evaluator'],
+             'aggregate': loads_json(row['aggregate'])}
+            for row in rows
+            if (departments is None or row['department'] in departments)
+            and (evaluators is None or row['evaluator'] in evaluators)
+        ]
+
+    def _pruned_paths(self, query: Dict[str, Any]) -> List[str]:
+        conditions = query['conditions']
+        return [partition['path'] for partition in self.partitions(conditions.get('department'),
+                                                                   conditions.get('evaluator_name'))]
+
+    def query_summaries(self, query: Dict[str, Any], limit: Optional[int] = None,
+                        cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Filter, sort and page summaries, reading only partitions the query can match"""
+        return apply_query(self._read_partitions('load_summaries', self._pruned_paths(query)), query,
+                           limit=limit, cursor=cursor)
+
+    def count_matching(self, query: Dict[str, Any]) -> int:
+        """Count evaluations matching a query, reading only partitions it can match"""
+        summaries = self._read_partitions('load_summaries', self._pruned_paths(query))
+        return sum(1 for summary in summaries if matches(summary, query))
+
+    def aggregate(self, department: Any = None, evaluator: Any = None) -> Dict[str, Any]:
+        """Dashboard totals (see utils.summaries.aggregate_summaries) from the index alone"""
+        return merge_aggregates(partition['aggregate'] for partition in self.partitions(department, evaluator))
+
+
+def _accepted(value: Any) -> Optional[set]:
+    """Accepted partition values of a filter; missing values match ''"""
+    if value is None:
+        return None
+    values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+    return {str(v) for v in values}
@@ -0,0 +1,126 @@
+"""
+Filtered, sorted and paginated evaluation queries
+Backends with their own index (SQLite) push queries down; the JSON and
+journal backends evaluate them over the summary index with apply_query()
+"""
+
+import base64
+import heapq
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# Query filter name -> evaluation field
+FILTER_FIELDS = {
+    'status': 'status',
+    'rubric_type': 'rubric_type',
+    'department': 'department',
+    'semester': 'semester',
+    'evaluator': 'evaluator_name',
+    'student': 'student_name',
+}
+
+SORT_FIELDS = ('created_at', 'student_name', 'evaluator_name', 'department', 'semester', 'status', 'rubric_type')
+
+DateBound = Optional[Union[str, date, datetime]]
+
+
+def build_query(filters: Dict[str, Any], created_from: DateBound = None, created_to: DateBound = None,
+                sort_by: str = 'created_at', descending: bool = True) -> Dict[str, Any]:
+    """Validate query arguments into the form backends consume
+
+    Filter values may be a single value or a list/tuple/set of accepted values.
+    Date bounds are inclusive; a date-only bound covers the whole day.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort by '{sort_by}'; choose one of: {', '.join(SORT_FIELDS)}")
+
+    conditions = {}
+    for name, value in filters.items():
+        if name not in FILTER_FIELDS:
+            raise ValueError(f"Unknown filter '{name}'; choose from: {', '.join(FILTER_FIELDS)}")
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        conditions[FILTER_FIELDS[name]] = [str(v) for v in values]
+
+    return {
+        'conditions': conditions,
+        'created_from': _date_bound(created_from),
+        'created_to': _date_bound(created_to),
+        'sort_by': sort_by,
+        'descending': descending,
+    }
+
+
+def _date_bound(value: DateBound) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(sort_value: Any, evaluation_id: Any) -> str:
+    """Opaque cursor pointing just past a row"""
+    payload = json.dumps([sort_value, evaluation_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from encode_cursor into (sort value, evaluation ID)"""
+    try:
+        sort_value, evaluation_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    return sort_value, evaluation_id
+
+
+def sort_key(record: Dict[str, Any], sort_by: str) -> Tuple[str, str]:
+    """Keyset of a record: sort value (missing sorts as empty) with the ID as tie-breaker"""
+    value = record.get(sort_by)
+    return ('' if value is None else str(value), str(record.get('id', '')))
+
+
+def matches(record: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Whether a record satisfies a query's filters and date range"""
+    for field, values in query['conditions'].items():
+        value = record.get(field)
+        if value is None or str(value) not in values:
+            return False
+
+    created_at = record.get('created_at')
+    if query['created_from'] is not None:
+        if not created_at or created_at < query['created_from']:
+            return False
+    if query['created_to'] is not None:
+        if not created_at or created_at[:len(query['created_to'])] > query['created_to']:
+            return False
+    return True
+
+
+def apply_query(records: Sequence[Dict[str, Any]], query: Dict[str, Any], limit: Optional[int] = None,
+                cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Filter, sort and page records in memory; returns (page, next cursor)"""
+    sort_by, descending = query['sort_by'], query['descending']
+    selected = [record for record in records if matches(record, query)]
+
+    if cursor is not None:
+        after = tuple(decode_cursor(cursor))
+        if descending:
+            selected = [record for record in selected if sort_key(record, sort_by) < after]
+        else:
+            selected = [record for record in selected if sort_key(record, sort_by) > after]
+
+    key = lambda record: sort_key(record, sort_by)
+    if limit is None:
+        selected.sort(key=key, reverse=descending)
+        return selected, None
+
+    # Only the requested page (plus one row to detect a next page) is sorted
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    page = pick(limit + 1, selected, key=key)
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(*sort_key(page[-1], sort_by))
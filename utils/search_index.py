@@ -0,0 +1,220 @@
+"""
+Full-text search index over evaluation text
+Justifications, AI analyses, observation notes and lesson plan text are kept
+in a SQLite FTS5 index beside the evaluation store and updated on every save,
+so searches do not load or scan evaluation records.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List
+
+from utils.concurrency import stored_version
+
+# Indexed column -> evaluation fields whose text goes into it
+SEARCH_COLUMNS = {
+    'justifications': ('justifications', 'disposition_comments'),
+    'analyses': ('ai_analyses', 'targeted_improvement_analysis', 'lesson_plan_analysis'),
+    'notes': ('notes', 'observation_notes'),
+    'lesson_plan': ('lesson_plan',),
+}
+
+# bm25() weights in SEARCH_COLUMNS order; lesson plans are long and mostly boilerplate
+_COLUMN_WEIGHTS = (2.0, 1.0, 1.5, 0.5)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_COLUMNS = ', '.join(SEARCH_COLUMNS)
+_FTS_TABLE = f"CREATE VIRTUAL TABLE IF NOT EXISTS search_text USING fts5({_COLUMNS}, tokenize = 'porter unicode61')"
+# Used when SQLite was built without FTS5: same rows, searched with LIKE
+_PLAIN_TABLE = f"CREATE TABLE IF NOT EXISTS search_text ({_COLUMNS})"
+
+_TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _collect_text(value: Any) -> List[str]:
+    """All strings inside a field value (nested dicts and lists included)"""
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return [text for item in value for text in _collect_text(item)]
+    return []
+
+
+def document_text(evaluation: Dict[str, Any]) -> Dict[str, str]:
+    """Searchable text of an evaluation per index column"""
+    return {
+        column: '\n'.join(text for field in fields for text in _collect_text(evaluation.get(field)))
+        for column, fields in SEARCH_COLUMNS.items()
+    }
+
+
+def parse_terms(query: str) -> List[str]:
+    """Split a search box query into terms; "quoted text" stays one phrase"""
+    return [phrase or word for phrase, word in _TERM_PATTERN.findall(query) if (phrase or word).strip()]
+
+
+class SearchIndex:
+    """Ranked full-text index of evaluations, keyed by evaluation ID
+
+    Each document remembers the evaluation version it was built from, so an
+    out-of-order update from a slower writer never replaces newer text.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute(_FTS_TABLE)
+                self.fts = True
+            except sqlite3.OperationalError:
+                print("WARNING: SQLite has no FTS5 support; evaluation search falls back to LIKE scans")
+                conn.execute(_PLAIN_TABLE)
+                self.fts = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # Maintenance
+
+    def _put(self, conn: sqlite3.Connection, evaluation: Dict[str, Any], only_new: bool) -> bool:
+        version = stored_version(evaluation)
+        row = conn.execute("SELECT doc_id, version FROM search_docs WHERE id = ?", (evaluation['id'],)).fetchone()
+        if row is not None:
+            if only_new or row['version'] > version:
+                return False
+            conn.execute("DELETE FROM search_text WHERE rowid = ?", (row['doc_id'],))
+            conn.execute("UPDATE search_docs SET version = ? WHERE doc_id = ?", (version, row['doc_id']))
+            doc_id = row['doc_id']
+        else:
+            doc_id = conn.execute("INSERT INTO search_docs (id, version) VALUES (?, ?)",
+                                 (evaluation['id'], version)).lastrowid
+
+        text = document_text(evaluation)
+        conn.execute(f"INSERT INTO search_text (rowid, {_COLUMNS}) VALUES (?, {', '.join('?' * len(text))})",
+                     (doc_id, *text.values()))
+        return True
+
+    def index_evaluations(self, evaluations: Iterable[Dict[str, Any]], only_new: bool = False) -> int:
+        """Add or replace the documents of evaluations; returns the number written
+
+        Args:
+            evaluations: Evaluations with blob-stored fields already resolved
+            only_new: Skip evaluations that are already indexed (for imports)
+        """
+        with self._transaction() as conn:
+            return sum(self._put(conn, evaluation, only_new) for evaluation in evaluations if evaluation.get('id'))
+
+    def remove(self, evaluation_ids: Iterable[str]) -> int:
+        """Drop the documents of deleted evaluations; returns the number removed"""
+        removed = 0
+        with self._transaction() as conn:
+            for evaluation_id in evaluation_ids:
+                row = conn.execute("SELECT doc_id FROM search_docs WHERE id = ?", (evaluation_id,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM search_text WHERE rowid = ?", (row['doc_id'],))
+                    conn.execute("DELETE FROM search_docs WHERE doc_id = ?", (row['doc_id'],))
+                    removed += 1
+        return removed
+
+    def rebuild(self, evaluations: Iterable[Dict[str, Any]]) -> int:
+        """Replace the whole index with the given evaluations; returns the number indexed"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM search_text")
+            conn.execute("DELETE FROM search_docs")
+            count = sum(self._put(conn, evaluation, False) for evaluation in evaluations if evaluation.get('id'))
+            conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('built', '1')")
+        return count
+
+    def is_built(self) -> bool:
+        """Whether the index has been built from the full store at least once"""
+        with self._connection() as conn:
+            return conn.execute("SELECT 1 FROM search_meta WHERE key = 'built'").fetchone() is not None
+
+    # Search
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Evaluations matching every term of query, best match first
+
+        Terms are matched as words (with stemming when FTS5 is available);
+        "quoted text" is matched as a phrase.
+
+        Returns:
+            [{'id', 'score', 'snippet'}, ...] where a higher score is a better match
+        """
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        if self.fts:
+            return self._search_fts(terms, limit)
+        return self._search_plain(terms, limit)
+
+    def _search_fts(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        weights = ', '.join(str(weight) for weight in _COLUMN_WEIGHTS)
+        sql = (f"SELECT search_docs.id AS id, bm25(search_text, {weights}) AS rank, "
+               f"snippet(search_text, -1, '**', '**', ' … ', 16) AS snippet "
+               f"FROM search_text JOIN search_docs ON search_docs.doc_id = search_text.rowid "
+               f"WHERE search_text MATCH ? ORDER BY rank LIMIT ?")
+        with self._connection() as conn:
+            rows = conn.execute(sql, (match, limit)).fetchall()
+        # bm25() is lower for better matches
+        return [{'id': row['id'], 'score': -row['rank'], 'snippet': row['snippet']} for row in rows]
+
+    def _search_plain(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        document = " || ' ' || ".join(f"COALESCE({column}, '')" for column in SEARCH_COLUMNS)
+        where = ' AND '.join(f"lower({document}) LIKE ?" for _ in terms)
+        occurrences = ' + '.join(
+            f"(length({document}) - length(replace(lower({document}), ?, ''))) / {max(len(term), 1)}"
+            for term in terms
+        )
+        params = [term.lower() for term in terms] + [f"%{term.lower()}%" for term in terms] + [limit]
+        sql = (f"SELECT search_docs.id AS id, ({occurrences}) AS score, substr(trim({document}), 1, 200) AS snippet "
+               f"FROM search_text JOIN search_docs ON search_docs.doc_id = search_text.rowid "
+               f"WHERE {where} ORDER BY score DESC LIMIT ?")
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{'id': row['id'], 'score': float(row['score']), 'snippet': row['snippet']} for row in rows]
@@ -0,0 +1,114 @@
+"""
+Serialization of stored evaluation data
+Stores write compact documents: minified JSON (through orjson when it is
+installed) or MessagePack, behind a one-line format header. Files written
+before the header existed, including pretty-printed JSON, are still read.
+
+Document layout:
+
+    #AI-STER format=1 encoding=json\n<payload>
+"""
+
+import json
+import os
+from typing import Any, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+FORMAT_VERSION = 1
+HEADER_PREFIX = b'#AI-STER '
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+ENCODINGS = (JSON, MSGPACK)
+
+
+def dumps_json(value: Any) -> bytes:
+    """Minified UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads_json(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # Let the stdlib parser raise its usual error (or accept NaN)
+    return json.loads(data)
+
+
+def resolve_encoding(encoding: Optional[str]) -> str:
+    """An encoding that can be used here; MessagePack falls back to JSON when msgpack is missing"""
+    encoding = (encoding or JSON).lower()
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown storage encoding: {encoding} (expected one of {', '.join(ENCODINGS)})")
+    if encoding == MSGPACK and not MSGPACK_AVAILABLE:
+        print("WARNING: msgpack is not installed; storing JSON instead (pip install msgpack)")
+        return JSON
+    return encoding
+
+
+def encode(value: Any, encoding: str = JSON) -> bytes:
+    """Payload bytes of a value, without a header"""
+    if encoding == MSGPACK:
+        return msgpack.packb(value, use_bin_type=True)
+    return dumps_json(value)
+
+
+def decode(data: bytes, encoding: str = JSON) -> Any:
+    """Value of payload bytes written by encode()"""
+    if encoding == MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("Data is stored as MessagePack but msgpack is not installed: pip install msgpack")
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return loads_json(data)
+
+
+def encode_document(value: Any, encoding: str = JSON) -> bytes:
+    """Header line followed by the encoded value"""
+    header = HEADER_PREFIX + f"format={FORMAT_VERSION} encoding={encoding}\n".encode('ascii')
+    return header + encode(value, encoding)
+
+
+def decode_document(data: bytes) -> Any:
+    """Value of a document from encode_document(), or of plain (legacy) JSON"""
+    if not data.startswith(HEADER_PREFIX):
+        return loads_json(data)
+
+    end = data.index(b'\n')
+    fields = dict(part.split('=', 1) for part in data[len(HEADER_PREFIX):end].decode('ascii').split())
+    if int(fields.get('format', 0)) > FORMAT_VERSION:
+        raise ValueError(f"Data was written in format {fields['format']}; this version reads up to {FORMAT_VERSION}")
+    return decode(data[end + 1:], fields.get('encoding', JSON))
+
+
+def read_document(path: str) -> Any:
+    """Read a file written with encode_document() or as plain JSON"""
+    with open(path, 'rb') as f:
+        return decode_document(f.read())
+
+
+def write_document(path: str, value: Any, encoding: str = JSON) -> None:
+    """Write a document atomically (temporary file, fsync, rename)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_document(value, encoding))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
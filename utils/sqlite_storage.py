@@ -0,0 +1,352 @@
+"""
+SQLite storage backend for evaluations
+Enabled with STORAGE_BACKEND=sqlite; utils/storage.py delegates to it
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.concurrency import next_version, stored_version
+from utils.query import decode_cursor, encode_cursor
+from utils.serialization import (
+    JSON, MSGPACK, MSGPACK_AVAILABLE, decode_document, dumps_json, encode_document, loads_json, read_document,
+    resolve_encoding
+)
+from utils.summaries import SUMMARY_FORMAT, summarize_evaluation
+
+# Columns extracted from the evaluation document for indexed queries
+INDEXED_FIELDS = ('status', 'rubric_type', 'department', 'semester', 'student_name', 'evaluator_name', 'created_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    status TEXT,
+    rubric_type TEXT,
+    department TEXT,
+    semester TEXT,
+    student_name TEXT,
+    evaluator_name TEXT,
+    created_at TEXT,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    summary TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS storage_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO storage_meta (key, value) VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS trg_evaluations_version_insert AFTER INSERT ON evaluations
+BEGIN UPDATE storage_meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS trg_evaluations_version_update AFTER UPDATE ON evaluations
+BEGIN UPDATE storage_meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS trg_evaluations_version_delete AFTER DELETE ON evaluations
+BEGIN UPDATE storage_meta SET value = value + 1 WHERE key = 'version'; END;
+"""
+
+_COLUMNS = f"id, {', '.join(INDEXED_FIELDS)}, updated_at, data, summary, version"
+_PLACEHOLDERS = ', '.join('?' * (len(INDEXED_FIELDS) + 5))
+
+# Columns derived from the data column, added to databases created before them
+_DERIVED_COLUMNS = {
+    **{field: 'TEXT' for field in INDEXED_FIELDS},
+    'summary': 'TEXT',
+    'version': 'INTEGER NOT NULL DEFAULT 0',
+}
+
+_INSERT_IF_NEW = f"INSERT OR IGNORE INTO evaluations ({_COLUMNS}) VALUES ({_PLACEHOLDERS})"
+
+_UPSERT = (
+    f"INSERT INTO evaluations ({_COLUMNS}) VALUES ({_PLACEHOLDERS}) "
+    f"ON CONFLICT(id) DO UPDATE SET "
+    f"{', '.join(f'{field} = excluded.{field}' for field in INDEXED_FIELDS)}, "
+    f"updated_at = excluded.updated_at, data = excluded.data, summary = excluded.summary, "
+    f"version = excluded.version"
+)
+
+
+class SQLiteStorage:
+    """Evaluation store with one row per evaluation and indexed lookup columns
+
+    Evaluations are kept as documents in the data column, so the store
+    accepts any evaluation shape; rows keep their insertion order. The data
+    column holds MessagePack (a BLOB with a format header, see
+    utils.serialization) when msgpack is installed, otherwise minified JSON
+    text; rows in either encoding are read.
+    """
+
+    def __init__(self, db_path: str, encoding: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite database file
+            encoding: 'msgpack' or 'json' for written rows; MessagePack if available when None
+        """
+        self.db_path = db_path
+        self.encoding = resolve_encoding(encoding or (MSGPACK if MSGPACK_AVAILABLE else JSON))
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._upgrade_columns(conn)
+            for field in INDEXED_FIELDS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_evaluations_{field} ON evaluations({field})")
+
+    def _upgrade_columns(self, conn: sqlite3.Connection) -> None:
+        """Add and backfill derived columns missing from older databases; rebuild summaries of an older format"""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(evaluations)")}
+        missing = [column for column in _DERIVED_COLUMNS if column not in columns]
+        for column in missing:
+            conn.execute(f"ALTER TABLE evaluations ADD COLUMN {column} {_DERIVED_COLUMNS[column]}")
+
+        meta = conn.execute("SELECT value FROM storage_meta WHERE key = 'summary_format'").fetchone()
+        stale_summaries = meta is None or meta['value'] != SUMMARY_FORMAT
+        if missing or stale_summaries:
+            query = "SELECT data FROM evaluations"
+        else:
+            query = "SELECT data FROM evaluations WHERE summary IS NULL"
+        rows = conn.execute(query).fetchall()
+        if rows or stale_summaries:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_UPSERT, [self._row_params(self._decode(row['data'])) for row in rows])
+            conn.execute("INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('summary_format', ?)",
+                         (SUMMARY_FORMAT,))
+            conn.execute("COMMIT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _encode(self, evaluation: Dict[str, Any]) -> Any:
+        if self.encoding == MSGPACK:
+            return encode_document(evaluation, MSGPACK)
+        return dumps_json(evaluation).decode('utf-8')
+
+    @staticmethod
+    def _decode(data: Any) -> Dict[str, Any]:
+        """Evaluation from a data column value: MessagePack BLOB or JSON text"""
+        return decode_document(data) if isinstance(data, bytes) else loads_json(data)
+
+    def _row_params(self, evaluation: Dict[str, Any]) -> tuple:
+        indexed = tuple(
+            str(evaluation[field]) if evaluation.get(field) is not None else None
+            for field in INDEXED_FIELDS
+        )
+        return (evaluation['id'], *indexed, datetime.now().isoformat(),
+                self._encode(evaluation),
+                dumps_json(summarize_evaluation(evaluation)).decode('utf-8'),
+                stored_version(evaluation))
+
+    def _save(self, conn: sqlite3.Connection, evaluation: Dict[str, Any], preserve_ai_original: bool,
+              expected_version: Optional[int] = None) -> int:
+        """Upsert one evaluation inside a transaction, bumping its version"""
+        row = conn.execute("SELECT version, data FROM evaluations WHERE id = ?", (evaluation['id'],)).fetchone()
+        evaluation['version'] = next_version(evaluation['id'], row['version'] if row else 0, expected_version)
+        if preserve_ai_original and row is not None:
+            existing = self._decode(row['data'])
+            if existing.get('ai_original'):
+                evaluation['ai_original'] = existing['ai_original']
+                evaluation['ai_original_saved_at'] = existing.get('ai_original_saved_at')
+                evaluation['has_ai_original'] = True
+        conn.execute(_UPSERT, self._row_params(evaluation))
+        return evaluation['version']
+
+    def save_evaluation(self, evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                        expected_version: Optional[int] = None) -> int:
+        """Insert or update a single evaluation; returns its new version
+
+        Raises:
+            VersionConflictError: expected_version is set and the stored version differs
+        """
+        if not evaluation.get('id'):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._transaction() as conn:
+            return self._save(conn, evaluation, preserve_ai_original, expected_version)
+
+    def save_evaluations(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+        """Insert or update a batch of evaluations in one transaction; returns the number saved"""
+        if any(not evaluation.get('id') for evaluation in evaluations):
+            raise ValueError("Evaluation must have an 'id' to be saved")
+
+        with self._transaction() as conn:
+            for evaluation in evaluations:
+                self._save(conn, evaluation, preserve_ai_original)
+        return len(evaluations)
+
+    def load_evaluations(self) -> List[Dict[str, Any]]:
+        """Load all evaluations in insertion order"""
+        with self._connection() as conn:
+            rows = conn.execute("SELECT data FROM evaluations ORDER BY seq").fetchall()
+        return [self._decode(row['data']) for row in rows]
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluations in insertion order, one row at a time"""
+        with self._connection() as conn:
+            for row in conn.execute("SELECT data FROM evaluations ORDER BY seq"):
+                yield self._decode(row['data'])
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Yield evaluation summaries in insertion order without loading full records"""
+        with self._connection() as conn:
+            for row in conn.execute("SELECT summary FROM evaluations ORDER BY seq"):
+                yield loads_json(row['summary'])
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Load all evaluation summaries in insertion order"""
+        return list(self.iter_summaries())
+
+    def _query_where(self, query: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        where, params = [], []
+        for field, values in query['conditions'].items():
+            where.append(f"{field} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if query['created_from'] is not None:
+            where.append("created_at >= ?")
+            params.append(query['created_from'])
+        if query['created_to'] is not None:
+            where.append("substr(created_at, 1, ?) <= ?")
+            params.extend([len(query['created_to']), query['created_to']])
+        return where, params
+
+    def query_summaries(self, query: Dict[str, Any], limit: Optional[int] = None,
+                        cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Run a query from utils.query.build_query on the indexed columns; returns (page, next cursor)"""
+        where, params = self._query_where(query)
+        sort_expr = f"COALESCE({query['sort_by']}, '')"
+        order = 'DESC' if query['descending'] else 'ASC'
+        if cursor is not None:
+            where.append(f"({sort_expr}, id) {'<' if query['descending'] else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        sql = (f"SELECT id, {sort_expr} AS sort_value, summary FROM evaluations "
+               f"WHERE {' AND '.join(where) or '1 = 1'} ORDER BY sort_value {order}, id {order}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['sort_value'], rows[-1]['id'])
+        else:
+            next_cursor = None
+        return [loads_json(row['summary']) for row in rows], next_cursor
+
+    def count_matching(self, query: Dict[str, Any]) -> int:
+        """Count evaluations matching a query's filters"""
+        where, params = self._query_where(query)
+        with self._connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM evaluations WHERE {' AND '.join(where) or '1 = 1'}",
+                                params).fetchone()[0]
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single evaluation by ID"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM evaluations WHERE id = ?", (evaluation_id,)).fetchone()
+        return self._decode(row['data']) if row else None
+
+    def delete_evaluation(self, evaluation_id: str) -> bool:
+        """Delete an evaluation by ID; returns True if it existed"""
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM evaluations WHERE id = ?", (evaluation_id,)).rowcount > 0
+
+    def delete_evaluations(self, evaluation_ids: Iterable[str]) -> int:
+        """Delete a batch of evaluations in one transaction; returns the number deleted"""
+        with self._transaction() as conn:
+            return sum(
+                conn.execute("DELETE FROM evaluations WHERE id = ?", (evaluation_id,)).rowcount
+                for evaluation_id in evaluation_ids
+            )
+
+    def import_evaluations(self, evaluations: List[Dict[str, Any]]) -> int:
+        """Insert evaluations whose IDs are not stored yet; returns the number imported
+
+        Evaluations without an ID are skipped.
+        """
+        imported_count = 0
+        with self._transaction() as conn:
+            for evaluation in evaluations:
+                if not evaluation.get('id'):
+                    continue
+                imported_count += conn.execute(_INSERT_IF_NEW, self._row_params(evaluation)).rowcount
+        return imported_count
+
+    def set_ai_original(self, evaluation_id: str, ai_original: Dict[str, Any], saved_at: str,
+                        ai_diff: Optional[Dict[str, Any]] = None) -> bool:
+        """Attach AI original data (and its diff, see utils.ai_diff) to a stored evaluation
+
+        Returns False if the evaluation does not exist.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM evaluations WHERE id = ?", (evaluation_id,)).fetchone()
+            if row is None:
+                return False
+            evaluation = self._decode(row['data'])
+            evaluation['ai_original'] = ai_original
+            evaluation['has_ai_original'] = True
+            evaluation['ai_original_saved_at'] = saved_at
+            if ai_diff is not None:
+                evaluation['ai_diff'] = ai_diff
+            evaluation['version'] = stored_version(evaluation) + 1
+            conn.execute(_UPSERT, self._row_params(evaluation))
+        return True
+
+    def clear(self) -> None:
+        """Delete all evaluations"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM evaluations")
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def version(self) -> int:
+        """Change counter bumped by every insert, update and delete (used for cache invalidation)"""
+        with self._connection() as conn:
+            return conn.execute("SELECT value FROM storage_meta WHERE key = 'version'").fetchone()[0]
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """Copy evaluations from an evaluations file (see utils.serialization) into a SQLite store
+
+    Evaluations already present in the database are left untouched, so the
+    migration can be re-run safely. Returns the number of evaluations copied.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    evaluations = read_document(json_path)
+    if not isinstance(evaluations, list):
+        raise ValueError(f"{json_path} does not contain a list of evaluations")
+    return SQLiteStorage(db_path).import_evaluations(evaluations)
@@ -1,86 +1,651 @@
 """
 Storage utilities for AI-STER Streamlit application
-Uses JSON files for simple local storage
+Evaluations are kept by a storage backend (see utils.storage_backend): a JSON
+file for simple local storage, or SQLite / an append-only journal /
+per-department-and-evaluator partitions when STORAGE_BACKEND is set to
+sqlite, jsonl or partitioned. Evaluations from closed semesters can be moved
+to a compressed archive (see archive_semester()), and everything is backed
+up incrementally with create_backup().
 """
 
+import gzip
+import itertools
 import json
 import os
-from typing import List, Dict, Any
+import shutil
+import sqlite3
+import threading
+from typing import List, Dict, Any, BinaryIO, Callable, Iterator, Optional, Sequence
 from datetime import datetime
 
+from utils.ai_diff import AI_DIFF_TOTALS, compute_ai_diff, expand_differences, is_current
+from utils.analytics_snapshot import (
+    EVALUATIONS_TABLE, JUSTIFICATIONS_TABLE, PYARROW_AVAILABLE, AnalyticsSnapshot
+)
+from utils.archive import SemesterArchive
+from utils.backup import BackupStore
+from utils.blob_store import BLOB_REF_KEY, BlobStore, is_blob_ref
+from utils.concurrency import VersionConflictError, stored_version
+from utils.evaluation_cache import EvaluationCache, ReadOnlyDict, ReadOnlyList, freeze, thaw
+from utils.json_storage import JSONFileStorage
+from utils.migrations import SCHEMA_VERSION, MigrationCheckpoint, schema_version, upgrade_evaluation
+from utils.query import DateBound, apply_query, build_query, matches
+from utils.search_index import SearchIndex
+from utils.storage_backend import BACKEND_NAMES, StorageBackend, missing_methods
+from utils.summaries import aggregate_summaries, project, unsupported_fields
+
 STORAGE_DIR = "data_storage"
 EVALUATIONS_FILE = os.path.join(STORAGE_DIR, "evaluations.json")
+SUMMARIES_FILE = os.path.join(STORAGE_DIR, "evaluation_summaries.json")
+SQLITE_DB_FILE = os.path.join(STORAGE_DIR, "evaluations.db")
+JOURNAL_DIR = os.path.join(STORAGE_DIR, "journal")
+BLOBS_DIR = os.path.join(STORAGE_DIR, "blobs")
+SEARCH_DB_FILE = os.path.join(STORAGE_DIR, "search.db")
+ANALYTICS_DIR = os.path.join(STORAGE_DIR, "analytics")
+ARCHIVE_DIR = os.path.join(STORAGE_DIR, "archive")
+PARTITIONS_DIR = os.path.join(STORAGE_DIR, "partitions")
+BACKUPS_DIR = os.path.join(STORAGE_DIR, "backups")
+MIGRATION_CHECKPOINT_FILE = os.path.join(STORAGE_DIR, "schema_migration.checkpoint")
+
+# Seconds of write inactivity before the analytics snapshot is refreshed in the background
+ANALYTICS_REFRESH_DELAY = 5.0
+
+# Large fields kept in the blob store and loaded only on demand
+BLOB_FIELDS = ('ai_original', 'lesson_plan')
+
+_backend = None
+_backend_lock = threading.Lock()
+_search_index = None
+_analytics_timer = None
+
+# Parsed evaluations shared by all sessions in this process
+_evaluation_cache = EvaluationCache()
+
+def get_storage_backend() -> StorageBackend:
+    """Get the configured storage backend
+    
+    The default keeps evaluations in data_storage/evaluations.json
+    (STORAGE_JSON_PATH). Set STORAGE_BACKEND=sqlite to store them in
+    data_storage/evaluations.db, or STORAGE_BACKEND=jsonl for an append-only
+    journal in data_storage/journal, or STORAGE_BACKEND=partitioned to split
+    them by department and evaluator under data_storage/partitions (migrate
+    existing data with scripts/migrate_storage.py). With
+    STORAGE_READ_ONLY=true the journal is opened read-only through memory
+    maps (see utils.mapped_store), for analytics processes.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_name = os.getenv('STORAGE_BACKEND', 'json').lower()
+            read_only = os.getenv('STORAGE_READ_ONLY', 'false').lower() == 'true'
+            if read_only and backend_name != 'jsonl':
+                raise ValueError("STORAGE_READ_ONLY is only supported with STORAGE_BACKEND=jsonl")
+            if backend_name == 'json':
+                _backend = JSONFileStorage(os.getenv('STORAGE_JSON_PATH', EVALUATIONS_FILE),
+                                           encoding=os.getenv('STORAGE_FILE_ENCODING'))
+            elif backend_name == 'sqlite':
+                from utils.sqlite_storage import SQLiteStorage
+                _backend = SQLiteStorage(os.getenv('STORAGE_DB_PATH', SQLITE_DB_FILE),
+                                         encoding=os.getenv('STORAGE_SQLITE_ENCODING'))
+            elif backend_name == 'jsonl' and read_only:
+                from utils.mapped_store import MappedJournalStore
+                _backend = MappedJournalStore(os.getenv('STORAGE_JOURNAL_DIR', JOURNAL_DIR))
+            elif backend_name == 'partitioned':
+                from utils.partitioned_storage import PartitionedStorage
+                _backend = PartitionedStorage(os.getenv('STORAGE_PARTITION_DIR', PARTITIONS_DIR),
+                                              partition_backend=os.getenv('STORAGE_PARTITION_BACKEND', 'json').lower())
+            elif backend_name == 'jsonl':
+                from utils.journal_storage import JournalStorage
+                _backend = JournalStorage(
+                    os.getenv('STORAGE_JOURNAL_DIR', JOURNAL_DIR),
+                    compact_threshold=int(os.getenv('STORAGE_COMPACT_THRESHOLD', '500'))
+                )
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name} "
+                                 f"(expected one of {', '.join(BACKEND_NAMES)})")
+        return _backend
+
+def set_storage_backend(backend: Optional[StorageBackend]) -> None:
+    """Use a backend object instead of the configured one (None returns to the configuration)
+    
+    Raises:
+        TypeError: The object lacks StorageBackend methods
+    """
+    global _backend
+    if backend is not None and missing_methods(backend):
+        raise TypeError(f"{type(backend).__name__} is not a StorageBackend; "
+                        f"missing: {', '.join(missing_methods(backend))}")
+    with _backend_lock:
+        _backend = backend
+    _evaluation_cache.invalidate()
 
 def ensure_storage_dir():
     """Ensure storage directory exists"""
     if not os.path.exists(STORAGE_DIR):
         os.makedirs(STORAGE_DIR)
 
-def save_evaluation(evaluation: Dict[str, Any], preserve_ai_original: bool = True) -> None:
+def _blob_store() -> BlobStore:
+    return BlobStore(
+        os.getenv('STORAGE_BLOB_DIR', BLOBS_DIR),
+        compress=os.getenv('STORAGE_BLOB_COMPRESS', 'true').lower() in ('1', 'true', 'yes', 'on')
+    )
+
+def _externalize_value(value: Any) -> Any:
+    """Move a large field value into the blob store, returning a reference to it
+    
+    Values under STORAGE_BLOB_MIN_BYTES stay inline; STORAGE_BLOBS=false disables
+    the blob store for new writes.
+    """
+    if value is None or is_blob_ref(value):
+        return value
+    if os.getenv('STORAGE_BLOBS', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        return value
+    if len(json.dumps(value, ensure_ascii=False)) < int(os.getenv('STORAGE_BLOB_MIN_BYTES', '1024')):
+        return value
+    return _blob_store().put(value)
+
+def _externalize_blobs(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an evaluation with its large fields replaced by blob references"""
+    externalized = None
+    for field in BLOB_FIELDS:
+        value = evaluation.get(field)
+        stored = _externalize_value(value)
+        if stored is not value:
+            if externalized is None:
+                externalized = dict(evaluation)
+            externalized[field] = stored
+    return externalized if externalized is not None else evaluation
+
+def resolve_evaluation_blobs(evaluation: Dict[str, Any], fields: Sequence[str] = BLOB_FIELDS) -> Dict[str, Any]:
+    """Load blob-stored fields (ai_original, lesson_plan) of an evaluation
+    
+    Records from load_evaluations() keep references to these fields; this
+    returns a copy with the requested fields loaded.
+    """
+    if not evaluation:
+        return evaluation
+    refs = [field for field in fields if is_blob_ref(evaluation.get(field))]
+    if not refs:
+        return evaluation
+    
+    store = _blob_store()
+    resolved = dict(evaluation)
+    for field in refs:
+        resolved[field] = store.get(evaluation[field])
+    return freeze(resolved) if isinstance(evaluation, ReadOnlyDict) else resolved
+
+def prune_unreferenced_blobs() -> int:
+    """Delete blobs no stored evaluation refers to; returns the number deleted"""
+    referenced = [
+        evaluation[field][BLOB_REF_KEY]
+        for evaluation in load_evaluations()
+        for field in BLOB_FIELDS
+        if is_blob_ref(evaluation.get(field))
+    ]
+    return _blob_store().prune(referenced)
+
+def _get_search_index() -> SearchIndex:
+    """Full-text index kept beside the evaluation store (STORAGE_SEARCH_DB)"""
+    global _search_index
+    with _backend_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(os.getenv('STORAGE_SEARCH_DB', SEARCH_DB_FILE))
+        return _search_index
+
+def _after_save(evaluations: List[Dict[str, Any]], only_new: bool = False) -> None:
+    """Update derived indexes for saved evaluations; a failure is reported but does not fail the save"""
+    try:
+        _get_search_index().index_evaluations(
+            (resolve_evaluation_blobs(e, ['lesson_plan']) for e in evaluations), only_new=only_new
+        )
+    except (sqlite3.Error, OSError) as e:
+        print(f"WARNING: Could not update search index: {e}")
+    _schedule_analytics_refresh()
+
+def _after_delete(evaluation_ids: Sequence[str]) -> None:
+    """Update derived indexes for deleted evaluations"""
+    try:
+        _get_search_index().remove(evaluation_ids)
+    except (sqlite3.Error, OSError) as e:
+        print(f"WARNING: Could not update search index: {e}")
+    _schedule_analytics_refresh()
+
+def _analytics_snapshot() -> AnalyticsSnapshot:
+    return AnalyticsSnapshot(os.getenv('STORAGE_ANALYTICS_DIR', ANALYTICS_DIR))
+
+def _schedule_analytics_refresh() -> None:
+    """Refresh the analytics snapshot once writes pause, if STORAGE_ANALYTICS is enabled"""
+    global _analytics_timer
+    if not PYARROW_AVAILABLE or os.getenv('STORAGE_ANALYTICS', 'false').lower() != 'true':
+        return
+    with _backend_lock:
+        if _analytics_timer is not None:
+            _analytics_timer.cancel()
+        _analytics_timer = threading.Timer(ANALYTICS_REFRESH_DELAY, _refresh_analytics_in_background)
+        _analytics_timer.daemon = True
+        _analytics_timer.start()
+
+def _refresh_analytics_in_background() -> None:
+    try:
+        refresh_analytics_snapshot()
+    except Exception as e:
+        print(f"ERROR: Analytics snapshot refresh failed: {e}")
+
+def _attach_ai_diff(evaluation: Dict[str, Any], preserve_ai_original: bool) -> None:
+    """Store the AI-vs-supervisor diff with an evaluation that has an AI original
+    
+    The AI original is the one the save will keep: the stored one when
+    preserve_ai_original is set, otherwise the evaluation's own.
+    """
+    ai_original = evaluation.get('ai_original')
+    if preserve_ai_original and evaluation.get('id'):
+        stored = get_evaluation_by_id(evaluation['id'], resolve_blobs=False, include_archived=False)
+        if stored and stored.get('ai_original'):
+            ai_original = stored['ai_original']
+    
+    if not ai_original:
+        evaluation.pop('ai_diff', None)
+        return
+    try:
+        if is_blob_ref(ai_original):
+            ai_original = _blob_store().get(ai_original)
+    except OSError as e:
+        print(f"WARNING: Could not load AI original of {evaluation.get('id')} for its diff: {e}")
+        return
+    evaluation['ai_diff'] = compute_ai_diff(evaluation, ai_original)
+
+def _semester_archive() -> SemesterArchive:
+    return SemesterArchive(os.getenv('STORAGE_ARCHIVE_DIR', ARCHIVE_DIR))
+
+def save_evaluation(evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                    expected_version: Optional[int] = None) -> int:
     """Save an evaluation to storage
     
+    Every save bumps the evaluation's 'version'. Pass the version the caller
+    last loaded or saved as expected_version to make the save compare-and-set:
+    it then fails instead of overwriting a save made in the meantime by
+    another session or process. Use 0 for an evaluation that should not
+    exist yet.
+    
     Args:
         evaluation: The evaluation data to save
         preserve_ai_original: If True, preserves existing ai_original data when updating
+        expected_version: Stored version the save requires, or None to save unconditionally
+    
+    Returns:
+        The evaluation's new version
+    
+    Raises:
+        VersionConflictError: The stored version is not expected_version
     """
-    ensure_storage_dir()
+    if isinstance(evaluation, ReadOnlyDict):
+        evaluation = thaw(evaluation)
+    evaluation = upgrade_evaluation(evaluation)
+    _attach_ai_diff(evaluation, preserve_ai_original)
+    evaluation = _externalize_blobs(evaluation)
     
-    evaluations = load_evaluations()
+    version = get_storage_backend().save_evaluation(evaluation, preserve_ai_original, expected_version)
+    _after_save([evaluation])
+    return version
+
+def save_evaluations(evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+    """Save a batch of evaluations in one transaction or one file rewrite
     
-    # Update existing or add new
-    existing_index = None
-    existing_eval = None
-    for i, existing in enumerate(evaluations):
-        if existing.get('id') == evaluation.get('id'):
-            existing_index = i
-            existing_eval = existing
-            break
-    
-    if existing_index is not None:
-        # Preserve ai_original if it exists and preserve_ai_original is True
-        if preserve_ai_original and existing_eval.get('ai_original'):
-            evaluation['ai_original'] = existing_eval['ai_original']
-            evaluation['ai_original_saved_at'] = existing_eval.get('ai_original_saved_at')
-        
-        evaluations[existing_index] = evaluation
-    else:
-        evaluations.append(evaluation)
+    Each evaluation is inserted or updated exactly as an unconditional
+    save_evaluation() would; a later entry with the same ID replaces an
+    earlier one.
+    
+    Args:
+        evaluations: The evaluations to save
+        preserve_ai_original: If True, preserves existing ai_original data when updating
+    
+    Returns:
+        The number of evaluations saved
+    """
+    evaluations = [upgrade_evaluation(thaw(e) if isinstance(e, ReadOnlyDict) else e) for e in evaluations]
+    if not evaluations:
+        return 0
+    for evaluation in evaluations:
+        _attach_ai_diff(evaluation, preserve_ai_original)
+    evaluations = [_externalize_blobs(e) for e in evaluations]
     
-    # Save to file
-    with open(EVALUATIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(evaluations, f, indent=2, ensure_ascii=False)
+    saved_count = get_storage_backend().save_evaluations(evaluations, preserve_ai_original)
+    _after_save(evaluations)
+    return saved_count
 
 def load_evaluations() -> List[Dict[str, Any]]:
-    """Load all evaluations from storage"""
-    if not os.path.exists(EVALUATIONS_FILE):
-        return []
+    """Load all evaluations from storage
     
-    try:
-        with open(EVALUATIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
+    Returns read-only views from a process-level cache that is reloaded only
+    when the store changes. Use copy.deepcopy() or thaw() for mutable copies.
+    A read-only memory-mapped store returns a sequence that decodes each
+    evaluation when it is accessed instead.
+    """
+    backend = get_storage_backend()
+    if getattr(backend, 'read_only', False):
+        return backend.load_evaluations()
+    return _evaluation_cache.get_all(backend.version(), backend.load_evaluations)
+
+def load_evaluation_summaries(fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Load evaluation summaries for list views without heavy text fields
+    
+    Summaries come from a stored summary index and are cached like
+    load_evaluations(). Use get_evaluation_by_id() for the full record.
+    
+    Args:
+        fields: Summary fields to keep (see utils.summaries.SUMMARY_FIELDS); all if None
+    """
+    missing = unsupported_fields(fields)
+    if missing:
+        raise ValueError(f"Fields not in the summary index: {', '.join(sorted(missing))}")
+    
+    backend = get_storage_backend()
+    summaries = _evaluation_cache.get_summaries(backend.version(), backend.load_summaries)
+    if fields is None:
+        return summaries
+    return ReadOnlyList(ReadOnlyDict(project(summary, fields)) for summary in summaries)
+
+def iter_evaluation_summaries(fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield evaluation summaries one at a time, bypassing the process cache
+    
+    Args:
+        fields: Summary fields to keep (see utils.summaries.SUMMARY_FIELDS); all if None
+    """
+    missing = unsupported_fields(fields)
+    if missing:
+        raise ValueError(f"Fields not in the summary index: {', '.join(sorted(missing))}")
+    
+    for summary in get_storage_backend().iter_summaries():
+        yield project(summary, fields)
+
+def query_evaluations(status: Any = None, rubric_type: Any = None, department: Any = None,
+                      semester: Any = None, evaluator: Any = None, student: Any = None,
+                      created_from: DateBound = None, created_to: DateBound = None,
+                      sort_by: str = 'created_at', descending: bool = True,
+                      limit: Optional[int] = 50, cursor: Optional[str] = None,
+                      fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Query evaluation summaries with filters, sorting and cursor pagination
+    
+    Filters take a single value or a list of accepted values; None means any.
+    SQLite answers from its indexed columns, the other backends filter the
+    cached summary index. Pass the returned next_cursor back to get the
+    following page; it is None on the last page.
+    
+    Args:
+        created_from / created_to: Inclusive bounds on created_at (ISO string, date or datetime)
+        sort_by: One of utils.query.SORT_FIELDS; ties are broken by ID
+        limit: Page size, or None for every match
+        fields: Summary fields to keep (see utils.summaries.SUMMARY_FIELDS); all if None
+    
+    Returns:
+        {'items': [summary, ...], 'next_cursor': str or None}
+    """
+    missing = unsupported_fields(fields)
+    if missing:
+        raise ValueError(f"Fields not in the summary index: {', '.join(sorted(missing))}")
+    
+    query = build_query(
+        {'status': status, 'rubric_type': rubric_type, 'department': department,
+         'semester': semester, 'evaluator': evaluator, 'student': student},
+        created_from=created_from, created_to=created_to, sort_by=sort_by, descending=descending
+    )
+    
+    backend = get_storage_backend()
+    if hasattr(backend, 'query_summaries'):
+        items, next_cursor = backend.query_summaries(query, limit=limit, cursor=cursor)
+        items = freeze([project(item, fields) for item in items])
+    else:
+        items, next_cursor = apply_query(load_evaluation_summaries(), query, limit=limit, cursor=cursor)
+        if fields is not None:
+            items = [ReadOnlyDict(project(item, fields)) for item in items]
+        items = ReadOnlyList(items)
+    
+    return {'items': items, 'next_cursor': next_cursor}
+
+def count_evaluations(status: Any = None, rubric_type: Any = None, department: Any = None,
+                      semester: Any = None, evaluator: Any = None, student: Any = None,
+                      created_from: DateBound = None, created_to: DateBound = None) -> int:
+    """Count evaluations matching the query_evaluations() filters"""
+    query = build_query(
+        {'status': status, 'rubric_type': rubric_type, 'department': department,
+         'semester': semester, 'evaluator': evaluator, 'student': student},
+        created_from=created_from, created_to=created_to
+    )
+    
+    backend = get_storage_backend()
+    if hasattr(backend, 'count_matching'):
+        return backend.count_matching(query)
+    return sum(1 for summary in load_evaluation_summaries() if matches(summary, query))
+
+def get_evaluation_stats(department: Any = None, evaluator: Any = None) -> Dict[str, Any]:
+    """Dashboard totals, optionally for some departments / evaluators (single value or list)
+
+    The partitioned backend answers from its aggregate index without reading
+    evaluations; the others aggregate the cached summary index.
+
+    Returns:
+        See utils.summaries.aggregate_summaries
+    """
+    backend = get_storage_backend()
+    if hasattr(backend, 'aggregate'):
+        return backend.aggregate(department, evaluator)
+    query = build_query({'department': department, 'evaluator': evaluator})
+    return aggregate_summaries(summary for summary in load_evaluation_summaries() if matches(summary, query))
+
+def rebuild_search_index() -> int:
+    """Rebuild the full-text index from every stored and archived evaluation; returns the number indexed
+    
+    Saves keep the index current; rebuild after writing to the store by
+    other means (e.g. scripts/migrate_storage.py into a new data directory).
+    """
+    hot = (resolve_evaluation_blobs(e, ['lesson_plan']) for e in iter_evaluations())
+    return _get_search_index().rebuild(itertools.chain(hot, _semester_archive().iter_evaluations()))
+
+def search_evaluations(query: str, limit: int = 20,
+                       fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Full-text search over justifications, AI analyses, notes and lesson plans
+    
+    Every word must match (with stemming, so "accommodation" also finds
+    "accommodations"); put "quoted text" in quotes to match it as a phrase.
+    The index is built on first use if it does not exist yet.
+    
+    Args:
+        query: Search box text
+        limit: Maximum number of results
+        fields: Summary fields to include (see utils.summaries.SUMMARY_FIELDS); all if None
+    
+    Returns:
+        Evaluation summaries, best match first, each with 'score' (higher is
+        better), 'snippet' (matching text with the terms in **bold**) and
+        'archived' (whether it is in the semester archive)
+    """
+    missing = unsupported_fields(fields)
+    if missing:
+        raise ValueError(f"Fields not in the summary index: {', '.join(sorted(missing))}")
+    
+    index = _get_search_index()
+    if not index.is_built():
+        rebuild_search_index()
+    hits = index.search(query, limit)
+    if not hits:
         return []
+    
+    summaries = {summary.get('id'): summary for summary in load_evaluation_summaries()}
+    archived = None
+    results = []
+    for hit in hits:
+        summary = summaries.get(hit['id'])
+        is_archived = summary is None
+        if is_archived:
+            if archived is None:
+                archived = {summary.get('id'): summary for summary in _semester_archive().summaries()}
+            summary = archived.get(hit['id'])
+            if summary is None:
+                continue  # Deleted without going through this module
+        results.append({**project(summary, fields), 'score': hit['score'], 'snippet': hit['snippet'],
+                        'archived': is_archived})
+    return results
+
+def refresh_analytics_snapshot() -> Dict[str, int]:
+    """Bring the columnar analytics snapshot (STORAGE_ANALYTICS_DIR) up to date
+    
+    Only evaluations added or changed since the last refresh are loaded.
+    Requires pyarrow.
+    
+    Returns:
+        {'updated': n, 'removed': n, 'total': n}
+    """
+    versions = {
+        summary['id']: summary.get('version', 0)
+        for summary in load_evaluation_summaries(['id', 'version'])
+        if summary.get('id')
+    }
+    return _analytics_snapshot().refresh(
+        versions, lambda evaluation_id: get_evaluation_by_id(evaluation_id, resolve_blobs=False, include_archived=False)
+    )
+
+def load_analytics_snapshot(refresh: bool = True, memory_map: bool = True) -> Dict[str, Any]:
+    """Load the analytics snapshot as Arrow tables
+    
+    Args:
+        refresh: Bring the snapshot up to date first
+        memory_map: Memory-map the files instead of reading them into memory
+    
+    Returns:
+        {'evaluations': pyarrow.Table, 'justifications': pyarrow.Table}; use
+        table.to_pandas() for DataFrames
+    """
+    snapshot = _analytics_snapshot()
+    if refresh:
+        refresh_analytics_snapshot()
+    return {
+        name: snapshot.read_table(name, memory_map=memory_map)
+        for name in (EVALUATIONS_TABLE, JUSTIFICATIONS_TABLE)
+    }
 
 def delete_evaluation(evaluation_id: str) -> bool:
     """Delete an evaluation by ID"""
-    evaluations = load_evaluations()
+    deleted = get_storage_backend().delete_evaluation(evaluation_id)
+    if deleted:
+        _after_delete([evaluation_id])
+    return deleted
+
+def delete_evaluations(evaluation_ids: Sequence[str]) -> int:
+    """Delete a batch of evaluations in one transaction or one file rewrite
+    
+    Returns:
+        The number of evaluations deleted
+    """
+    ids = set(evaluation_ids)
+    if not ids:
+        return 0
+    
+    deleted_count = _delete_stored(ids)
+    if deleted_count:
+        _after_delete(ids)
+    return deleted_count
+
+def _delete_stored(ids: set) -> int:
+    """Remove evaluations from the hot store only, leaving derived indexes alone"""
+    return get_storage_backend().delete_evaluations(ids)
+
+def archive_semester(semester: str) -> int:
+    """Move a closed semester's evaluations out of the hot store into the archive
     
-    original_length = len(evaluations)
-    evaluations = [e for e in evaluations if e.get('id') != evaluation_id]
+    They are written to a compressed, read-only archive segment with blob
+    fields inlined, then deleted from the hot store; they stay in the search
+    index, and get_evaluation_by_id() still finds them. Run
+    prune_unreferenced_blobs() afterwards to drop their blobs. Evaluations
+    edited while they are being archived lose the edit, so only archive
+    semesters that are over.
     
-    if len(evaluations) < original_length:
-        with open(EVALUATIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(evaluations, f, indent=2, ensure_ascii=False)
-        return True
+    Returns:
+        The number of evaluations archived
+    """
+    ids = [summary['id'] for summary in query_evaluations(semester=semester, limit=None, fields=['id'])['items']
+           if summary.get('id')]
+    if not ids:
+        return 0
     
-    return False
+    def records() -> Iterator[Dict[str, Any]]:
+        for evaluation_id in ids:
+            evaluation = get_evaluation_by_id(evaluation_id, include_archived=False)
+            if evaluation is not None:
+                yield thaw(evaluation)
+    
+    if _semester_archive().add(semester, records()) is None:
+        return 0
+    archived_count = _delete_stored(set(ids))
+    _schedule_analytics_refresh()
+    return archived_count
+
+def archive_closed_semesters(current_semesters: Sequence[str]) -> Dict[str, int]:
+    """Archive every semester except the current one(s)
+    
+    Evaluations without a semester stay in the hot store.
+    
+    Returns:
+        Number of evaluations archived per semester
+    """
+    keep = set(current_semesters)
+    semesters = sorted({
+        summary['semester'] for summary in load_evaluation_summaries(['semester'])
+        if summary.get('semester') and summary['semester'] not in keep
+    })
+    return {semester: archive_semester(semester) for semester in semesters}
+
+def list_archived_semesters() -> Dict[str, int]:
+    """Number of archived evaluations per semester"""
+    counts: Dict[str, int] = {}
+    for summary in _semester_archive().summaries():
+        semester = summary.get('semester') or ''
+        counts[semester] = counts.get(semester, 0) + 1
+    return counts
+
+def load_archived_summaries(semester: Optional[str] = None,
+                            fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Summaries of archived evaluations, read from the archive index only
+    
+    Args:
+        semester: Only this semester; all if None
+        fields: Summary fields to keep (see utils.summaries.SUMMARY_FIELDS); all if None
+    """
+    missing = unsupported_fields(fields)
+    if missing:
+        raise ValueError(f"Fields not in the summary index: {', '.join(sorted(missing))}")
+    return ReadOnlyList(
+        ReadOnlyDict(project(summary, fields)) for summary in _semester_archive().summaries()
+        if semester is None or summary.get('semester') == semester
+    )
+
+def restore_archived_evaluations(evaluation_ids: Sequence[str]) -> int:
+    """Move archived evaluations back into the hot store so they can be edited
+    
+    An ID that is also in the hot store keeps the hot copy.
+    
+    Returns:
+        The number of evaluations restored
+    """
+    archive = _semester_archive()
+    evaluations = [e for e in map(archive.get, set(evaluation_ids)) if e is not None]
+    if not evaluations:
+        return 0
+    restored_count = _import_evaluations(evaluations)
+    archive.remove(e['id'] for e in evaluations)
+    return restored_count
+
+def restore_semester(semester: str) -> int:
+    """Move a whole archived semester back into the hot store"""
+    return restore_archived_evaluations(
+        [summary['id'] for summary in load_archived_summaries(semester, ['id'])]
+    )
 
 def export_data() -> Dict[str, Any]:
     """Export all data for backup"""
     evaluations = load_evaluations()
     
     return {
-        'evaluations': evaluations,
+        'evaluations': [resolve_evaluation_blobs(e) for e in evaluations],
         'export_date': datetime.now().isoformat(),
         'version': '1.0'
     }
@@ -94,41 +659,323 @@ def import_data(data: Dict[str, Any]) -> int:
     if not isinstance(imported_evaluations, list):
         raise ValueError("Invalid data format: 'evaluations' must be a list")
     
-    current_evaluations = load_evaluations()
+    return _import_evaluations(imported_evaluations)
+
+def _import_evaluations(evaluations: List[Dict[str, Any]]) -> int:
+    """Store evaluations whose IDs are not stored yet; returns the number imported"""
+    evaluations = [_externalize_blobs(upgrade_evaluation(e)) for e in evaluations]
     
-    # Merge evaluations, avoiding duplicates
-    existing_ids = {e.get('id') for e in current_evaluations}
-    new_evaluations = []
-    imported_count = 0
+    imported_count = get_storage_backend().import_evaluations(evaluations)
+    if imported_count:
+        _after_save(evaluations, only_new=True)
+    return imported_count
+
+def iter_evaluations() -> Iterator[Dict[str, Any]]:
+    """Yield stored evaluations one at a time
     
-    for evaluation in imported_evaluations:
-        if evaluation.get('id') not in existing_ids:
-            new_evaluations.append(evaluation)
-            imported_count += 1
+    The SQLite and journal backends read one record at a time; the JSON file
+    backend has to parse the whole file and yields from the cached list.
+    """
+    backend = get_storage_backend()
+    if getattr(backend, 'loads_whole_store', False):
+        yield from load_evaluations()
+    else:
+        yield from backend.iter_evaluations()
+
+def export_ndjson(fileobj: BinaryIO, compress: bool = False,
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream every evaluation to a binary file as NDJSON, one evaluation per line
+    
+    Blob-stored fields are inlined so the export is self-contained.
+    
+    Args:
+        fileobj: Binary file to write to (left open)
+        compress: Gzip the output
+        progress: Called with the number of evaluations written so far
+    
+    Returns:
+        The number of evaluations exported
+    """
+    stream = gzip.GzipFile(fileobj=fileobj, mode='wb') if compress else fileobj
+    count = 0
+    try:
+        for evaluation in iter_evaluations():
+            line = json.dumps(resolve_evaluation_blobs(evaluation), ensure_ascii=False) + '\n'
+            stream.write(line.encode('utf-8'))
+            count += 1
+            if progress and count % 100 == 0:
+                progress(count)
+    finally:
+        if compress:
+            stream.close()
+    if progress:
+        progress(count)
+    return count
+
+def import_ndjson(fileobj: BinaryIO, batch_size: int = 500,
+                  progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Stream evaluations from an NDJSON file (plain or gzip) into storage
     
-    # Save merged data
-    all_evaluations = current_evaluations + new_evaluations
+    At most batch_size evaluations are held in memory. Evaluations whose ID is
+    already stored, including earlier lines of the same file, are skipped.
     
-    ensure_storage_dir()
-    with open(EVALUATIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_evaluations, f, indent=2, ensure_ascii=False)
+    Args:
+        fileobj: Binary file to read; gzip input is detected automatically
+        batch_size: Evaluations stored per write
+        progress: Called with (lines processed, evaluations imported) after each batch
     
+    Returns:
+        The number of evaluations imported
+    """
+    head = fileobj.read(2)
+    fileobj.seek(0)
+    stream = gzip.GzipFile(fileobj=fileobj, mode='rb') if head == b'\x1f\x8b' else fileobj
+    
+    processed = 0
+    imported_count = 0
+    batch = []
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            evaluation = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(evaluation, dict):
+            raise ValueError(f"Invalid data format on line {line_number}: expected an evaluation object")
+        batch.append(evaluation)
+        processed += 1
+        
+        if len(batch) >= batch_size:
+            imported_count += _import_evaluations(batch)
+            batch = []
+            if progress:
+                progress(processed, imported_count)
+    
+    if batch:
+        imported_count += _import_evaluations(batch)
+    if progress:
+        progress(processed, imported_count)
     return imported_count
 
+def _backup_store() -> BackupStore:
+    return BackupStore(os.getenv('STORAGE_BACKUP_DIR', BACKUPS_DIR))
+
+def create_backup(label: Optional[str] = None) -> Dict[str, Any]:
+    """Snapshot the hot store, the semester archive and their blobs into the backup store
+
+    Only evaluations and blobs no earlier snapshot holds are written, so a
+    nightly backup costs the day's changes. Evaluations saved while the
+    backup runs may or may not be in it.
+
+    Returns:
+        The snapshot's header: {'id', 'created_at', 'label', 'stats'}
+    """
+    return _backup_store().create(iter_evaluations(), _semester_archive().iter_evaluations(),
+                                  blobs=_blob_store(), label=label)
+
+def list_backups() -> List[Dict[str, Any]]:
+    """Headers of all backup snapshots, oldest first"""
+    return _backup_store().snapshots()
+
+def find_backup(when: Any) -> Optional[str]:
+    """ID of the latest backup snapshot taken at or before a time (ISO string or datetime), or None"""
+    return _backup_store().snapshot_at(when)
+
+def verify_backup(snapshot_id: Optional[str] = None) -> Dict[str, Any]:
+    """Check a backup snapshot's chunks (all snapshots if None); see utils.backup.BackupStore.verify"""
+    return _backup_store().verify(snapshot_id)
+
+def prune_backups(keep: int) -> Dict[str, int]:
+    """Delete all but the newest keep backup snapshots and the chunks only they used"""
+    return _backup_store().prune(keep)
+
+def restore_backup(snapshot_id: str, evaluation_ids: Optional[Sequence[str]] = None,
+                   batch_size: int = 500) -> int:
+    """Restore evaluations as they were when a backup snapshot was taken
+
+    Without evaluation_ids, all current data (hot store, archive, blobs and
+    search index) is replaced by the snapshot, after checking that none of
+    its chunks is missing or damaged. With evaluation_ids, only those
+    evaluations are put back into the hot store, replacing their current
+    copies (archived ones included) with a newer version; everything else is
+    left alone.
+
+    Returns:
+        The number of evaluations restored
+    """
+    backups = _backup_store()
+    manifest = backups.load(snapshot_id)
+
+    if evaluation_ids is not None:
+        ids = set(evaluation_ids)
+        records = list(backups.iter_evaluations(snapshot_id, evaluation_ids=ids))
+        records += backups.iter_evaluations(snapshot_id, archived=True,
+                                            evaluation_ids=ids - {e['id'] for e in records})
+        if not records:
+            return 0
+        backups.restore_blobs(snapshot_id, _blob_store(),
+                              [value[BLOB_REF_KEY] for e in records for value in e.values() if is_blob_ref(value)])
+        for evaluation in records:
+            current = get_evaluation_by_id(evaluation['id'], resolve_blobs=False)
+            if current is not None:
+                evaluation['version'] = max(stored_version(current), stored_version(evaluation)) + 1
+        restored_ids = {e['id'] for e in records}
+        _delete_stored(restored_ids)
+        _semester_archive().remove(restored_ids)
+        _after_delete(restored_ids)
+        return _import_evaluations(records)
+
+    verification = backups.verify(snapshot_id)
+    if not verification['ok']:
+        raise ValueError(f"Backup {snapshot_id} is damaged: {len(verification['missing'])} chunk(s) missing, "
+                         f"{len(verification['corrupt'])} corrupt")
+
+    clear_all_data()
+    backups.restore_blobs(snapshot_id, _blob_store())
+    backend = get_storage_backend()
+    restored_count = 0
+    batch = []
+    for evaluation in backups.iter_evaluations(snapshot_id):
+        batch.append(upgrade_evaluation(evaluation))
+        if len(batch) >= batch_size:
+            restored_count += backend.import_evaluations(batch)
+            batch = []
+    if batch:
+        restored_count += backend.import_evaluations(batch)
+
+    archive = _semester_archive()
+    for semester in dict.fromkeys(entry[2] for entry in manifest['archived']):
+        ids = [entry[0] for entry in manifest['archived'] if entry[2] == semester]
+        archive.add(semester, map(upgrade_evaluation,
+                                  backups.iter_evaluations(snapshot_id, archived=True, evaluation_ids=ids)))
+        restored_count += len(ids)
+
+    rebuild_search_index()
+    _schedule_analytics_refresh()
+    return restored_count
+
+def migrate_schema(batch_size: int = 500, dry_run: bool = False, checkpoint_path: Optional[str] = None,
+                   include_archive: bool = True,
+                   progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, Any]:
+    """Upgrade every stored evaluation to the current schema (see utils.migrations)
+    
+    A first pass streams the store once and keeps only the IDs of outdated
+    evaluations; the second loads, upgrades and saves them batch_size at a
+    time, one write per batch, recording progress in the checkpoint file
+    after each batch. Run again after an interruption, it continues after
+    the last saved batch. Archived semesters holding outdated evaluations
+    are rewritten one semester at a time. Upgrades are unconditional saves,
+    so run it while no one is editing.
+    
+    Args:
+        dry_run: Only report what would change
+        checkpoint_path: Progress file (MIGRATION_CHECKPOINT_FILE by default)
+        include_archive: Also upgrade the semester archive
+        progress: Called with (phase, done, total) as the run proceeds; phase is 'scan' or 'upgrade'
+    
+    Returns:
+        {'schema_version', 'dry_run', 'scanned', 'outdated', 'newer', 'upgraded', 'resumed_at',
+         'archived': {'scanned', 'outdated', 'upgraded'}, 'changes': {migration version: {field: n}}}
+    """
+    checkpoint = MigrationCheckpoint(checkpoint_path or MIGRATION_CHECKPOINT_FILE)
+    changes: Dict[int, Dict[str, int]] = {}
+    report = {'schema_version': SCHEMA_VERSION, 'dry_run': dry_run, 'scanned': 0, 'outdated': 0, 'newer': 0,
+              'upgraded': 0, 'resumed_at': None, 'archived': {'scanned': 0, 'outdated': 0, 'upgraded': 0}}
+    
+    state = None if dry_run else checkpoint.load()
+    if state is not None and state.get('schema_version') != SCHEMA_VERSION:
+        print(f"WARNING: Ignoring checkpoint {checkpoint.path} for schema version {state.get('schema_version')}")
+        state = None
+    
+    if state is not None:
+        pending, position = state['pending'], state['position']
+        report.update(scanned=state['scanned'], outdated=len(pending), newer=state['newer'], resumed_at=position)
+    else:
+        pending, position = [], 0
+        for evaluation in iter_evaluations():
+            report['scanned'] += 1
+            version = schema_version(evaluation)
+            if version > SCHEMA_VERSION:
+                report['newer'] += 1
+            elif version < SCHEMA_VERSION:
+                upgrade_evaluation(evaluation, changes)
+                pending.append(evaluation['id'])
+            if progress and report['scanned'] % 1000 == 0:
+                progress('scan', report['scanned'], 0)
+        report['outdated'] = len(pending)
+        if not dry_run and pending:
+            checkpoint.start(pending, report['scanned'], report['newer'])
+    
+    if not dry_run:
+        while position < len(pending):
+            batch = []
+            for evaluation_id in pending[position:position + batch_size]:
+                evaluation = get_evaluation_by_id(evaluation_id, resolve_blobs=False, include_archived=False)
+                if evaluation is not None and schema_version(evaluation) < SCHEMA_VERSION:
+                    # A resumed run did not scan, so it counts changes here
+                    batch.append(upgrade_evaluation(thaw(evaluation), changes if state is not None else None))
+            save_evaluations(batch)
+            report['upgraded'] += len(batch)
+            position = min(position + batch_size, len(pending))
+            checkpoint.advance(position)
+            if progress:
+                progress('upgrade', position, len(pending))
+        checkpoint.remove()
+    
+    if include_archive:
+        _migrate_archive(report['archived'], changes, dry_run)
+    
+    report['changes'] = {version: changes[version] for version in sorted(changes)}
+    return report
+
+def _migrate_archive(counts: Dict[str, int], changes: Dict[int, Dict[str, int]], dry_run: bool) -> None:
+    """Rewrite each archived semester holding outdated evaluations as one upgraded segment"""
+    archive = _semester_archive()
+    outdated_semesters = {}
+    for evaluation in archive.iter_evaluations():
+        counts['scanned'] += 1
+        if schema_version(evaluation) < SCHEMA_VERSION:
+            counts['outdated'] += 1
+            upgrade_evaluation(evaluation, changes)
+            semester = evaluation.get('semester')
+            outdated_semesters[semester] = outdated_semesters.get(semester, 0) + 1
+    
+    if dry_run:
+        return
+    for semester, outdated in outdated_semesters.items():
+        archive.add(semester, (upgrade_evaluation(e) for e in archive.iter_evaluations()
+                               if e.get('semester') == semester))
+        counts['upgraded'] += outdated
+
 def clear_all_data() -> None:
     """Clear all stored data"""
-    if os.path.exists(EVALUATIONS_FILE):
-        os.remove(EVALUATIONS_FILE)
+    get_storage_backend().clear()
+    shutil.rmtree(os.getenv('STORAGE_BLOB_DIR', BLOBS_DIR), ignore_errors=True)
+    _get_search_index().rebuild([])
+    shutil.rmtree(os.getenv('STORAGE_ANALYTICS_DIR', ANALYTICS_DIR), ignore_errors=True)
+    shutil.rmtree(os.getenv('STORAGE_ARCHIVE_DIR', ARCHIVE_DIR), ignore_errors=True)
+    _evaluation_cache.invalidate()
 
-def get_evaluation_by_id(evaluation_id: str) -> Dict[str, Any]:
-    """Get a specific evaluation by ID"""
-    evaluations = load_evaluations()
+def get_evaluation_by_id(evaluation_id: str, resolve_blobs: bool = True,
+                         include_archived: bool = True) -> Dict[str, Any]:
+    """Get a specific evaluation by ID (read-only view, see load_evaluations)
     
-    for evaluation in evaluations:
-        if evaluation.get('id') == evaluation_id:
-            return evaluation
+    Args:
+        evaluation_id: The evaluation ID
+        resolve_blobs: Load blob-stored fields (ai_original, lesson_plan) into the result
+        include_archived: Fall back to the semester archive when the ID is not in the hot store
+    """
+    backend = get_storage_backend()
+    if getattr(backend, 'loads_whole_store', False):
+        evaluation = _evaluation_cache.get_by_id(backend.version(), backend.load_evaluations, evaluation_id)
+    else:
+        evaluation = freeze(backend.get_evaluation_by_id(evaluation_id))
     
-    return None
+    if evaluation is None and include_archived:
+        # Archived records are stored with their blob fields inlined
+        return freeze(_semester_archive().get(evaluation_id))
+    return resolve_evaluation_blobs(evaluation) if resolve_blobs else evaluation
 
 def save_ai_original(evaluation_id: str, ai_data: Dict[str, Any]) -> bool:
     """Save the AI-generated original version of an evaluation
@@ -140,73 +987,48 @@ def save_ai_original(evaluation_id: str, ai_data: Dict[str, Any]) -> bool:
     Returns:
         True if saved successfully, False otherwise
     """
-    evaluations = load_evaluations()
+    saved_at = datetime.now().isoformat()
+    ai_original = {
+        'justifications': ai_data.get('justifications', {}),
+        'ai_analyses': ai_data.get('ai_analyses', {}),
+        'scores': ai_data.get('scores', {}),
+        'observation_notes': ai_data.get('observation_notes', ''),
+        'saved_at': saved_at
+    }
+    current = get_evaluation_by_id(evaluation_id, resolve_blobs=False, include_archived=False)
+    ai_diff = compute_ai_diff(current, ai_original) if current else None
+    ai_original = _externalize_value(ai_original)
     
-    for i, evaluation in enumerate(evaluations):
-        if evaluation.get('id') == evaluation_id:
-            # Save AI original data
-            evaluation['ai_original'] = {
-                'justifications': ai_data.get('justifications', {}),
-                'ai_analyses': ai_data.get('ai_analyses', {}),
-                'scores': ai_data.get('scores', {}),
-                'observation_notes': ai_data.get('observation_notes', ''),
-                'saved_at': datetime.now().isoformat()
-            }
-            evaluation['has_ai_original'] = True
-            evaluation['ai_original_saved_at'] = datetime.now().isoformat()
-            
-            # Save back to file
-            with open(EVALUATIONS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(evaluations, f, indent=2, ensure_ascii=False)
-            
-            return True
-    
-    return False
+    return get_storage_backend().set_ai_original(evaluation_id, ai_original, saved_at, ai_diff)
 
 def get_evaluation_comparison(evaluation_id: str) -> Dict[str, Any]:
     """Get comparison data between AI original and current version
     
+    Reads the diff stored with the evaluation at save time; it is only
+    recomputed for evaluations saved before diffs were stored.
+    
     Returns dict with:
         - current: Current evaluation data
         - ai_original: Original AI-generated data
-        - differences: List of fields that differ
+        - differences: List of fields that differ, with word-level edit_distance,
+          tokens_added and tokens_removed for justifications
+        - has_changes: Whether anything differs
+        - stats: Change totals (see utils.ai_diff.AI_DIFF_TOTALS)
     """
     evaluation = get_evaluation_by_id(evaluation_id)
     if not evaluation or not evaluation.get('ai_original'):
         return None
+    ai_original = evaluation['ai_original']
     
-    differences = []
-    ai_original = evaluation.get('ai_original', {})
-    
-    # Compare justifications
-    current_just = evaluation.get('justifications', {})
-    ai_just = ai_original.get('justifications', {})
-    
-    for item_id in set(list(current_just.keys()) + list(ai_just.keys())):
-        if current_just.get(item_id, '') != ai_just.get(item_id, ''):
-            differences.append({
-                'field': 'justification',
-                'item_id': item_id,
-                'ai_value': ai_just.get(item_id, ''),
-                'current_value': current_just.get(item_id, '')
-            })
-    
-    # Compare scores
-    current_scores = evaluation.get('scores', {})
-    ai_scores = ai_original.get('scores', {})
-    
-    for item_id in set(list(current_scores.keys()) + list(ai_scores.keys())):
-        if current_scores.get(item_id) != ai_scores.get(item_id):
-            differences.append({
-                'field': 'score',
-                'item_id': item_id,
-                'ai_value': ai_scores.get(item_id),
-                'current_value': current_scores.get(item_id)
-            })
+    ai_diff = evaluation.get('ai_diff')
+    if not is_current(ai_diff, ai_original):
+        ai_diff = compute_ai_diff(evaluation, ai_original)
+    differences = expand_differences(ai_diff, evaluation, ai_original)
     
     return {
         'current': evaluation,
         'ai_original': ai_original,
         'differences': differences,
-        'has_changes': len(differences) > 0
-    } 
\ No newline at end of file
+        'has_changes': len(differences) > 0,
+        'stats': {total: ai_diff[total] for total in AI_DIFF_TOTALS}
+    }
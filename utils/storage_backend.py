@@ -0,0 +1,146 @@
+"""
+Storage backend interface
+utils/storage.py delegates persistence to one object implementing
+StorageBackend, chosen with STORAGE_BACKEND. Blob-stored fields, the AI
+diff and comparison, search, analytics and the archive are layered on top by
+utils/storage.py, so a backend only stores evaluation documents.
+
+Backends shipped:
+
+    json     JSONFileStorage (utils.json_storage): one document, rewritten per write
+    jsonl    JournalStorage (utils.journal_storage): append-only journal with compaction
+    sqlite   SQLiteStorage (utils.sqlite_storage): one row per evaluation, indexed columns
+    partitioned  PartitionedStorage (utils.partitioned_storage): one backend per
+                 department and evaluator, with a global index
+
+scripts/check_storage_backends.py checks a backend against this interface and
+measures its throughput.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple, runtime_checkable
+
+BACKEND_NAMES = ('json', 'jsonl', 'sqlite', 'partitioned')
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """What utils/storage.py needs from an evaluation store
+
+    Records are plain dicts keyed by 'id'. Every write that stores an
+    evaluation sets its 'version' (1 when new, one more than the stored
+    version otherwise); import_evaluations() keeps the versions it is given.
+    Reads return evaluations in first-insertion order.
+
+    Optional extensions, used when present:
+
+        query_summaries(query, limit, cursor) -> (items, next_cursor)
+        count_matching(query) -> int
+            Answer query_evaluations() / count_evaluations() natively
+            (query from utils.query.build_query)
+        loads_whole_store = True
+            Reads parse the whole store, so single lookups are served from
+            the process cache
+        read_only = True
+            Writes raise PermissionError; load_evaluations() may return a
+            lazy sequence that is not cached
+    """
+
+    def save_evaluation(self, evaluation: Dict[str, Any], preserve_ai_original: bool = True,
+                        expected_version: Optional[int] = None) -> int:
+        """Insert or update one evaluation; returns its new version
+
+        With preserve_ai_original, a stored ai_original (and its saved_at)
+        replaces the evaluation's own.
+
+        Raises:
+            VersionConflictError: expected_version is set and the stored version differs
+        """
+        ...
+
+    def save_evaluations(self, evaluations: List[Dict[str, Any]], preserve_ai_original: bool = True) -> int:
+        """Insert or update a batch as unconditional saves in one write; returns the number saved"""
+        ...
+
+    def delete_evaluation(self, evaluation_id: str) -> bool:
+        """Delete one evaluation; returns True if it existed"""
+        ...
+
+    def delete_evaluations(self, evaluation_ids: Iterable[str]) -> int:
+        """Delete a batch in one write; returns the number deleted"""
+        ...
+
+    def import_evaluations(self, evaluations: List[Dict[str, Any]]) -> int:
+        """Insert evaluations whose IDs are not stored yet, unchanged; returns the number imported
+
+        Evaluations without an ID, and repeats of an ID, are skipped.
+        """
+        ...
+
+    def set_ai_original(self, evaluation_id: str, ai_original: Dict[str, Any], saved_at: str,
+                        ai_diff: Optional[Dict[str, Any]] = None) -> bool:
+        """Attach AI original data (and its diff) to a stored evaluation, bumping its version
+
+        Returns False if the evaluation does not exist.
+        """
+        ...
+
+    def clear(self) -> None:
+        """Delete all evaluations"""
+        ...
+
+    def load_evaluations(self) -> List[Dict[str, Any]]:
+        """All evaluations"""
+        ...
+
+    def iter_evaluations(self) -> Iterator[Dict[str, Any]]:
+        """All evaluations, one at a time"""
+        ...
+
+    def load_summaries(self) -> List[Dict[str, Any]]:
+        """Summaries (utils.summaries.summarize_evaluation) of all evaluations"""
+        ...
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Summaries of all evaluations, one at a time"""
+        ...
+
+    def get_evaluation_by_id(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """One evaluation, or None"""
+        ...
+
+    def count(self) -> int:
+        """Number of stored evaluations"""
+        ...
+
+    def version(self) -> Any:
+        """Marker that changes with every write, also by other processes (used for cache invalidation)"""
+        ...
+
+
+# Method names of the StorageBackend interface
+PROTOCOL_METHODS: Tuple[str, ...] = tuple(
+    name for name, value in vars(StorageBackend).items() if callable(value) and not name.startswith('_')
+)
+
+
+def missing_methods(backend: Any) -> List[str]:
+    """Names of StorageBackend methods a backend object lacks"""
+    return [name for name in PROTOCOL_METHODS if not callable(getattr(backend, name, None))]
+
+
+def open_backend(name: str, storage_dir: str) -> StorageBackend:
+    """A backend of the given kind with default file names inside storage_dir"""
+    if name == 'json':
+        from utils.json_storage import JSONFileStorage
+        return JSONFileStorage(os.path.join(storage_dir, 'evaluations.json'))
+    if name == 'jsonl':
+        from utils.journal_storage import JournalStorage
+        return JournalStorage(os.path.join(storage_dir, 'journal'))
+    if name == 'sqlite':
+        from utils.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(storage_dir, 'evaluations.db'))
+    if name == 'partitioned':
+        from utils.partitioned_storage import PartitionedStorage
+        return PartitionedStorage(storage_dir)
+    raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKEND_NAMES)})")
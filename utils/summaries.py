@@ -0,0 +1,107 @@
+"""
+Evaluation summaries for list views
+A summary keeps the small fields dashboards and the sidebar need and leaves out
+heavy text such as lesson plans, justifications and AI analyses
+"""
+
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from utils.ai_diff import AI_DIFF_TOTALS
+
+# Fields kept in the stored summary index
+SUMMARY_FIELDS = (
+    'id',
+    'student_name',
+    'evaluator_name',
+    'evaluator_role',
+    'school_name',
+    'school_setting',
+    'subject_area',
+    'grade_levels',
+    'department',
+    'semester',
+    'rubric_type',
+    'status',
+    'total_score',
+    'scores',
+    'disposition_scores',
+    'date',
+    'created_at',
+    'completed_at',
+    'lesson_plan_provided',
+    'is_synthetic',
+    'has_ai_original',
+    'version',
+    'ai_changes',  # AI-vs-supervisor change totals from the stored ai_diff
+)
+
+# Bump when SUMMARY_FIELDS or summarize_evaluation() change, so stored summaries are rebuilt
+SUMMARY_FORMAT = 2
+
+
+def summarize_evaluation(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the stored summary of an evaluation"""
+    summary = {field: evaluation[field] for field in SUMMARY_FIELDS if field in evaluation}
+    ai_diff = evaluation.get('ai_diff')
+    if isinstance(ai_diff, dict):
+        summary['ai_changes'] = {total: ai_diff.get(total, 0) for total in AI_DIFF_TOTALS}
+    return summary
+
+
+def project(record: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of a summary (all of them if fields is None)"""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def unsupported_fields(fields: Optional[Iterable[str]]) -> set:
+    """Requested fields that are not in the summary index"""
+    if fields is None:
+        return set()
+    return set(fields) - set(SUMMARY_FIELDS)
+
+
+# Summary fields counted per value by aggregate_summaries()
+AGGREGATE_FIELDS = ('status', 'rubric_type', 'department', 'semester', 'evaluator_name')
+
+
+def empty_aggregate() -> Dict[str, Any]:
+    """Totals of no summaries"""
+    return {'count': 0, 'lesson_plan_provided': 0, 'scored': 0, 'total_score_sum': 0,
+            **{f"by_{field}": {} for field in AGGREGATE_FIELDS}}
+
+
+def aggregate_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dashboard totals of a set of summaries
+
+    Returns:
+        {'count': n, 'lesson_plan_provided': n, 'scored': n, 'total_score_sum': x,
+         'by_status': {value: n}, 'by_rubric_type': ..., one 'by_<field>' per AGGREGATE_FIELDS}
+    """
+    totals = empty_aggregate()
+    for summary in summaries:
+        totals['count'] += 1
+        if summary.get('lesson_plan_provided'):
+            totals['lesson_plan_provided'] += 1
+        if isinstance(summary.get('total_score'), (int, float)):
+            totals['scored'] += 1
+            totals['total_score_sum'] += summary['total_score']
+        for field in AGGREGATE_FIELDS:
+            counts = totals[f"by_{field}"]
+            value = str(summary.get(field) or '')
+            counts[value] = counts.get(value, 0) + 1
+    return totals
+
+
+def merge_aggregates(aggregates: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum of aggregate_summaries() results"""
+    merged = empty_aggregate()
+    for aggregate in aggregates:
+        for key in ('count', 'lesson_plan_provided', 'scored', 'total_score_sum'):
+            merged[key] += aggregate.get(key, 0)
+        for field in AGGREGATE_FIELDS:
+            counts = merged[f"by_{field}"]
+            for value, count in aggregate.get(f"by_{field}", {}).items():
+                counts[value] = counts.get(value, 0) + count
+    return merged